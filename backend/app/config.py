@@ -12,6 +12,10 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # 변경 시 다음 로그인에서 자동 재해시
+    AUTH_HASH_WORKERS: int = 0  # bcrypt 스레드 수 (0 = CPU 코어 수)
+
     # Logo.dev
     LOGO_DEV_TOKEN: str = ""
 
@@ -19,6 +23,52 @@ class Settings(BaseSettings):
     CODEF_CLIENT_ID: str = ""
     CODEF_CLIENT_SECRET: str = ""
     CODEF_PUBLIC_KEY: str = ""
+    CODEF_ENV: str = "demo"  # demo | production | sandbox
+    CODEF_TRANSPORT: str = ""  # "" (네트워크) | record | replay
+    CODEF_FIXTURE_DIR: str = "fixtures/codef"  # record/replay fixture 위치
+    CODEF_FIXTURE_SIZE: str = "medium"  # replay 합성 응답 크기: small | medium | large
+    CODEF_REPLAY_LATENCY_MS: float = 0.0  # replay 응답 지연 (±50%)
+    CODEF_REPLAY_ERROR_RATE: float = 0.0  # replay 장애 주입 비율
+    CODEF_REPLAY_SEED: int = 0
+    CODEF_SCRAPE_FANOUT: int = 3  # 스크랩 1건당 동시 계좌/기간 조회 수
+    CODEF_ORG_MAX_IN_FLIGHT: int = 8  # 기관별 동시 호출 한도 (전체 사용자 합)
+    CODEF_ORG_MAX_RPS: float = 5.0  # 기관별 초당 호출 한도 (0 = 제한 없음)
+    CODEF_CARD_WINDOW_MONTHS: int = 1  # 카드 승인내역 분할 조회 단위 (개월)
+    CODEF_SYNC_OVERLAP_DAYS: int = 3  # 증분 동기화 시 high-water mark 이전 재조회 일수
+    CODEF_DETECT_HISTORY_MONTHS: int = 24  # 구독 탐지에 사용할 저장 거래 기간
+    CODEF_KEEP_RAW: bool = False  # 거래 원본 응답(raw) 보관/저장 여부
+    CODEF_RETRY_ATTEMPTS: int = 3  # 일시 장애 시 총 시도 횟수
+    CODEF_RETRY_BASE_DELAY: float = 0.5
+    CODEF_RETRY_MAX_DELAY: float = 8.0
+    CODEF_BREAKER_FAILURES: int = 5  # 기관별 연속 일시 장애 → circuit open
+    CODEF_BREAKER_RESET_SECONDS: float = 60.0
+    CODEF_TRACE_CAPACITY: int = 5000  # 최근 호출 추적 레코드 수
+    CODEF_TRACE_BODY_SAMPLE_RATE: float = 0.0  # 본문 캡처 비율 (0 = 끔, 민감 필드 마스킹)
+    CODEF_SCRAPE_CACHE_TTL_SECONDS: int = 120  # 동일 스크랩 결과 재사용 시간 (0 = 끔)
+    CODEF_JOB_TTL_SECONDS: int = 600  # 끝난 스크랩/탐지 job 결과 보관 시간
+    CODEF_DISCOVERY_STALE_MINUTES: int = 10  # 재시작 시 이보다 오래된 discovering 만 복구
+    CODEF_SYNC_ENABLED: bool = True  # 야간 전체 연결 동기화
+    CODEF_SYNC_START_HOUR: int = 1
+    CODEF_SYNC_END_HOUR: int = 6  # 이 시각 전에 마지막 배치
+    CODEF_SYNC_INTERVAL_MINUTES: int = 20  # 배치 간격 (밤새 분산)
+    CODEF_SYNC_CONCURRENCY: int = 4  # 배치 내 동시 동기화 연결 수
+    CODEF_SYNC_MAX_BATCH: int = 200
+    CODEF_SYNC_MONTHS_BACK: int = 6
+    CODEF_DETECT_BATCH_ENABLED: bool = True  # 야간 동기화 후 전체 사용자 일괄 탐지
+    CODEF_DETECT_WORKERS: int = 0  # 탐지 프로세스 수 (0 = CPU 코어 수)
+    CODEF_DETECT_CHUNK_USERS: int = 100  # 워커 작업 1건당 사용자 수
+
+    # Outbound HTTP (shared pooled clients, see app/services/http_client.py)
+    HTTP_HTTP2: bool = True
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_DEFAULT_MAX_CONNECTIONS: int = 10
+    HTTP_CODEF_MAX_CONNECTIONS: int = 50
+    HTTP_CODEF_TIMEOUT: float = 60.0
+    HTTP_CODEF_TOKEN_TIMEOUT: float = 30.0
+    HTTP_LOGO_TIMEOUT: float = 5.0
+    HTTP_DISCORD_TIMEOUT: float = 10.0
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
@@ -1,6 +1,7 @@
 import logging
 import traceback
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI, Request
@@ -32,6 +33,11 @@ from app.routers import (
     subscription_members,
     subscriptions,
 )
+from app.services.batch_detection import run_batch_detection, shutdown_pool
+from app.services.codef import codef_client
+from app.services.codef_jobs import job_manager
+from app.services.codef_sync import run_codef_sync
+from app.services.http_client import CODEF, http_clients
 from app.services.scheduler import (
     check_expiring_cards,
     check_upcoming_payments,
@@ -50,6 +56,10 @@ async def run_scheduled_tasks() -> None:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 외부 API 공용 커넥션 풀 (Codef / logo.dev / Discord)
+    http_clients.start()
+    codef_client.http_client = http_clients.get(CODEF)
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         from sqlalchemy import text
@@ -64,6 +74,10 @@ async def lifespan(app: FastAPI):
             "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS business_type VARCHAR(2) DEFAULT 'CD'",
             "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS account_password VARCHAR(200)",
             "ALTER TABLE payment_methods ADD COLUMN IF NOT EXISTS card_no VARCHAR(30)",
+            "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS synced_from DATE",
+            "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS synced_through DATE",
+            "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS last_error TEXT",
+            "ALTER TABLE bank_connections ADD COLUMN IF NOT EXISTS discovery_started_at TIMESTAMP",
         ]
         for sql in migrations:
             try:
@@ -71,9 +85,57 @@ async def lifespan(app: FastAPI):
             except Exception:
                 pass
 
+    # 연결별 카드번호 유일 인덱스: 기존 중복(가장 작은 id 만 남기고 구독을 옮김)을 먼저 정리.
+    # 실패해도 다른 마이그레이션이 묶여 롤백되지 않도록 별도 트랜잭션에서 한다.
+    duplicate_cards = (
+        "WITH dups AS (SELECT id, min(id) OVER "
+        "(PARTITION BY bank_connection_id, card_no) AS keep_id "
+        "FROM payment_methods WHERE bank_connection_id IS NOT NULL "
+        "AND card_no IS NOT NULL AND card_no <> '') "
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    duplicate_cards
+                    + "UPDATE subscriptions s SET payment_method_id = d.keep_id "
+                    "FROM dups d WHERE s.payment_method_id = d.id AND d.id <> d.keep_id"
+                )
+            )
+            await conn.execute(
+                text(
+                    duplicate_cards
+                    + "DELETE FROM payment_methods p USING dups d "
+                    "WHERE p.id = d.id AND d.id <> d.keep_id"
+                )
+            )
+            await conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_payment_methods_conn_card "
+                    "ON payment_methods (bank_connection_id, card_no) "
+                    "WHERE card_no IS NOT NULL AND card_no <> ''"
+                )
+            )
+    except Exception:
+        logger.exception("Could not create uq_payment_methods_conn_card")
+
     # 기존 Codef BankConnection 중 PaymentMethod가 없는 것들 자동 생성
     async with async_session() as session:
         try:
+            # 재시작으로 중단된 보유카드/계좌 조회 → connected 로 복구 (아래에서 기본 PM 생성,
+            # 계좌는 스크랩 시 account-list 재조회). 다른 워커가 지금 조회 중인 연결은
+            # 건드리지 않도록 시작한 지 오래된 것만 (시각이 없으면 등록 시각 기준).
+            stale_before = datetime.now() - timedelta(
+                minutes=settings.CODEF_DISCOVERY_STALE_MINUTES
+            )
+            await session.execute(
+                text(
+                    "UPDATE bank_connections SET status = 'connected' "
+                    "WHERE status = 'discovering' "
+                    "AND COALESCE(discovery_started_at, created_at) < :stale_before"
+                ),
+                {"stale_before": stale_before},
+            )
             from app.models.bank_connection import BankConnection
             from app.models.payment_method import PaymentMethod
 
@@ -115,11 +177,26 @@ async def lifespan(app: FastAPI):
             await session.rollback()
 
     scheduler.add_job(run_scheduled_tasks, "cron", hour=9, minute=0)
+    if settings.CODEF_SYNC_ENABLED:
+        scheduler.add_job(
+            run_codef_sync,
+            "cron",
+            hour=f"{settings.CODEF_SYNC_START_HOUR}-{settings.CODEF_SYNC_END_HOUR - 1}",
+            minute=f"*/{settings.CODEF_SYNC_INTERVAL_MINUTES}",
+        )
+    if settings.CODEF_DETECT_BATCH_ENABLED:
+        # 마지막 동기화 배치가 끝난 뒤 전체 사용자 탐지
+        scheduler.add_job(
+            run_batch_detection, "cron", hour=settings.CODEF_SYNC_END_HOUR, minute=0
+        )
     scheduler.start()
 
     yield
 
     scheduler.shutdown()
+    await job_manager.shutdown()
+    shutdown_pool()
+    await http_clients.aclose()
 
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
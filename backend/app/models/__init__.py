@@ -9,6 +9,11 @@ from app.models.sharing_platform import SharingPlatform
 from app.models.shared_subscription import SharedSubscription
 from app.models.organization import Organization, OrgMember
 from app.models.bank_connection import BankConnection
+from app.models.codef_token import CodefToken
+from app.models.transaction import Transaction
+from app.models.subscription_candidate import SubscriptionCandidate
+from app.models.merchant_state import MerchantState
+from app.models.detection_event import DetectionEvent
 
 __all__ = [
     "User",
@@ -23,4 +28,9 @@ __all__ = [
     "Organization",
     "OrgMember",
     "BankConnection",
+    "CodefToken",
+    "Transaction",
+    "SubscriptionCandidate",
+    "MerchantState",
+    "DetectionEvent",
 ]
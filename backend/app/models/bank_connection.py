@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -40,6 +40,18 @@ class BankConnection(Base):
         String(20), default="connected"
     )  # connected | disconnected | error
     last_synced_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(
+        Text, nullable=True
+    )  # 마지막 동기화 오류 (성공 시 비움)
+    synced_from: Mapped[date | None] = mapped_column(
+        Date, nullable=True
+    )  # transactions 테이블에 저장된 조회 시작일
+    synced_through: Mapped[date | None] = mapped_column(
+        Date, nullable=True
+    )  # 누락 없이 저장된 마지막 조회일 (증분 동기화 high-water mark)
+    discovery_started_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True
+    )  # 보유카드/계좌 조회(discovering) 시작 시각
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     user = relationship("User", back_populates="bank_connections")
@@ -0,0 +1,25 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class DetectionEvent(Base):
+    """증분 탐지 이벤트 (새 반복 결제 / 결제 누락 / 가격 변경)."""
+
+    __tablename__ = "detection_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    merchant_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    name: Mapped[str] = mapped_column(String(200), default="")
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    billing_cycle: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    amount: Mapped[int] = mapped_column(BigInteger, default=0)
+    previous_amount: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    occurred_on: Mapped[date] = mapped_column(Date, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class MerchantState(Base):
+    """증분 탐지 상태 (사용자 + 가맹점 canonical key 단위, 간격/금액 Welford 통계)."""
+
+    __tablename__ = "merchant_states"
+    __table_args__ = (
+        UniqueConstraint("user_id", "merchant_key", name="uq_merchant_states_user_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    merchant_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    name: Mapped[str] = mapped_column(String(200), default="")
+    first_date: Mapped[date] = mapped_column(Date, nullable=False)
+    last_date: Mapped[date] = mapped_column(Date, nullable=False)
+    previous_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    occurrences: Mapped[int] = mapped_column(Integer, default=1)
+    # 결제 간격 (누락 결제는 주기 배수로 나눠 반영)
+    interval_count: Mapped[int] = mapped_column(Integer, default=0)
+    interval_mean: Mapped[float] = mapped_column(Float, default=0.0)
+    interval_m2: Mapped[float] = mapped_column(Float, default=0.0)
+    # 현재 가격 구간의 금액
+    amount_count: Mapped[int] = mapped_column(Integer, default=1)
+    amount_mean: Mapped[float] = mapped_column(Float, default=0.0)
+    amount_m2: Mapped[float] = mapped_column(Float, default=0.0)
+    last_amount: Mapped[int] = mapped_column(BigInteger, default=0)
+    previous_amount: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    billing_cycle: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    confidence: Mapped[float] = mapped_column(Float, default=0.0)
+    overdue_notified: Mapped[bool] = mapped_column(Boolean, default=False)
+    card_no: Mapped[str] = mapped_column(String(30), default="")
+    category: Mapped[str] = mapped_column(String(100), default="")
+    bank_connection_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("bank_connections.id", ondelete="SET NULL"), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
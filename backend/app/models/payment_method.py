@@ -1,6 +1,17 @@
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -8,6 +19,16 @@ from app.db import Base
 
 class PaymentMethod(Base):
     __tablename__ = "payment_methods"
+    __table_args__ = (
+        # Codef 연결별 카드/계좌 1건 (수동 등록은 card_no 가 비어 있어 제외)
+        Index(
+            "uq_payment_methods_conn_card",
+            "bank_connection_id",
+            "card_no",
+            unique=True,
+            postgresql_where=text("card_no IS NOT NULL AND card_no <> ''"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
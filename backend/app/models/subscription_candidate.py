@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class SubscriptionCandidate(Base):
+    """자동 탐지된 구독 후보 (연결별 가맹점 단위, 야간 동기화/탐지 결과)."""
+
+    __tablename__ = "subscription_candidates"
+    __table_args__ = (
+        UniqueConstraint(
+            "bank_connection_id", "merchant_key", name="uq_candidates_conn_merchant"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    bank_connection_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("bank_connections.id", ondelete="CASCADE"), nullable=False
+    )
+    merchant_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    billing_cycle: Mapped[str] = mapped_column(String(20), default="monthly")
+    billing_day: Mapped[int] = mapped_column(Integer, default=1)
+    occurrence_count: Mapped[int] = mapped_column(Integer, default=0)
+    last_payment_date: Mapped[date] = mapped_column(Date, nullable=False)
+    card_no: Mapped[str] = mapped_column(String(30), default="")
+    category: Mapped[str] = mapped_column(String(100), default="")
+    confidence: Mapped[float] = mapped_column(Float, default=0.0)
+    previous_amount: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    detected_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
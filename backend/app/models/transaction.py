@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class Transaction(Base):
+    """Codef로 수집한 카드 승인/계좌 거래내역 (연결별, content_hash로 중복 제거)."""
+
+    __tablename__ = "transactions"
+    __table_args__ = (
+        UniqueConstraint(
+            "bank_connection_id", "content_hash", name="uq_transactions_conn_hash"
+        ),
+        Index("ix_transactions_conn_date", "bank_connection_id", "tx_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    bank_connection_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("bank_connections.id", ondelete="CASCADE"), nullable=False
+    )
+    content_hash: Mapped[str] = mapped_column(String(40), nullable=False)
+    tx_date: Mapped[date] = mapped_column(Date, nullable=False)
+    tx_time: Mapped[str] = mapped_column(String(6), default="")
+    merchant: Mapped[str] = mapped_column(String(200), default="")
+    amount: Mapped[int] = mapped_column(BigInteger, default=0)
+    status: Mapped[str] = mapped_column(String(20), default="")
+    card_name: Mapped[str] = mapped_column(String(100), default="")
+    card_no: Mapped[str] = mapped_column(String(30), default="")
+    category: Mapped[str] = mapped_column(String(100), default="")
+    raw_compressed: Mapped[bytes | None] = mapped_column(
+        LargeBinary, nullable=True
+    )  # zlib(JSON) 원본 응답 항목
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
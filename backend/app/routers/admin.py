@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,7 +11,11 @@ from app.models.payment_method import PaymentMethod
 from app.models.subscription import Subscription
 from app.models.user import User
 from app.schemas.admin import (
+    AdminBatchDetection,
     AdminCategoryStats,
+    AdminCodefCall,
+    AdminCodefLatency,
+    AdminCodefLimiter,
     AdminDashboard,
     AdminRecentUser,
     AdminSubscriptionStats,
@@ -19,7 +23,11 @@ from app.schemas.admin import (
     AdminTopService,
     AdminUserSummary,
 )
+from app.services import batch_detection
 from app.services.auth import get_admin_user
+from app.services.codef_limiter import org_limiters
+from app.services.codef_resilience import circuit_breakers
+from app.services.codef_trace import codef_tracer
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -236,3 +244,62 @@ async def demote_from_admin(
     user.is_admin = False
     await db.flush()
     return {"message": f"{user.email}의 관리자 권한을 해제했습니다"}
+
+
+@router.get("/codef/latency", response_model=list[AdminCodefLatency])
+async def codef_latency(admin: User = Depends(get_admin_user)):
+    """Per endpoint/organization latency percentiles of recent Codef calls."""
+    return [AdminCodefLatency(**s) for s in codef_tracer.latency_stats()]
+
+
+@router.get("/codef/calls", response_model=list[AdminCodefCall])
+async def codef_recent_calls(
+    limit: int = Query(default=50, ge=1, le=500),
+    admin: User = Depends(get_admin_user),
+):
+    """Most recent Codef calls (bodies only when sampled, redacted)."""
+    return [
+        AdminCodefCall(
+            endpoint=c.endpoint,
+            organization=c.organization,
+            started_at=datetime.fromtimestamp(c.started_at),
+            duration_ms=round(c.duration_ms, 1),
+            request_bytes=c.request_bytes,
+            response_bytes=c.response_bytes,
+            status_code=c.status_code,
+            result_code=c.result_code,
+            retries=c.retries,
+            error=c.error,
+            request_body=c.request_body,
+            response_body=c.response_body,
+        )
+        for c in codef_tracer.recent(limit)
+    ]
+
+
+@router.get("/codef/limiters", response_model=list[AdminCodefLimiter])
+async def codef_limiters(admin: User = Depends(get_admin_user)):
+    """Per-organization in-flight/queue depth and circuit breaker state."""
+    breakers = circuit_breakers.snapshot()
+    return [
+        AdminCodefLimiter(**s, breaker_state=breakers.get(s["organization"], "closed"))
+        for s in org_limiters.snapshot()
+    ]
+
+
+@router.get("/codef/detection-batch", response_model=AdminBatchDetection | None)
+async def codef_detection_batch(admin: User = Depends(get_admin_user)):
+    """Throughput of the last nightly batch detection run (None before the first)."""
+    stats = batch_detection.last_stats
+    if stats is None:
+        return None
+    return AdminBatchDetection(
+        started_at=stats.started_at,
+        users=stats.users,
+        connections=stats.connections,
+        transactions=stats.transactions,
+        candidates=stats.candidates,
+        elapsed_seconds=round(stats.elapsed_seconds, 2),
+        users_per_sec=round(stats.users_per_sec, 1),
+        transactions_per_sec=round(stats.transactions_per_sec, 1),
+    )
@@ -21,7 +21,7 @@ from app.services.auth import (
     create_refresh_token,
     get_current_user,
     hash_password,
-    verify_password,
+    verify_and_update_password,
 )
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -35,7 +35,7 @@ async def register(data: UserRegister, db: AsyncSession = Depends(get_db)):
 
     user = User(
         email=data.email,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password(data.password),
         name=data.name,
     )
     db.add(user)
@@ -56,12 +56,20 @@ async def register(data: UserRegister, db: AsyncSession = Depends(get_db)):
 async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(data.password, user.password_hash):
+    verified, new_hash = (
+        await verify_and_update_password(data.password, user.password_hash)
+        if user
+        else (False, None)
+    )
+    if not user or not verified:
         raise HTTPException(
             status_code=401, detail="이메일 또는 비밀번호가 올바르지 않습니다"
         )
     if not user.is_active:
         raise HTTPException(status_code=403, detail="비활성화된 계정입니다")
+    if new_hash:
+        # BCRYPT_ROUNDS 변경 → 로그인 시 투명하게 재해시
+        user.password_hash = new_hash
 
     return TokenResponse(
         access_token=create_access_token({"sub": str(user.id)}),
@@ -129,7 +137,7 @@ async def update_me(
     if data.name is not None:
         current_user.name = data.name
     if data.password is not None:
-        current_user.password_hash = hash_password(data.password)
+        current_user.password_hash = await hash_password(data.password)
     await db.flush()
     await db.refresh(current_user)
     return current_user
@@ -7,6 +7,7 @@ from app.models.bank_connection import BankConnection
 from app.models.user import User
 from app.schemas.bank_connection import BankConnectionCreate, BankConnectionResponse
 from app.services.auth import get_current_user
+from app.services.codef_cache import scrape_cache
 
 router = APIRouter(prefix="/bank-connections", tags=["bank-connections"])
 
@@ -76,6 +77,7 @@ async def delete_connection(
     if not conn:
         raise HTTPException(status_code=404, detail="연결 정보를 찾을 수 없습니다")
     await db.delete(conn)
+    scrape_cache.invalidate(bank_connection_id=conn_id)
 
 
 @router.post("/{conn_id}/sync")
@@ -5,48 +5,107 @@ Endpoints:
 - GET  /codef/status          - Check if Codef is configured
 - GET  /codef/card-companies  - List supported card companies
 - POST /codef/register-card   - Register a card via Codef
-- POST /codef/scrape          - Scrape transactions from a registered card
+- POST /codef/scrape          - Scrape transactions from a registered card (?stream=true: NDJSON)
 - POST /codef/detect          - Detect subscriptions from scraped transactions
+- POST /codef/detect-all      - Detect across all of the user's connections (merged)
+- GET  /codef/detected        - Stored detection results (nightly sync)
+- GET  /codef/detection-events - New/missed/price-change events from incremental detection
+- POST /codef/jobs            - Run scrape/detect in the background (returns job id)
+- GET  /codef/jobs/{id}       - Poll job status/result
+- GET  /codef/jobs/{id}/events - Job progress as Server-Sent Events
 - POST /codef/import          - Import detected subscriptions
+- GET  /codef/connection/{id}/discovery - Poll card/account discovery after registration
 - DELETE /codef/connection/{id} - Remove a Codef card connection
 """
 
-from datetime import date, datetime
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.config import settings
+from app.db import async_session, get_db
 from app.models.bank_connection import BankConnection
 from app.models.payment_method import PaymentMethod
 from app.models.subscription import Subscription
 from app.models.user import User
 from app.schemas.codef import (
     CodefCardOrg,
+    CodefDetectAllRequest,
+    CodefDetectAllResponse,
     CodefDetectResponse,
+    CodefDiscoveryResponse,
+    CodefJobRequest,
+    CodefJobResponse,
     CodefRegisterBankRequest,
     CodefRegisterBankResponse,
     CodefRegisterCardRequest,
     CodefRegisterCardResponse,
+    CodefScrapeFailure,
     CodefScrapeRequest,
     CodefScrapeResponse,
     CodefStatusResponse,
     CodefTransaction,
     DetectedSubscription,
+    DetectionEventResponse,
+    StoredDetectedSubscription,
+    UserDetectedSubscription,
 )
 from app.services.auth import get_current_user
+from app.services.batch_detection import detect_in_pool
+from app.services.candidate_store import (
+    by_latest_source,
+    list_candidates,
+    replace_candidates,
+    replace_candidates_bulk,
+)
 from app.services.codef import (
     BANK_FIELD_CONFIG,
     BANK_ORGS,
     CARD_FIELD_CONFIG,
     CARD_ORGS,
     codef_client,
+    parse_bank_accounts,
+    parse_cards,
+)
+from app.services.codef_cache import scrape_cache
+from app.services.codef_errors import CodefCircuitOpenError, CodefCredentialError
+from app.services.codef_jobs import CodefJob, job_manager
+from app.services.incremental_detection import list_events
+from app.services.scheduler import next_billing_dates
+from app.services.transaction_store import (
+    content_hash,
+    iter_transactions,
+    latest_sources,
+    load_transactions,
+    plan_since,
+    requested_start,
+    stored_identifiers,
+    sync_connection,
+    sync_connections,
+    upsert_payment_methods,
 )
+from app.services.tx_record import TxRecord
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/codef", tags=["codef"])
 
 
+def _codef_http_exception(e: Exception) -> HTTPException:
+    if isinstance(e, CodefCredentialError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, CodefCircuitOpenError):
+        return HTTPException(status_code=503, detail=str(e))
+    return HTTPException(status_code=502, detail=str(e))
+
+
 @router.get("/status", response_model=CodefStatusResponse)
 async def get_codef_status():
     """Check if Codef API is configured and ready."""
@@ -92,6 +151,88 @@ async def list_bank_companies():
     return result
 
 
+# 등록 직후 보유카드/계좌 조회 중인 연결도 "이미 등록됨"으로 본다
+ACTIVE_STATUSES = ("connected", "discovering")
+
+
+async def _discover_holdings(bank_connection_id: int) -> dict:
+    """Fetch the card/account list of a new connection and store PaymentMethods."""
+    async with async_session() as session:
+        try:
+            conn = await session.get(BankConnection, bank_connection_id)
+            if conn is None:
+                return {"found": 0}
+            is_bank = conn.business_type == "BK"
+            found: list[tuple[str, str]] = []
+            try:
+                if is_bank:
+                    found = parse_bank_accounts(
+                        await codef_client.get_bank_account_list(
+                            connected_id=conn.connected_id,
+                            organization=conn.organization_code,
+                        )
+                    )
+                else:
+                    found = parse_cards(
+                        await codef_client.get_card_list(
+                            connected_id=conn.connected_id,
+                            organization=conn.organization_code,
+                        )
+                    )
+                conn.last_error = None
+            except Exception as e:
+                logger.warning(f"Codef discovery failed for conn={conn.id}: {e}")
+                target = "보유계좌" if is_bank else "보유카드"
+                conn.last_error = f"{target} 조회 실패: {e}"[:1000]
+
+            if found:
+                await upsert_payment_methods(
+                    session,
+                    conn.user_id,
+                    conn.id,
+                    found,
+                    card_type="bank_transfer" if is_bank else "credit",
+                    default_name=conn.institution_name,
+                )
+            elif not await session.scalar(
+                select(PaymentMethod.id)
+                .where(PaymentMethod.bank_connection_id == conn.id)
+                .limit(1)
+            ):
+                # 조회 실패/빈 목록이면 등록 정보로 기본 PaymentMethod 1개 생성
+                # (다시 돌아도 중복으로 만들지 않는다 — card_no="" 는 유일 인덱스 밖)
+                card_no = "" if is_bank else conn.card_no or ""
+                session.add(
+                    PaymentMethod(
+                        user_id=conn.user_id,
+                        name=conn.institution_name,
+                        card_no=card_no,
+                        card_last_four=card_no[-4:] if len(card_no) >= 4 else None,
+                        card_type="bank_transfer" if is_bank else "credit",
+                        is_active=True,
+                        bank_connection_id=conn.id,
+                    )
+                )
+            conn.status = "connected"
+            await session.commit()
+            logger.info(f"Codef discovery: conn={conn.id} found {len(found)}")
+            return {"found": len(found)}
+        except Exception:
+            await session.rollback()
+            raise
+
+
+def _start_discovery(conn: BankConnection) -> CodefJob:
+    """Run discovery in the background; the caller's session commits the timestamp."""
+    conn_id = conn.id
+    conn.discovery_started_at = datetime.now()
+
+    async def runner(job: CodefJob) -> dict:
+        return await _discover_holdings(conn_id)
+
+    return job_manager.submit(conn.user_id, "discovery", conn_id, 0, runner)
+
+
 @router.post("/register-bank", response_model=CodefRegisterBankResponse)
 async def register_bank(
     data: CodefRegisterBankRequest,
@@ -111,7 +252,7 @@ async def register_bank(
             BankConnection.organization_code == data.organization_code,
             BankConnection.provider == "codef",
             BankConnection.business_type == "BK",
-            BankConnection.status == "connected",
+            BankConnection.status.in_(ACTIVE_STATUSES),
         )
     )
     if existing.scalar_one_or_none():
@@ -139,7 +280,7 @@ async def register_bank(
             existing_connected_id=existing_connected_id,
         )
     except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+        raise _codef_http_exception(e)
 
     conn = BankConnection(
         user_id=current_user.id,
@@ -149,109 +290,26 @@ async def register_bank(
         connected_id=connected_id,
         business_type="BK",
         account_password=data.account_password or "",
-        status="connected",
+        status="discovering",
     )
     db.add(conn)
     await db.flush()
     await db.refresh(conn)
+    # 같은 connectedId/기관으로 재등록 → 이전 조회 결과 무효화
+    scrape_cache.invalidate(
+        connected_id=connected_id, organization=data.organization_code
+    )
 
-    discovered_accounts: list[dict[str, str]] = []
-    try:
-        acct_data = await codef_client.get_bank_account_list(
-            connected_id=connected_id,
-            organization=data.organization_code,
-        )
-        import logging as _log
-
-        _log.getLogger(__name__).info(
-            f"Bank account-list raw keys: {list(acct_data.keys()) if isinstance(acct_data, dict) else type(acct_data)}"
-        )
-
-        # Codef 보유계좌 응답: 계좌 종류별 분리 배열
-        # resDepositTrust(예금/신탁), resLoan(대출), resFund(펀드),
-        # resForeignCurrency(외화), resInsurance(보험)
-        account_type_keys = [
-            "resDepositTrust",
-            "resLoan",
-            "resFund",
-            "resForeignCurrency",
-            "resInsurance",
-        ]
-        all_raw_accounts: list[dict] = []
-        for key in account_type_keys:
-            items = acct_data.get(key, [])
-            if isinstance(items, list):
-                all_raw_accounts.extend(items)
-
-        if not all_raw_accounts:
-            all_raw_accounts = acct_data.get(
-                "resList", acct_data.get("resAccountList", [])
-            )
-
-        _log.getLogger(__name__).info(
-            f"Bank account-list found {len(all_raw_accounts)} accounts"
-        )
-
-        for acct in all_raw_accounts:
-            acct_no = acct.get("resAccount", acct.get("resAccountNo", ""))
-            acct_name = acct.get("resAccountName", acct.get("resAccountNickName", ""))
-            if acct_no:
-                discovered_accounts.append(
-                    {"account_no": acct_no, "account_name": acct_name}
-                )
-    except Exception as e:
-        import logging as _log
-
-        _log.getLogger(__name__).warning(f"Bank account-list failed: {e}")
-
-    if discovered_accounts:
-        for acct_info in discovered_accounts:
-            acct_no = acct_info["account_no"]
-            existing_pm = await db.execute(
-                select(PaymentMethod).where(
-                    PaymentMethod.user_id == current_user.id,
-                    PaymentMethod.bank_connection_id == conn.id,
-                    PaymentMethod.card_no == acct_no,
-                )
-            )
-            if not existing_pm.scalar_one_or_none():
-                display_name = acct_info["account_name"] or org_name
-                last_four = acct_no[-4:] if len(acct_no) >= 4 else acct_no
-                pm = PaymentMethod(
-                    user_id=current_user.id,
-                    name=display_name,
-                    card_no=acct_no,
-                    card_last_four=last_four,
-                    card_type="bank_transfer",
-                    is_active=True,
-                    bank_connection_id=conn.id,
-                )
-                db.add(pm)
-    else:
-        existing_pm = await db.execute(
-            select(PaymentMethod).where(
-                PaymentMethod.user_id == current_user.id,
-                PaymentMethod.bank_connection_id == conn.id,
-            )
-        )
-        if not existing_pm.scalar_one_or_none():
-            pm = PaymentMethod(
-                user_id=current_user.id,
-                name=org_name,
-                card_type="bank_transfer",
-                is_active=True,
-                bank_connection_id=conn.id,
-            )
-            db.add(pm)
-
-    await db.flush()
+    # 보유계좌 조회는 백그라운드로 (connectedId 저장 직후 응답)
+    await db.commit()
+    _start_discovery(conn)
 
     return CodefRegisterBankResponse(
         connected_id=connected_id,
         bank_connection_id=conn.id,
         organization_code=data.organization_code,
         organization_name=org_name,
-        accounts_found=len(discovered_accounts),
+        status=conn.status,
     )
 
 
@@ -275,7 +333,7 @@ async def register_card(
             BankConnection.user_id == current_user.id,
             BankConnection.organization_code == data.organization_code,
             BankConnection.provider == "codef",
-            BankConnection.status == "connected",
+            BankConnection.status.in_(ACTIVE_STATUSES),
         )
     )
     if existing.scalar_one_or_none():
@@ -306,7 +364,7 @@ async def register_card(
             existing_connected_id=existing_connected_id,
         )
     except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+        raise _codef_http_exception(e)
 
     conn = BankConnection(
         user_id=current_user.id,
@@ -316,88 +374,32 @@ async def register_card(
         connected_id=connected_id,
         business_type="CD",
         card_no=data.card_no or "",
-        status="connected",
+        status="discovering",
     )
     db.add(conn)
     await db.flush()
     await db.refresh(conn)
+    # 같은 connectedId/기관으로 재등록 → 이전 조회 결과 무효화
+    scrape_cache.invalidate(
+        connected_id=connected_id, organization=data.organization_code
+    )
 
-    # card-list API로 보유카드 전체 발견 → 카드별 PaymentMethod 생성
-    discovered_cards: list[dict[str, str]] = []
-    try:
-        card_list_data = await codef_client.get_card_list(
-            connected_id=connected_id,
-            organization=data.organization_code,
-        )
-        raw_cards = card_list_data.get("resList", card_list_data.get("resCardList", []))
-        for card in raw_cards:
-            card_num = card.get("resCardNo", card.get("resCardNumber", ""))
-            card_name = card.get("resCardName", "")
-            if card_num:
-                discovered_cards.append({"card_no": card_num, "card_name": card_name})
-    except Exception:
-        pass
-
-    if discovered_cards:
-        for card_info in discovered_cards:
-            card_num = card_info["card_no"]
-            existing_pm = await db.execute(
-                select(PaymentMethod).where(
-                    PaymentMethod.user_id == current_user.id,
-                    PaymentMethod.bank_connection_id == conn.id,
-                    PaymentMethod.card_no == card_num,
-                )
-            )
-            if not existing_pm.scalar_one_or_none():
-                display_name = card_info["card_name"] or org_name
-                last_four = card_num[-4:] if len(card_num) >= 4 else card_num
-                pm = PaymentMethod(
-                    user_id=current_user.id,
-                    name=display_name,
-                    card_no=card_num,
-                    card_last_four=last_four,
-                    card_type="credit",
-                    is_active=True,
-                    bank_connection_id=conn.id,
-                )
-                db.add(pm)
-    else:
-        # card-list 실패 시 등록 정보로 기본 PaymentMethod 1개 생성
-        existing_pm = await db.execute(
-            select(PaymentMethod).where(
-                PaymentMethod.user_id == current_user.id,
-                PaymentMethod.bank_connection_id == conn.id,
-            )
-        )
-        if not existing_pm.scalar_one_or_none():
-            pm = PaymentMethod(
-                user_id=current_user.id,
-                name=org_name,
-                card_no=data.card_no or "",
-                card_last_four=data.card_no[-4:]
-                if data.card_no and len(data.card_no) >= 4
-                else None,
-                card_type="credit",
-                is_active=True,
-                bank_connection_id=conn.id,
-            )
-            db.add(pm)
-
-    await db.flush()
+    # 보유카드 조회는 백그라운드로 (connectedId 저장 직후 응답)
+    await db.commit()
+    _start_discovery(conn)
 
     return CodefRegisterCardResponse(
         connected_id=connected_id,
         bank_connection_id=conn.id,
         organization_code=data.organization_code,
         organization_name=org_name,
+        status=conn.status,
     )
 
 
 async def _get_conn_and_identifiers(
     db: AsyncSession, bank_connection_id: int, user_id: int
 ) -> tuple["BankConnection", list[str]]:
-    import logging as _log
-
     result = await db.execute(
         select(BankConnection).where(
             BankConnection.id == bank_connection_id,
@@ -411,20 +413,10 @@ async def _get_conn_and_identifiers(
     if not conn.connected_id or not conn.organization_code:
         raise HTTPException(status_code=400, detail="Codef 연동 정보가 없습니다")
 
-    pm_result = await db.execute(
-        select(PaymentMethod.card_no).where(
-            PaymentMethod.bank_connection_id == bank_connection_id,
-            PaymentMethod.card_no.isnot(None),
-            PaymentMethod.card_no != "",
-        )
-    )
-    identifiers = [row[0] for row in pm_result.all()]
-
-    if not identifiers and conn.card_no:
-        identifiers = [conn.card_no]
+    identifiers = await stored_identifiers(db, conn)
 
     if not identifiers and conn.business_type == "BK" and conn.connected_id:
-        _log.getLogger(__name__).info(
+        logger.info(
             "BK connection has no account identifiers — re-fetching account-list"
         )
         try:
@@ -432,143 +424,477 @@ async def _get_conn_and_identifiers(
                 connected_id=conn.connected_id,
                 organization=conn.organization_code,
             )
-            account_type_keys = [
-                "resDepositTrust",
-                "resLoan",
-                "resFund",
-                "resForeignCurrency",
-                "resInsurance",
-            ]
-            for key in account_type_keys:
-                items = acct_data.get(key, [])
-                if isinstance(items, list):
-                    for acct in items:
-                        acct_no = acct.get("resAccount", acct.get("resAccountNo", ""))
-                        if acct_no and acct_no not in identifiers:
-                            identifiers.append(acct_no)
-                            acct_name = acct.get(
-                                "resAccountName",
-                                acct.get("resAccountNickName", ""),
-                            )
-                            last_four = acct_no[-4:] if len(acct_no) >= 4 else acct_no
-                            pm = PaymentMethod(
-                                user_id=conn.user_id,
-                                name=acct_name or conn.institution_name,
-                                card_no=acct_no,
-                                card_last_four=last_four,
-                                card_type="bank_transfer",
-                                is_active=True,
-                                bank_connection_id=conn.id,
-                            )
-                            db.add(pm)
-
-            if not identifiers:
-                raw_fallback = acct_data.get(
-                    "resList", acct_data.get("resAccountList", [])
-                )
-                for acct in raw_fallback:
-                    acct_no = acct.get("resAccount", acct.get("resAccountNo", ""))
-                    if acct_no:
-                        identifiers.append(acct_no)
-
-            if identifiers:
-                await db.flush()
-                _log.getLogger(__name__).info(
-                    f"BK re-fetch found {len(identifiers)} accounts"
+            accounts = parse_bank_accounts(acct_data)
+            identifiers = [acct_no for acct_no, _ in accounts]
+            if accounts:
+                await upsert_payment_methods(
+                    db,
+                    conn.user_id,
+                    conn.id,
+                    accounts,
+                    card_type="bank_transfer",
+                    default_name=conn.institution_name,
                 )
+                logger.info(f"BK re-fetch found {len(identifiers)} accounts")
         except Exception as e:
-            _log.getLogger(__name__).warning(f"BK account-list re-fetch failed: {e}")
+            logger.warning(f"BK account-list re-fetch failed: {e}")
 
     return conn, identifiers
 
 
-async def _scrape_by_conn(
-    conn: "BankConnection",
-    identifiers: list[str],
-    months_back: int,
-) -> list[dict]:
-    if conn.business_type == "BK":
-        return await codef_client.scrape_bank_transactions(
-            connected_id=conn.connected_id,
-            organization=conn.organization_code,
-            accounts=identifiers,
-            months_back=months_back,
-            account_password=conn.account_password or "",
+JobEmit = Callable[[str, dict], None]
+
+
+def _failures(synced) -> list[CodefScrapeFailure]:
+    return [CodefScrapeFailure(target=f.target, error=f.error) for f in synced.failures]
+
+
+async def _sync(
+    db: AsyncSession,
+    data: CodefScrapeRequest,
+    user_id: int,
+    emit: JobEmit | None = None,
+):
+    conn, identifiers = await _get_conn_and_identifiers(
+        db, data.bank_connection_id, user_id
+    )
+
+    progress = None
+    if emit:
+
+        def progress(done: int, total: int, transactions: int) -> None:
+            emit(
+                "progress",
+                {"done": done, "total": total, "transactions": transactions},
+            )
+
+    try:
+        synced = await sync_connection(
+            db, conn, identifiers, data.months_back, progress=progress
         )
-    else:
-        return await codef_client.scrape_transactions(
-            connected_id=conn.connected_id,
-            organization=conn.organization_code,
-            months_back=months_back,
-            card_nos=identifiers or None,
+    except Exception as e:
+        raise _codef_http_exception(e)
+
+    if emit:
+        emit(
+            "synced",
+            {
+                "fetched": synced.fetched,
+                "inserted": synced.inserted,
+                "events": synced.events,
+                "price_changes": synced.price_changes,
+                "failures": len(synced.failures),
+            },
         )
+    return conn, synced
+
+
+async def _scrape(
+    db: AsyncSession,
+    data: CodefScrapeRequest,
+    user_id: int,
+    emit: JobEmit | None = None,
+) -> CodefScrapeResponse:
+    conn, synced = await _sync(db, data, user_id, emit)
+
+    transactions = await load_transactions(
+        db, [conn.id], requested_start(data.months_back)
+    )
+    return CodefScrapeResponse(
+        transactions=[CodefTransaction(**tx.as_dict()) for tx in transactions],
+        total_count=len(transactions),
+        failures=_failures(synced),
+    )
+
+
+async def _detect(
+    db: AsyncSession,
+    data: CodefScrapeRequest,
+    user_id: int,
+    emit: JobEmit | None = None,
+) -> CodefDetectResponse:
+    conn, synced = await _sync(db, data, user_id, emit)
+
+    # 저장된 이력 전체(최대 CODEF_DETECT_HISTORY_MONTHS)로 탐지
+    history_months = max(data.months_back, settings.CODEF_DETECT_HISTORY_MONTHS)
+    transactions = await load_transactions(
+        db, [conn.id], requested_start(history_months)
+    )
+    detected = await detect_in_pool(transactions)
+    await replace_candidates(db, user_id, conn.id, detected)
+    if emit:
+        emit(
+            "detected",
+            {"count": len(detected), "transactions_analyzed": len(transactions)},
+        )
+
+    return CodefDetectResponse(
+        detected=[DetectedSubscription(**d) for d in detected],
+        total_transactions_analyzed=len(transactions),
+        failures=_failures(synced),
+    )
+
+
+def _ndjson_lines(transactions: list[TxRecord]) -> str:
+    return "".join(
+        json.dumps({"type": "transaction", **tx.as_dict()}, ensure_ascii=False) + "\n"
+        for tx in transactions
+    )
+
+
+async def _stream_scrape(
+    db: AsyncSession, data: CodefScrapeRequest, user_id: int
+) -> StreamingResponse:
+    """NDJSON: one {"type": "transaction", ...} line per row, then a summary line.
+
+    이미 저장된 구간을 먼저 내보내고, 새로 조회하는 구간은 Codef 기간/계좌 조회가
+    끝나는 대로 내보낸다. 저장(persist_scrape)은 조회가 모두 끝난 뒤 한 번에 한다.
+    조회 자체가 실패하면 {"type": "error", "status_code", "detail"} 줄로 끝난다.
+    """
+    conn, identifiers = await _get_conn_and_identifiers(
+        db, data.bank_connection_id, user_id
+    )
+    # 응답 스트리밍은 get_db 종료 후에 진행되므로 먼저 커밋하고 별도 세션을 쓴다
+    await db.commit()
+
+    conn_id = conn.id
+    months_back = data.months_back
+    start = requested_start(months_back)
+
+    async def body():
+        async with async_session() as session:
+            conn = await session.get(BankConnection, conn_id)
+            total = 0
+            since = plan_since(conn, months_back)
+            if since is not None and since > start:
+                async for batch in iter_transactions(
+                    session, [conn_id], start, until=since
+                ):
+                    total += len(batch)
+                    yield _ndjson_lines(batch)
+
+            queue: asyncio.Queue[list[TxRecord] | None] = asyncio.Queue()
+            sync = asyncio.create_task(
+                sync_connection(
+                    session, conn, identifiers, months_back, on_batch=queue.put_nowait
+                )
+            )
+            sync.add_done_callback(lambda _: queue.put_nowait(None))
+            try:
+                # 기간 경계에 걸친 승인건은 두 기간에 모두 나올 수 있다
+                seen: set[str] = set()
+                while (batch := await queue.get()) is not None:
+                    fresh: list[TxRecord] = []
+                    for tx in batch:
+                        if tx.day < start.toordinal():
+                            continue
+                        digest = content_hash(tx)
+                        if digest not in seen:
+                            seen.add(digest)
+                            fresh.append(tx)
+                    if fresh:
+                        total += len(fresh)
+                        yield _ndjson_lines(fresh)
+                synced = await sync
+            except Exception as e:
+                error = _codef_http_exception(e)
+                line = {
+                    "type": "error",
+                    "status_code": error.status_code,
+                    "detail": error.detail,
+                }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+                return
+            finally:
+                # 클라이언트가 끊으면 조회도 멈추고, 세션을 닫기 전에 끝나길 기다린다
+                sync.cancel()
+                await asyncio.gather(sync, return_exceptions=True)
+            await session.commit()
+
+        summary = {
+            "type": "summary",
+            "total_count": total,
+            "failures": [f.model_dump() for f in _failures(synced)],
+        }
+        yield json.dumps(summary, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
 
 
 @router.post("/scrape", response_model=CodefScrapeResponse)
 async def scrape_transactions(
     data: CodefScrapeRequest,
+    stream: bool = Query(default=False, description="NDJSON 스트리밍 응답"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if not codef_client.is_configured:
         raise HTTPException(status_code=503, detail="Codef API가 설정되지 않았습니다")
+    if stream:
+        return await _stream_scrape(db, data, current_user.id)
+    return await _scrape(db, data, current_user.id)
 
-    conn, identifiers = await _get_conn_and_identifiers(
-        db, data.bank_connection_id, current_user.id
+
+@router.post("/detect", response_model=CodefDetectResponse)
+async def detect_subscriptions(
+    data: CodefScrapeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if not codef_client.is_configured:
+        raise HTTPException(status_code=503, detail="Codef API가 설정되지 않았습니다")
+    return await _detect(db, data, current_user.id)
+
+
+@router.post("/detect-all", response_model=CodefDetectAllResponse)
+async def detect_all_subscriptions(
+    data: CodefDetectAllRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Sync every connection of the user, then detect on one merged history.
+
+    카드 → 계좌 자동이체처럼 결제 수단이 바뀐 구독도 canonical 가맹점 단위로 이어서 본다.
+    """
+    if not codef_client.is_configured:
+        raise HTTPException(status_code=503, detail="Codef API가 설정되지 않았습니다")
+
+    result = await db.execute(
+        select(BankConnection)
+        .where(
+            BankConnection.user_id == current_user.id,
+            BankConnection.provider == "codef",
+            BankConnection.status.in_(ACTIVE_STATUSES),
+            BankConnection.connected_id.isnot(None),
+            BankConnection.organization_code.isnot(None),
+        )
+        .order_by(BankConnection.id)
     )
+    conns = list(result.scalars().all())
+    if not conns:
+        return CodefDetectAllResponse(
+            detected=[], total_transactions_analyzed=0, connections=0
+        )
 
-    try:
-        transactions = await _scrape_by_conn(conn, identifiers, data.months_back)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+    targets = [(conn, await stored_identifiers(db, conn)) for conn in conns]
+    synced = await sync_connections(db, targets, data.months_back)
 
-    conn.last_synced_at = datetime.now()
-    await db.flush()
+    failures: list[CodefScrapeFailure] = []
+    unsynced: set[int] = set()
+    for conn, outcome in zip(conns, synced):
+        label = conn.institution_name
+        if isinstance(outcome, BaseException):
+            unsynced.add(conn.id)
+            failures.append(CodefScrapeFailure(target=label, error=str(outcome)))
+        else:
+            failures.extend(
+                CodefScrapeFailure(target=f"{label} {f.target}", error=f.error)
+                for f in outcome.failures
+            )
 
-    return CodefScrapeResponse(
-        transactions=[
-            CodefTransaction(
-                date=tx["date"],
-                time=tx["time"],
-                merchant=tx["merchant"],
-                amount=tx["amount"],
-                status=tx["status"],
-                card_name=tx["card_name"],
-                card_no=tx["card_no"],
-                category=tx["category"],
+    conn_ids = [conn.id for conn in conns]
+    history_months = max(data.months_back, settings.CODEF_DETECT_HISTORY_MONTHS)
+    since = requested_start(history_months)
+    transactions = await load_transactions(db, conn_ids, since)
+    detected = await detect_in_pool(transactions)
+
+    sources = await latest_sources(db, conn_ids, since)
+    result = await db.execute(
+        select(PaymentMethod).where(
+            PaymentMethod.user_id == current_user.id,
+            PaymentMethod.bank_connection_id.in_(conn_ids),
+        )
+    )
+    methods = {
+        (pm.bank_connection_id, pm.card_no): pm for pm in result.scalars().all()
+    }
+
+    tagged: list[UserDetectedSubscription] = []
+    for d in detected:
+        conn_id = sources.get(d["card_no"])
+        pm = methods.get((conn_id, d["card_no"]))
+        tagged.append(
+            UserDetectedSubscription(
+                **d,
+                bank_connection_id=conn_id,
+                payment_method_id=pm.id if pm else None,
+                payment_method_name=pm.name if pm else None,
             )
-            for tx in transactions
+        )
+    # 후보는 가장 최근 결제 연결에 저장 (이전 연결의 같은 가맹점 후보는 지워진다)
+    by_conn = by_latest_source(conn_ids, detected, sources)
+    await replace_candidates_bulk(
+        db,
+        [
+            (current_user.id, conn_id, conn_detected)
+            for conn_id, conn_detected in by_conn.items()
+            if conn_id not in unsynced  # 조회가 실패한 연결은 기존 후보를 유지
         ],
-        total_count=len(transactions),
     )
 
+    return CodefDetectAllResponse(
+        detected=tagged,
+        total_transactions_analyzed=len(transactions),
+        connections=len(conns),
+        failures=failures,
+    )
 
-@router.post("/detect", response_model=CodefDetectResponse)
-async def detect_subscriptions(
-    data: CodefScrapeRequest,
+
+@router.get("/detected", response_model=list[StoredDetectedSubscription])
+async def list_detected_subscriptions(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Detection results saved by the nightly sync (or the last /detect)."""
+    candidates = await list_candidates(db, current_user.id)
+    return [
+        StoredDetectedSubscription(
+            id=c.id,
+            bank_connection_id=c.bank_connection_id,
+            detected_at=c.detected_at,
+            name=c.name,
+            amount=c.amount,
+            billing_cycle=c.billing_cycle,
+            billing_day=c.billing_day,
+            occurrence_count=c.occurrence_count,
+            last_payment_date=c.last_payment_date.strftime("%Y-%m-%d"),
+            card_no=c.card_no,
+            category=c.category,
+            confidence=c.confidence,
+            previous_amount=c.previous_amount,
+        )
+        for c in candidates
+    ]
+
+
+@router.get("/detection-events", response_model=list[DetectionEventResponse])
+async def list_detection_events(
+    limit: int = Query(default=50, ge=1, le=500),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """Recent new-subscription / missed-payment / price-change events."""
+    events = await list_events(db, current_user.id, limit)
+    return [
+        DetectionEventResponse(
+            id=e.id,
+            kind=e.kind,
+            merchant_key=e.merchant_key,
+            name=e.name,
+            billing_cycle=e.billing_cycle,
+            amount=e.amount,
+            previous_amount=e.previous_amount,
+            occurred_on=e.occurred_on.strftime("%Y-%m-%d"),
+            created_at=e.created_at,
+        )
+        for e in events
+    ]
+
+
+def _job_response(job: CodefJob) -> CodefJobResponse:
+    progress = next(
+        (e.data for e in reversed(job.events) if e.event == "progress"), None
+    )
+    return CodefJobResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        bank_connection_id=job.bank_connection_id,
+        created_at=datetime.fromtimestamp(job.created_at),
+        finished_at=(
+            datetime.fromtimestamp(job.finished_at) if job.finished_at else None
+        ),
+        progress=progress,
+        last_event_id=len(job.events),
+        result=job.result,
+        error=job.error,
+    )
+
+
+def _get_job(job_id: str, user_id: int) -> CodefJob:
+    job = job_manager.get(job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job
+
+
+@router.post("/jobs", response_model=CodefJobResponse, status_code=202)
+async def create_job(
+    data: CodefJobRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Start /scrape or /detect in the background and return its job id."""
     if not codef_client.is_configured:
         raise HTTPException(status_code=503, detail="Codef API가 설정되지 않았습니다")
 
-    conn, identifiers = await _get_conn_and_identifiers(
-        db, data.bank_connection_id, current_user.id
+    # 존재/소유 확인은 즉시 (백그라운드에서 404 가 나지 않도록)
+    owned = await db.execute(
+        select(BankConnection.id).where(
+            BankConnection.id == data.bank_connection_id,
+            BankConnection.user_id == current_user.id,
+            BankConnection.provider == "codef",
+        )
     )
+    if owned.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="연결 정보를 찾을 수 없습니다")
 
-    try:
-        transactions = await _scrape_by_conn(conn, identifiers, data.months_back)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+    user_id = current_user.id
+    work = _scrape if data.kind == "scrape" else _detect
+
+    async def runner(job: CodefJob) -> dict:
+        # 요청 세션은 응답과 함께 닫히므로 job 전용 세션 사용
+        async with async_session() as session:
+            try:
+                response = await work(session, data, user_id, job.emit)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        return response.model_dump()
+
+    job = job_manager.submit(
+        user_id, data.kind, data.bank_connection_id, data.months_back, runner
+    )
+    return _job_response(job)
 
-    conn.last_synced_at = datetime.now()
-    await db.flush()
 
-    detected = codef_client.detect_subscriptions(transactions)
+@router.get("/jobs/{job_id}", response_model=CodefJobResponse)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Polling fallback for clients that cannot consume SSE."""
+    return _job_response(_get_job(job_id, current_user.id))
 
-    return CodefDetectResponse(
-        detected=[DetectedSubscription(**d) for d in detected],
-        total_transactions_analyzed=len(transactions),
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """Server-Sent Events: started, progress, synced, detected, completed/failed.
+
+    Reconnecting clients send Last-Event-ID to resume after the last seen event.
+    """
+    job = _get_job(job_id, current_user.id)
+    try:
+        after = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+
+    async def event_source():
+        async for event in job_manager.stream(job, after=after):
+            if await request.is_disconnected():
+                return
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            payload = json.dumps(event.data, ensure_ascii=False, default=str)
+            yield f"id: {event.seq}\nevent: {event.event}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -629,59 +955,112 @@ async def import_detected_subscriptions(
         await db.flush()
         await db.refresh(payment_method)
 
+    # 이미 등록된 이름을 한 번에 조회
+    names = {item.name for item in data.subscriptions}
+    existing_result = await db.execute(
+        select(Subscription.name).where(
+            Subscription.user_id == current_user.id,
+            Subscription.name.in_(names),
+            Subscription.is_active.is_(True),
+        )
+    )
+    taken = set(existing_result.scalars().all())
+
+    today = date.today()
+    billing_days = [min(max(item.billing_day, 1), 31) for item in data.subscriptions]
+    next_dates = next_billing_dates(today, billing_days)
+
     imported = 0
     skipped = 0
     details: list[str] = []
-
-    for sub_item in data.subscriptions:
-        # Check if subscription with same name already exists
-        existing = await db.execute(
-            select(Subscription).where(
-                Subscription.user_id == current_user.id,
-                Subscription.name == sub_item.name,
-                Subscription.is_active.is_(True),
-            )
-        )
-        if existing.scalar_one_or_none():
+    rows: list[dict] = []
+    for sub_item, billing_day in zip(data.subscriptions, billing_days):
+        if sub_item.name in taken:
             skipped += 1
             details.append(f"'{sub_item.name}' - 이미 등록된 구독")
             continue
-
-        # Calculate next payment date based on billing day
-        today = date.today()
-        if today.day >= sub_item.billing_day:
-            # Next payment is next month
-            if today.month == 12:
-                next_payment = date(today.year + 1, 1, sub_item.billing_day)
-            else:
-                next_payment = date(today.year, today.month + 1, sub_item.billing_day)
-        else:
-            next_payment = date(today.year, today.month, sub_item.billing_day)
-
-        subscription = Subscription(
-            user_id=current_user.id,
-            name=sub_item.name,
-            amount=sub_item.amount,
-            currency="KRW",
-            billing_cycle=sub_item.billing_cycle,
-            billing_day=sub_item.billing_day,
-            next_payment_date=next_payment,
-            payment_method_id=payment_method.id,
-            is_active=True,
-            auto_renew=True,
-            start_date=today,
+        taken.add(sub_item.name)  # 같은 요청 안의 중복도 건너뜀
+
+        rows.append(
+            {
+                "user_id": current_user.id,
+                "name": sub_item.name,
+                "amount": sub_item.amount,
+                "currency": "KRW",
+                "billing_cycle": sub_item.billing_cycle,
+                "billing_day": billing_day,
+                "next_payment_date": next_dates[billing_day],
+                "payment_method_id": payment_method.id,
+                "is_active": True,
+                "auto_renew": True,
+                "start_date": today,
+            }
         )
-        db.add(subscription)
         imported += 1
         details.append(
             f"'{sub_item.name}' - ₩{sub_item.amount:,} ({sub_item.billing_cycle})"
         )
 
-    await db.flush()
+    if rows:
+        inserted = await db.execute(
+            insert(Subscription).values(rows).returning(Subscription.id)
+        )
+        logger.info(
+            f"Codef import: user={current_user.id} "
+            f"subscriptions={list(inserted.scalars().all())}"
+        )
 
     return ImportResponse(imported=imported, skipped=skipped, details=details)
 
 
+@router.get(
+    "/connection/{conn_id}/discovery", response_model=CodefDiscoveryResponse
+)
+async def get_discovery_status(
+    conn_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Poll card/account discovery started by registration."""
+    result = await db.execute(
+        select(BankConnection).where(
+            BankConnection.id == conn_id,
+            BankConnection.user_id == current_user.id,
+            BankConnection.provider == "codef",
+        )
+    )
+    conn = result.scalar_one_or_none()
+    if not conn:
+        raise HTTPException(status_code=404, detail="연결 정보를 찾을 수 없습니다")
+
+    # 재시작 등으로 조회 task 가 사라졌으면 다시 시작. 방금 끝난 조회(connected 커밋 직전에
+    # 읽은 행)를 또 돌리지 않도록 시작한 지 오래된 것만 — main.py 시작 시 복구와 같은 기준
+    stale_before = datetime.now() - timedelta(
+        minutes=settings.CODEF_DISCOVERY_STALE_MINUTES
+    )
+    if (
+        conn.status == "discovering"
+        and (conn.discovery_started_at or conn.created_at) < stale_before
+        and not job_manager.find_active(current_user.id, "discovery", conn.id)
+    ):
+        _start_discovery(conn)
+
+    pm_result = await db.execute(
+        select(PaymentMethod.name, PaymentMethod.card_last_four).where(
+            PaymentMethod.bank_connection_id == conn.id
+        )
+    )
+    return CodefDiscoveryResponse(
+        bank_connection_id=conn.id,
+        status=conn.status,
+        payment_methods=[
+            f"{name} *{last_four}" if last_four else name
+            for name, last_four in pm_result.all()
+        ],
+        error=conn.last_error or "",
+    )
+
+
 @router.delete("/connection/{conn_id}", status_code=204)
 async def delete_codef_connection(
     conn_id: int,
@@ -718,3 +1097,4 @@ async def delete_codef_connection(
         await db.delete(pm)
 
     await db.delete(conn)
+    scrape_cache.invalidate(bank_connection_id=conn_id)
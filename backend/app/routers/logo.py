@@ -1,8 +1,10 @@
+import httpx
 from fastapi import APIRouter, Depends, Query
 
 from app.config import settings
 from app.models.user import User
 from app.services.auth import get_current_user
+from app.services.http_client import get_logo_http
 from app.services.logo import search_logo
 
 router = APIRouter(prefix="/logo", tags=["logo"])
@@ -12,5 +14,8 @@ router = APIRouter(prefix="/logo", tags=["logo"])
 async def logo_search(
     name: str = Query(..., min_length=1),
     _: User = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_logo_http),
 ):
-    return await search_logo(name, api_token=settings.LOGO_DEV_TOKEN or None)
+    return await search_logo(
+        name, api_token=settings.LOGO_DEV_TOKEN or None, client=client
+    )
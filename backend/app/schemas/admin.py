@@ -52,3 +52,51 @@ class AdminDashboard(BaseModel):
     top_cards: list[AdminTopCard]
     category_stats: list[AdminCategoryStats]
     recent_users: list[AdminRecentUser]
+
+
+class AdminCodefLatency(BaseModel):
+    endpoint: str
+    organization: str
+    count: int
+    error_count: int
+    retry_count: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    avg_response_bytes: int
+
+
+class AdminCodefCall(BaseModel):
+    endpoint: str
+    organization: str
+    started_at: datetime
+    duration_ms: float
+    request_bytes: int
+    response_bytes: int
+    status_code: int
+    result_code: str
+    retries: int
+    error: str
+    request_body: dict | None = None
+    response_body: dict | None = None
+
+
+class AdminCodefLimiter(BaseModel):
+    organization: str
+    in_flight: int
+    queued: int
+    max_in_flight: int
+    max_rps: float
+    breaker_state: str = "closed"
+
+
+class AdminBatchDetection(BaseModel):
+    started_at: datetime
+    users: int
+    connections: int
+    transactions: int
+    candidates: int
+    elapsed_seconds: float
+    users_per_sec: float
+    transactions_per_sec: float
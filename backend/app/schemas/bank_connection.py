@@ -20,6 +20,7 @@ class BankConnectionResponse(BankConnectionBase):
     connected_id: str | None = None
     status: str
     last_synced_at: datetime | None = None
+    last_error: str | None = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
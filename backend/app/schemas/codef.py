@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -29,6 +32,7 @@ class CodefRegisterCardResponse(BaseModel):
     bank_connection_id: int
     organization_code: str
     organization_name: str
+    status: str = "discovering"  # 보유카드 조회가 끝나면 connected
     message: str = "카드 등록 완료"
 
 
@@ -52,11 +56,19 @@ class CodefTransaction(BaseModel):
     category: str
 
 
+class CodefScrapeFailure(BaseModel):
+    """Account (***1234) or period that failed during a scrape."""
+
+    target: str
+    error: str
+
+
 class CodefScrapeResponse(BaseModel):
     """Response with scraped transactions."""
 
     transactions: list[CodefTransaction]
     total_count: int
+    failures: list[CodefScrapeFailure] = []
 
 
 class DetectedSubscription(BaseModel):
@@ -70,6 +82,51 @@ class DetectedSubscription(BaseModel):
     last_payment_date: str
     card_no: str
     category: str
+    confidence: float = 0.0
+    previous_amount: int | None = None  # 최근 가격 변경 전 금액
+
+
+class StoredDetectedSubscription(DetectedSubscription):
+    """Persisted candidate from the nightly sync or the last /detect."""
+
+    id: int
+    bank_connection_id: int
+    detected_at: datetime
+
+
+class DetectionEventResponse(BaseModel):
+    """Incremental detection event (new_series | missed_payment | price_change)."""
+
+    id: int
+    kind: str
+    merchant_key: str
+    name: str
+    billing_cycle: str | None = None
+    amount: int
+    previous_amount: int | None = None
+    occurred_on: str
+    created_at: datetime
+
+
+class CodefDetectAllRequest(BaseModel):
+    """Detect across all of the user's Codef connections."""
+
+    months_back: int = 6
+
+
+class UserDetectedSubscription(DetectedSubscription):
+    """Merged detection tagged with the most recently used payment method."""
+
+    bank_connection_id: int | None = None
+    payment_method_id: int | None = None
+    payment_method_name: str | None = None
+
+
+class CodefDetectAllResponse(BaseModel):
+    detected: list[UserDetectedSubscription]
+    total_transactions_analyzed: int
+    connections: int
+    failures: list[CodefScrapeFailure] = []
 
 
 class CodefDetectResponse(BaseModel):
@@ -77,6 +134,28 @@ class CodefDetectResponse(BaseModel):
 
     detected: list[DetectedSubscription]
     total_transactions_analyzed: int
+    failures: list[CodefScrapeFailure] = []
+
+
+class CodefJobRequest(CodefScrapeRequest):
+    """Run /scrape or /detect as a background job."""
+
+    kind: Literal["scrape", "detect"] = "detect"
+
+
+class CodefJobResponse(BaseModel):
+    """Job state for polling; `result` is the /scrape or /detect response."""
+
+    job_id: str
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    bank_connection_id: int
+    created_at: datetime
+    finished_at: datetime | None = None
+    progress: dict | None = None  # 마지막 progress 이벤트
+    last_event_id: int = 0
+    result: dict | None = None
+    error: str = ""
 
 
 class CodefRegisterBankRequest(BaseModel):
@@ -92,10 +171,20 @@ class CodefRegisterBankResponse(BaseModel):
     bank_connection_id: int
     organization_code: str
     organization_name: str
-    accounts_found: int = 0
+    accounts_found: int = 0  # 보유계좌는 백그라운드 조회 → /connection/{id}/discovery
+    status: str = "discovering"
     message: str = "은행 등록 완료"
 
 
+class CodefDiscoveryResponse(BaseModel):
+    """Card/account discovery state of a newly registered connection."""
+
+    bank_connection_id: int
+    status: str  # discovering | connected
+    payment_methods: list[str] = []
+    error: str = ""
+
+
 class CodefStatusResponse(BaseModel):
     configured: bool
     demo_mode: bool
@@ -1,3 +1,6 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, HTTPException, status
@@ -11,16 +14,51 @@ from app.config import settings
 from app.db import get_db
 from app.models.user import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# bcrypt 는 GIL 을 놓고 CPU 를 쓰므로 코어 수만큼의 스레드로 제한해 이벤트 루프 밖에서 실행
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.AUTH_HASH_WORKERS or os.cpu_count() or 1,
+    thread_name_prefix="bcrypt",
+)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+
+def _bcrypt_rounds(hashed: str) -> int | None:
+    """Cost factor of a modular-crypt bcrypt hash ($2b$12$...)."""
+    parts = hashed.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    if not pwd_context.verify(plain, hashed):
+        return False, None
+    if (
+        pwd_context.needs_update(hashed)
+        or _bcrypt_rounds(hashed) != settings.BCRYPT_ROUNDS
+    ):
+        return True, pwd_context.hash(plain)
+    return True, None
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def verify_and_update_password(
+    plain: str, hashed: str
+) -> tuple[bool, str | None]:
+    """Verify off the event loop; returns a new hash if the cost factor changed."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _verify_and_update, plain, hashed)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -0,0 +1,249 @@
+"""
+Subscription detection on a process pool.
+
+탐지(detect_recurring)는 순수 CPU 작업이라 이벤트 루프에서 돌리면 API 요청 처리가 멈춘다.
+- detect_in_pool(): 연결 1개 탐지 (/codef/detect) 를 프로세스 풀에서 실행
+- run_batch_detection(): 야간 동기화가 끝난 뒤 전체 사용자를 다시 탐지
+  · 사용자를 CODEF_DETECT_CHUNK_USERS 명씩 묶어(shard) 저장 거래를 한 쿼리로 읽고
+  · 사용자마다 모든 연결의 거래를 합친 이력으로 탐지 (/codef/detect-all 과 같은 방식)
+  · CODEF_DETECT_WORKERS 개 프로세스에 나눠 보낸 뒤, 끝나는 순서대로 결과를 받아
+  · 후보를 카드별 가장 최근 결제 연결에 shard 단위로 일괄 저장
+    (by_latest_source + replace_candidates_bulk)
+  · 워커 수만큼만 동시에 보내므로 메모리는 사용자 수와 무관
+  처리량(users/sec, transactions/sec)을 로그와 last_stats 로 남긴다.
+
+워커는 spawn 으로 띄워 이벤트 루프/DB 커넥션 상태를 물려받지 않는다.
+워커가 비정상 종료하면(OOM 등) 풀 전체가 BrokenProcessPool 이 되므로, 풀을 새로 만들고
+해당 작업을 한 번 다시 보낸다.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.db import async_session, engine
+from app.models.bank_connection import BankConnection
+from app.models.transaction import Transaction
+from app.services.candidate_store import by_latest_source, replace_candidates_bulk
+from app.services.detection import detect_shard
+from app.services.transaction_store import STORED_COLUMNS, requested_start
+from app.services.tx_record import TxRecord
+
+logger = logging.getLogger(__name__)
+
+BATCH_LOCK_KEY = zlib.crc32(b"codef-batch-detect")
+
+Shard = list[tuple[int, list[tuple]]]  # (user id, 합친 이력의 TxRecord.fields())
+# card_no -> 가장 최근 거래의 연결, 사용자별
+Sources = dict[int, dict[str, int]]
+_CARD_NO = 6  # TxRecord.fields() 안의 card_no 위치
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _workers() -> int:
+    return settings.CODEF_DETECT_WORKERS or os.cpu_count() or 1
+
+
+def detection_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=_workers(), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    """Drop the pool if it is still the broken one (another task may have reset it)."""
+    if _pool is broken:
+        logger.warning("Detection pool broken (worker died); restarting")
+        shutdown_pool()
+
+
+async def _run_shard(shard: Shard) -> list[tuple[int, list[dict]]]:
+    """detect_shard on the pool, retried once on a fresh pool if a worker died."""
+    loop = asyncio.get_running_loop()
+    pool = detection_pool()
+    try:
+        return await loop.run_in_executor(pool, detect_shard, shard)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+    return await loop.run_in_executor(detection_pool(), detect_shard, shard)
+
+
+async def detect_in_pool(transactions: list[TxRecord]) -> list[dict]:
+    """detect_recurring for one history, off the event loop."""
+    shard = [(0, [tx.fields() for tx in transactions])]
+    [(_, detected)] = await _run_shard(shard)
+    return detected
+
+
+@dataclass
+class BatchDetectionStats:
+    started_at: datetime
+    users: int = 0
+    connections: int = 0
+    transactions: int = 0
+    candidates: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def users_per_sec(self) -> float:
+        return self.users / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def transactions_per_sec(self) -> float:
+        return self.transactions / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+last_stats: BatchDetectionStats | None = None
+
+
+async def _connections_by_user() -> dict[int, list[int]]:
+    async with async_session() as db:
+        result = await db.execute(
+            select(BankConnection.user_id, BankConnection.id)
+            .where(
+                BankConnection.provider == "codef",
+                BankConnection.status == "connected",
+            )
+            .order_by(BankConnection.user_id, BankConnection.id)
+        )
+        by_user: dict[int, list[int]] = {}
+        for user_id, conn_id in result.all():
+            by_user.setdefault(user_id, []).append(conn_id)
+        return by_user
+
+
+async def _load_shard(
+    by_user: dict[int, list[int]], users: list[int]
+) -> tuple[Shard, Sources, int]:
+    """Each user's stored history across connections, merged in date order."""
+    since = requested_start(settings.CODEF_DETECT_HISTORY_MONTHS)
+    owner = {conn_id: uid for uid in users for conn_id in by_user[uid]}
+    rows: dict[int, list[tuple]] = {uid: [] for uid in users}
+    sources: Sources = {uid: {} for uid in users}
+    async with async_session() as db:
+        result = await db.execute(
+            select(Transaction.bank_connection_id, *STORED_COLUMNS)
+            .where(
+                Transaction.bank_connection_id.in_(owner),
+                Transaction.tx_date >= since,
+            )
+            .order_by(Transaction.tx_date, Transaction.tx_time, Transaction.id)
+        )
+        count = 0
+        for conn_id, tx_date, *rest in result.all():
+            row = (tx_date.toordinal(), *rest)
+            uid = owner[conn_id]
+            rows[uid].append(row)
+            # latest_sources 와 같은 규칙 (날짜순이므로 마지막 연결이 남는다) —
+            # 이미 읽은 행으로 계산해 사용자별 쿼리를 피한다
+            sources[uid][row[_CARD_NO]] = conn_id
+            count += 1
+    # 거래가 없는 사용자도 보내서 이전 후보를 지운다
+    return list(rows.items()), sources, count
+
+
+async def _save_shard(
+    by_user: dict[int, list[int]],
+    sources: Sources,
+    results: list[tuple[int, list[dict]]],
+) -> int:
+    async with async_session() as db:
+        await replace_candidates_bulk(
+            db,
+            [
+                (uid, conn_id, conn_detected)
+                for uid, detected in results
+                for conn_id, conn_detected in by_latest_source(
+                    by_user[uid], detected, sources[uid]
+                ).items()
+            ],
+        )
+        await db.commit()
+    return sum(len(detected) for _, detected in results)
+
+
+async def run_batch_detection() -> BatchDetectionStats | None:
+    """Re-detect every connected user's candidates; None if another worker runs it."""
+    async with engine.connect() as lock_conn:
+        locked = await lock_conn.scalar(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": BATCH_LOCK_KEY}
+        )
+        if not locked:
+            logger.info("Batch detection: another worker holds the lock")
+            return None
+        try:
+            return await _run_locked()
+        finally:
+            await lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": BATCH_LOCK_KEY}
+            )
+
+
+async def _run_locked() -> BatchDetectionStats:
+    global last_stats
+    stats = BatchDetectionStats(started_at=datetime.now())
+    started = time.perf_counter()
+
+    by_user = await _connections_by_user()
+    user_ids = list(by_user)
+    chunk = max(1, settings.CODEF_DETECT_CHUNK_USERS)
+    max_in_flight = _workers()
+
+    pending: dict[asyncio.Task, Sources] = {}
+
+    async def drain(return_when: str) -> None:
+        done, _ = await asyncio.wait(pending, return_when=return_when)
+        for future in done:
+            sources = pending.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                # 한 shard 실패(재시도 후에도 워커 비정상 종료 등)로 전체 배치를 멈추지 않는다
+                logger.warning(f"Batch detection shard failed: {e!r}")
+                continue
+            stats.candidates += await _save_shard(by_user, sources, results)
+            stats.connections += sum(len(by_user[uid]) for uid, _ in results)
+
+    for i in range(0, len(user_ids), chunk):
+        users = user_ids[i : i + chunk]
+        # 워커가 계산하는 동안 다음 shard 를 읽는다
+        shard, sources, count = await _load_shard(by_user, users)
+        stats.users += len(users)
+        stats.transactions += count
+        pending[asyncio.create_task(_run_shard(shard))] = sources
+        if len(pending) >= max_in_flight:
+            await drain(asyncio.FIRST_COMPLETED)
+    if pending:
+        await drain(asyncio.ALL_COMPLETED)
+
+    stats.elapsed_seconds = time.perf_counter() - started
+    last_stats = stats
+    logger.info(
+        f"Batch detection: users={stats.users} connections={stats.connections} "
+        f"transactions={stats.transactions} candidates={stats.candidates} "
+        f"{stats.elapsed_seconds:.1f}s "
+        f"({stats.users_per_sec:.1f} users/s, "
+        f"{stats.transactions_per_sec:,.0f} tx/s, workers={max_in_flight})"
+    )
+    return stats
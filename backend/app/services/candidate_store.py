@@ -0,0 +1,144 @@
+"""
+Persisted subscription candidates (detection results).
+
+탐지 결과를 연결 단위로 subscription_candidates 에 저장해 두면, 사용자가 앱을 열었을 때
+스크랩/탐지를 다시 돌리지 않고 GET /codef/detected 로 바로 보여줄 수 있다.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.subscription_candidate import SubscriptionCandidate
+
+UPDATE_COLUMNS = (
+    "name",
+    "amount",
+    "billing_cycle",
+    "billing_day",
+    "occurrence_count",
+    "last_payment_date",
+    "card_no",
+    "category",
+    "confidence",
+    "previous_amount",
+)
+
+
+def _candidate_row(user_id: int, bank_connection_id: int, detected: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "bank_connection_id": bank_connection_id,
+        "merchant_key": detected["merchant_key"][:200],
+        "name": detected["name"][:200],
+        "amount": detected["amount"],
+        "billing_cycle": detected["billing_cycle"],
+        "billing_day": detected["billing_day"],
+        "occurrence_count": detected["occurrence_count"],
+        "last_payment_date": datetime.strptime(
+            detected["last_payment_date"], "%Y-%m-%d"
+        ).date(),
+        "card_no": (detected.get("card_no") or "")[:30],
+        "category": (detected.get("category") or "")[:100],
+        "confidence": detected.get("confidence", 0.0),
+        "previous_amount": detected.get("previous_amount"),
+    }
+
+
+# asyncpg 바인드 파라미터 한도(32767) 이내로 배치 (행당 14개)
+UPSERT_BATCH_SIZE = 2000
+
+
+def by_latest_source(
+    conn_ids: list[int], detected: list[dict], sources: dict[str, int]
+) -> dict[int, list[dict]]:
+    """Place merged-history detections on the connection that charged the card last.
+
+    sources: card_no -> connection (transaction_store.latest_sources 규칙).
+    /codef/detect-all 과 야간 일괄 탐지가 같은 규칙으로 저장해야 서로 덮어쓰지 않는다.
+    """
+    by_conn: dict[int, list[dict]] = {conn_id: [] for conn_id in conn_ids}
+    for d in detected:
+        conn_id = sources.get(d["card_no"])
+        if conn_id in by_conn:
+            by_conn[conn_id].append(d)
+    return by_conn
+
+
+async def replace_candidates(
+    db: AsyncSession, user_id: int, bank_connection_id: int, detected: list[dict]
+) -> None:
+    """Upsert this connection's candidates and drop ones no longer detected."""
+    await replace_candidates_bulk(db, [(user_id, bank_connection_id, detected)])
+
+
+async def replace_candidates_bulk(
+    db: AsyncSession, results: list[tuple[int, int, list[dict]]]
+) -> None:
+    """replace_candidates for many (user_id, bank_connection_id, detected) at once.
+
+    연결 수와 무관하게 stale 삭제 1회 + upsert 배치로 처리한다.
+    """
+    if not results:
+        return
+    rows: dict[tuple[int, str], dict] = {}
+    for user_id, bank_connection_id, detected in results:
+        for d in detected:
+            row = _candidate_row(user_id, bank_connection_id, d)
+            rows[(bank_connection_id, row["merchant_key"])] = row
+
+    stale = delete(SubscriptionCandidate).where(
+        SubscriptionCandidate.bank_connection_id.in_(
+            [conn_id for _, conn_id, _ in results]
+        )
+    )
+    if rows:
+        stale = stale.where(
+            tuple_(
+                SubscriptionCandidate.bank_connection_id,
+                SubscriptionCandidate.merchant_key,
+            ).not_in(list(rows))
+        )
+    await db.execute(stale)
+
+    await _upsert_rows(db, list(rows.values()))
+
+
+async def upsert_candidates(
+    db: AsyncSession, user_id: int, bank_connection_id: int, detected: list[dict]
+) -> None:
+    """Add or refresh candidates without dropping the connection's others."""
+    await _upsert_rows(
+        db, [_candidate_row(user_id, bank_connection_id, d) for d in detected]
+    )
+
+
+async def _upsert_rows(db: AsyncSession, values: list[dict]) -> None:
+    for i in range(0, len(values), UPSERT_BATCH_SIZE):
+        batch = values[i : i + UPSERT_BATCH_SIZE]
+        stmt = pg_insert(SubscriptionCandidate).values(batch)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    SubscriptionCandidate.bank_connection_id,
+                    SubscriptionCandidate.merchant_key,
+                ],
+                set_={
+                    **{col: stmt.excluded[col] for col in UPDATE_COLUMNS},
+                    "detected_at": datetime.now(),
+                },
+            )
+        )
+
+
+async def list_candidates(
+    db: AsyncSession, user_id: int
+) -> list[SubscriptionCandidate]:
+    result = await db.execute(
+        select(SubscriptionCandidate)
+        .where(SubscriptionCandidate.user_id == user_id)
+        .order_by(SubscriptionCandidate.amount.desc())
+    )
+    return list(result.scalars().all())
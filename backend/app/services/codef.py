@@ -7,26 +7,54 @@ API Flow:
 3. Use connectedId to fetch card transaction history
 4. Parse transactions to detect recurring subscriptions
 
-Environments:
-- Demo: https://development.codef.io
-- Production: https://api.codef.io
-- Sandbox (fixed responses): https://sandbox.codef.io
+Environments (settings.CODEF_ENV):
+- demo: https://development.codef.io
+- production: https://api.codef.io
+- sandbox (fixed responses): https://sandbox.codef.io
+
+Offline: CODEF_TRANSPORT=record|replay (see codef_transport)
 
 Token URL: https://oauth.codef.io/oauth/token
 """
 
+import asyncio
 import base64
+import binascii
 import json
 import logging
+import time
 import urllib.parse
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 
 import httpx
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import padding as asym_padding
+from dateutil.relativedelta import relativedelta
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # optional fast JSON decoder
+    _json_loads = json.loads
 
 from app.config import settings
+from app.services.codef_errors import (
+    CodefCredentialError,
+    CodefError,
+    CodefTransientError,
+    classify_result,
+    classify_status,
+)
+from app.services.codef_limiter import org_limiters
+from app.services.codef_resilience import backoff_delay, circuit_breakers
+from app.services.codef_token import CodefTokenProvider
+from app.services.codef_trace import CodefCall, codef_tracer, redact
+from app.services.detection import detect_recurring
+from app.services.http_client import CODEF, http_clients
+from app.services.tx_record import TxRecord, from_bank_item, from_card_item
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +64,13 @@ CODEF_DEV_URL = "https://development.codef.io"
 CODEF_PROD_URL = "https://api.codef.io"
 CODEF_TOKEN_URL = "https://oauth.codef.io/oauth/token"
 
+# settings.CODEF_ENV → API base URL
+CODEF_BASE_URLS: dict[str, str] = {
+    "demo": CODEF_DEV_URL,
+    "production": CODEF_PROD_URL,
+    "sandbox": CODEF_SANDBOX_URL,
+}
+
 # Codef 카드사 조직코드 (businessType: CD)
 # 출처: https://developer.codef.io/products/card/overview (2024-12-19 업데이트)
 # 씨티카드(0307): 2022년 한국 소비자금융 철수 → 사용자 요청으로 제외
@@ -185,6 +220,163 @@ def rsa_encrypt(plaintext: str, public_key_str: str) -> str:
     return base64.b64encode(encrypted).decode("utf-8")
 
 
+@dataclass
+class ScrapeFailure:
+    """One account/period that could not be fetched."""
+
+    target: str  # masked account (***1234) or period (YYYYMMDD-YYYYMMDD)
+    error: str
+
+
+@dataclass
+class ScrapeResult:
+    """Normalized transactions plus per-target failures (partial results)."""
+
+    transactions: list[TxRecord] = field(default_factory=list)
+    failures: list[ScrapeFailure] = field(default_factory=list)
+
+
+# (완료된 계좌/기간 수, 전체 수, 지금까지 수집한 거래 수)
+ScrapeProgress = Callable[[int, int, int], None]
+# 계좌/기간 하나의 조회 결과가 나오는 즉시 받는다 (완료 순서, 중복 제거 전)
+ScrapeBatch = Callable[[list[TxRecord]], None]
+
+
+# '+' → ' ', '%' → '=' (single C-level pass)
+_PERCENT_TO_QP = bytes.maketrans(b"+%", b" =")
+
+
+def decode_codef_body(content: bytes | bytearray) -> dict:
+    """Decode a Codef response body.
+
+    Codef returns URL-encoded JSON ("%7B%22result..."); plain JSON bodies skip
+    the unquote pass. Works on bytes end-to-end so a large approval-list is
+    never materialized as an extra str copy.
+    """
+    if content[:1] in (b"{", b"["):
+        return _json_loads(content)
+    if b"=" not in content and b"\n" not in content:
+        # %XX → =XX 로 바꾸면 quoted-printable 과 같은 형태 → C 구현(binascii)으로 디코딩
+        return _json_loads(binascii.a2b_qp(content.translate(_PERCENT_TO_QP)))
+    # unquote_plus 와 동일: '+' → ' ', %XX → byte
+    return _json_loads(urllib.parse.unquote_to_bytes(content.replace(b"+", b" ")))
+
+
+def _organization_of(body: dict) -> str:
+    if body.get("organization"):
+        return body["organization"]
+    account_list = body.get("accountList") or [{}]
+    return account_list[0].get("organization", "")
+
+
+def _mask_account(account: str) -> str:
+    return f"***{account[-4:]}"
+
+
+def _period_start(months: int, since: date | None = None) -> str:
+    """Start of the capped lookback period, narrowed to `since` if later."""
+    start = (datetime.now() - timedelta(days=months * 30)).date()
+    if since and since > start:
+        start = since
+    return start.strftime("%Y%m%d")
+
+
+def _month_windows(
+    start: date, end: date, months: int = 1
+) -> list[tuple[str, str]]:
+    """Split [start, end] into consecutive calendar-month sized windows."""
+    windows: list[tuple[str, str]] = []
+    cursor = start
+    while cursor <= end:
+        window_end = min(cursor + relativedelta(months=months) - timedelta(days=1), end)
+        windows.append((cursor.strftime("%Y%m%d"), window_end.strftime("%Y%m%d")))
+        cursor = window_end + timedelta(days=1)
+    return windows
+
+
+# Codef 보유계좌 응답: 계좌 종류별 분리 배열
+# resDepositTrust(예금/신탁), resLoan(대출), resFund(펀드),
+# resForeignCurrency(외화), resInsurance(보험)
+BANK_ACCOUNT_TYPE_KEYS = (
+    "resDepositTrust",
+    "resLoan",
+    "resFund",
+    "resForeignCurrency",
+    "resInsurance",
+)
+
+
+def parse_bank_accounts(acct_data: dict) -> list[tuple[str, str]]:
+    """(account_no, account_name) from a bank account-list response."""
+    raw_accounts: list[dict] = []
+    for key in BANK_ACCOUNT_TYPE_KEYS:
+        items = acct_data.get(key, [])
+        if isinstance(items, list):
+            raw_accounts.extend(items)
+    if not raw_accounts:
+        raw_accounts = acct_data.get("resList", acct_data.get("resAccountList", []))
+
+    accounts: dict[str, str] = {}
+    for acct in raw_accounts:
+        acct_no = acct.get("resAccount", acct.get("resAccountNo", ""))
+        if acct_no and acct_no not in accounts:
+            accounts[acct_no] = acct.get(
+                "resAccountName", acct.get("resAccountNickName", "")
+            )
+    return list(accounts.items())
+
+
+def parse_cards(card_list_data: dict) -> list[tuple[str, str]]:
+    """(card_no, card_name) from a card-list response."""
+    raw_cards = card_list_data.get("resList", card_list_data.get("resCardList", []))
+    cards: dict[str, str] = {}
+    for card in raw_cards:
+        card_no = card.get("resCardNo", card.get("resCardNumber", ""))
+        if card_no and card_no not in cards:
+            cards[card_no] = card.get("resCardName", "")
+    return list(cards.items())
+
+
+async def _gather_or_abort(aws) -> list:
+    """gather(return_exceptions=True), except a credential error aborts the rest.
+
+    비밀번호 오류/잠김 뒤에 남은 기간·계좌를 계속 조회하면 기관 계정 잠금이 가까워지므로
+    CodefCredentialError 가 나오면 나머지 조회를 취소하고 그대로 올린다.
+    일시 장애/데이터 오류만 결과 자리에 예외로 남긴다. 단 전부 실패했으면 부분 결과가
+    아니므로 첫 예외를 올린다 (서킷 열림 503 / 일시 장애 502 로 매핑되도록).
+    """
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                await next_done
+            except CodefCredentialError:
+                raise
+            except Exception:
+                pass
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    outcomes = [task.exception() or task.result() for task in tasks]
+    if outcomes and all(isinstance(o, BaseException) for o in outcomes):
+        raise outcomes[0]
+    return outcomes
+
+
+def _approval_key(tx: TxRecord) -> tuple:
+    return (
+        tx.day,
+        tx.time,
+        tx.card_no,
+        tx.amount,
+        tx.merchant,
+        tx.status,
+        tx.approval_no,
+    )
+
+
 class CodefClient:
     """Codef API client with token management and card operations."""
 
@@ -192,110 +384,195 @@ class CodefClient:
         self,
         client_id: str | None = None,
         client_secret: str | None = None,
-        use_demo: bool = True,
+        environment: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ):
         self.client_id = client_id or settings.CODEF_CLIENT_ID
         self.client_secret = client_secret or settings.CODEF_CLIENT_SECRET
-        self.base_url = CODEF_DEV_URL if use_demo else CODEF_PROD_URL
-        self._access_token: str | None = None
-        self._token_expires_at: datetime | None = None
+        environment = environment or settings.CODEF_ENV
+        if environment not in CODEF_BASE_URLS:
+            raise ValueError(f"Unknown CODEF_ENV: {environment}")
+        self.base_url = CODEF_BASE_URLS[environment]
+        self.http_client = http_client
+        self.replay = settings.CODEF_TRANSPORT == "replay"
+        # replay 토큰이 실제 토큰 저장소(codef_tokens)를 덮어쓰지 않도록 키 분리
+        token_key = f"{self.client_id}:replay" if self.replay else self.client_id
+        self.tokens = CodefTokenProvider(token_key, self._fetch_token)
 
     @property
     def is_configured(self) -> bool:
-        return bool(self.client_id and self.client_secret)
+        # replay 는 자격증명 없이도 동작 (오프라인 개발/부하 테스트)
+        return self.replay or bool(self.client_id and self.client_secret)
 
-    async def _get_token(self) -> str:
-        """Get or refresh OAuth2 access token (client_credentials grant)."""
-        if (
-            self._access_token
-            and self._token_expires_at
-            and datetime.now() < self._token_expires_at
-        ):
-            return self._access_token
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Pooled client injected at startup (lazy shared client otherwise)."""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = http_clients.get(CODEF)
+        return self.http_client
 
+    async def _get_token(self) -> str:
+        """Get a shared OAuth2 access token (see CodefTokenProvider)."""
         if not self.is_configured:
             raise ValueError("Codef API credentials not configured")
+        return await self.tokens.get()
 
+    async def _fetch_token(self) -> tuple[str, int]:
+        """Issue a new access token (client_credentials grant)."""
         auth_str = f"{self.client_id}:{self.client_secret}"
         auth_header = base64.b64encode(auth_str.encode()).decode()
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
+        try:
+            response = await self.http.post(
                 CODEF_TOKEN_URL,
                 headers={
                     "Accept": "application/json",
                     "Content-Type": "application/x-www-form-urlencoded",
                     "Authorization": f"Basic {auth_header}",
                 },
-                data="grant_type=client_credentials&scope=read",
+                content="grant_type=client_credentials&scope=read",
+                timeout=settings.HTTP_CODEF_TOKEN_TIMEOUT,
             )
+        except httpx.TransportError as e:
+            raise CodefTransientError(
+                f"Codef 토큰 발급 통신 오류: {type(e).__name__}"
+            ) from e
 
         if response.status_code != 200:
-            logger.error(f"Codef token error: {response.status_code} {response.text}")
-            raise Exception(f"Codef 토큰 발급 실패: {response.status_code}")
+            logger.error(
+                f"Codef token error: {response.status_code} {response.text[:200]}"
+            )
+            raise classify_status(response.status_code)(
+                f"Codef 토큰 발급 실패: {response.status_code}",
+                status_code=response.status_code,
+            )
 
         data = response.json()
-        self._access_token = data["access_token"]
-        expires_in = data.get("expires_in", 604799)
-        self._token_expires_at = datetime.now() + timedelta(seconds=expires_in - 3600)
-
-        logger.info("Codef access token issued successfully")
-        assert self._access_token is not None
-        return self._access_token
+        return data["access_token"], int(data.get("expires_in", 604799))
 
-    async def _api_request(self, path: str, body: dict) -> dict:
+    async def _api_request(self, path: str, body: dict, retry: bool = True) -> dict:
         """Make authenticated request to Codef API.
 
-        All Codef requests: POST, body is JSON URL-encoded, Bearer token.
-        Matches official codef-python sample: urllib.parse.quote(json.dumps(body))
+        Traced (codef_trace), paced by the organization's limiter, guarded by its
+        circuit breaker and retried with jittered backoff on CodefTransientError
+        when `retry`.
+        Account mutations pass retry=False (not idempotent).
         """
-        token = await self._get_token()
-        url = f"{self.base_url}{path}"
-        raw_json = json.dumps(body)
-        encoded_body = urllib.parse.quote(raw_json)
-
-        logger.info(f"Codef request URL: {url}")
-        logger.info(f"Codef request body (raw JSON): {raw_json}")
-        logger.info(f"Codef request body (encoded, first 200): {encoded_body[:200]}")
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
+        organization = _organization_of(body)
+        breaker = circuit_breakers.get(organization)
+        breaker.before_call()
+        limiter = org_limiters.get(organization)
+
+        call = CodefCall(endpoint=path, organization=organization)
+        capture = codef_tracer.should_capture()
+        started = time.perf_counter()
+        attempt = 1
+        try:
+            while True:
+                try:
+                    async with limiter.slot():
+                        result = await self._send(path, body, call)
+                    break
+                except CodefTransientError as e:
+                    if not retry or attempt >= settings.CODEF_RETRY_ATTEMPTS:
+                        raise
+                    delay = backoff_delay(attempt)
+                    logger.warning(
+                        f"Codef transient error on {path} (org={organization}), "
+                        f"retry {attempt} in {delay:.1f}s: {e}"
+                    )
+                    attempt += 1
+                    call.retries += 1
+                    await asyncio.sleep(delay)
+            breaker.on_success()
+            if capture:
+                call.response_body = redact(result)
+            return result
+        except CodefTransientError as e:
+            breaker.on_failure()
+            call.error = str(e)[:200]
+            raise
+        except CodefError as e:
+            # 기관은 응답했음 (비밀번호 오류 등) → breaker 입장에선 성공
+            breaker.on_success()
+            call.error = str(e)[:200]
+            raise
+        except BaseException as e:
+            breaker.on_abort()
+            call.error = str(e)[:200] or type(e).__name__
+            raise
+        finally:
+            call.duration_ms = (time.perf_counter() - started) * 1000
+            if capture:
+                call.request_body = redact(body)
+            codef_tracer.record(call)
+
+    async def _post(
+        self, url: str, token: str, encoded_body: str
+    ) -> tuple[int, bytearray]:
+        """Stream the response into a single buffer (no text/str copies)."""
+        try:
+            async with self.http.stream(
+                "POST",
                 url,
                 headers={
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {token}",
                 },
                 content=encoded_body,
-            )
+            ) as response:
+                content = bytearray()
+                async for chunk in response.aiter_bytes():
+                    content += chunk
+                return response.status_code, content
+        except httpx.TransportError as e:
+            raise CodefTransientError(
+                f"Codef 통신 오류: {type(e).__name__}"
+            ) from e
+
+    async def _send(self, path: str, body: dict, call: CodefCall) -> dict:
+        """POST to Codef and decode the result.
 
-        if response.status_code == 401:
-            self._access_token = None
-            self._token_expires_at = None
-            token = await self._get_token()
-
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {token}",
-                    },
-                    content=encoded_body,
-                )
+        All Codef requests: POST, body is JSON URL-encoded, Bearer token.
+        Matches official codef-python sample: urllib.parse.quote(json.dumps(body))
+        """
+        token = await self._get_token()
+        url = f"{self.base_url}{path}"
+        encoded_body = urllib.parse.quote(json.dumps(body))
+        call.request_bytes = len(encoded_body)
 
-        if response.status_code != 200:
-            logger.error(f"Codef API error: {response.status_code} {response.text}")
-            raise Exception(f"Codef API 오류: {response.status_code}")
+        status_code, content = await self._post(url, token, encoded_body)
+
+        if status_code == 401:
+            token = await self.tokens.invalidate(token)
+            call.retries += 1
+            status_code, content = await self._post(url, token, encoded_body)
+
+        call.status_code = status_code
+        call.response_bytes = len(content)
+
+        if status_code != 200:
+            logger.error(
+                f"Codef API error: {status_code} "
+                f"{bytes(content[:200]).decode('utf-8', 'replace')}"
+            )
+            raise classify_status(status_code)(
+                f"Codef API 오류: {status_code}",
+                organization=call.organization,
+                status_code=status_code,
+            )
 
-        decoded_text = urllib.parse.unquote_plus(response.text)
-        result = json.loads(decoded_text)
+        result = decode_codef_body(content)
+        del content
 
         result_code = result.get("result", {}).get("code", "")
+        call.result_code = result_code
         if result_code != "CF-00000":
             msg = result.get("result", {}).get("message", "알 수 없는 오류")
             extra = result.get("result", {}).get("extraMessage", "")
 
             # CF-04000 is a wrapper — real error is in data.errorList
+            codes = [result_code]
             error_detail = ""
             data = result.get("data", {})
             if isinstance(data, dict):
@@ -304,8 +581,8 @@ class CodefClient:
                     for err in error_list:
                         err_code = err.get("code", "")
                         err_msg = err.get("message", "")
+                        codes.append(err_code)
                         error_detail += f" [{err_code}] {err_msg}"
-                    logger.error(f"Codef errorList: {error_list}")
 
             logger.error(
                 f"Codef API business error: {result_code} - {msg} {extra}"
@@ -314,7 +591,10 @@ class CodefClient:
             full_msg = f"Codef 오류 [{result_code}]: {msg} {extra}"
             if error_detail:
                 full_msg += f" (상세:{error_detail})"
-            raise Exception(full_msg)
+            error_cls = classify_result(codes, f"{msg} {extra}{error_detail}")
+            raise error_cls(
+                full_msg, code=result_code, organization=call.organization
+            )
 
         return result
 
@@ -366,7 +646,7 @@ class CodefClient:
         account_item["clientTypeLevel"] = ""
 
         body = {"accountList": [account_item]}
-        result = await self._api_request("/v1/account/create", body)
+        result = await self._api_request("/v1/account/create", body, retry=False)
         return result.get("data", {})
 
     async def add_account(
@@ -412,7 +692,7 @@ class CodefClient:
         account_item["clientTypeLevel"] = ""
 
         body = {"connectedId": connected_id, "accountList": [account_item]}
-        result = await self._api_request("/v1/account/add", body)
+        result = await self._api_request("/v1/account/add", body, retry=False)
         return result.get("data", {})
 
     async def delete_account(
@@ -436,7 +716,7 @@ class CodefClient:
                 }
             ],
         }
-        result = await self._api_request("/v1/account/delete", body)
+        result = await self._api_request("/v1/account/delete", body, retry=False)
         return result.get("data", {})
 
     async def list_accounts(self, connected_id: str) -> dict:
@@ -550,15 +830,23 @@ class CodefClient:
         organization: str,
         months_back: int = 6,
         card_nos: list[str] | None = None,
-    ) -> list[dict]:
-        """Fetch transaction history for the last N months. Returns normalized list."""
+        since: date | None = None,
+        progress: ScrapeProgress | None = None,
+        keep_raw: bool = False,
+        on_batch: ScrapeBatch | None = None,
+    ) -> ScrapeResult:
+        """Fetch transaction history for the last N months. Returns TxRecords.
+
+        since: incremental sync — fetch only from this date (within the cap).
+        progress: called after each window completes.
+        keep_raw: keep the upstream item on each TxRecord (dropped by default).
+        on_batch: receives each window's transactions as soon as it is fetched.
+        """
         max_months = CARD_MAX_MONTHS.get(organization, 12)
         effective_months = min(months_back, max_months)
 
         end_date = datetime.now().strftime("%Y%m%d")
-        start_date = (datetime.now() - timedelta(days=effective_months * 30)).strftime(
-            "%Y%m%d"
-        )
+        start_date = _period_start(effective_months, since)
 
         if effective_months != months_back:
             logger.info(
@@ -566,28 +854,66 @@ class CodefClient:
                 f"{months_back}→{effective_months} months"
             )
 
-        transactions: list[dict] = []
+        windows = _month_windows(
+            datetime.strptime(start_date, "%Y%m%d").date(),
+            datetime.strptime(end_date, "%Y%m%d").date(),
+            settings.CODEF_CARD_WINDOW_MONTHS,
+        )
+        # 호출 단위 fan-out 상한 (기관 전체 한도는 org_limiters 가 담당)
+        sem = asyncio.Semaphore(settings.CODEF_SCRAPE_FANOUT)
+        done = [0, 0]  # windows, transactions
 
-        try:
-            data = await self.get_card_approval_list(
-                connected_id=connected_id,
-                organization=organization,
-                start_date=start_date,
-                end_date=end_date,
-                order_by="1",
-                inquiry_type="1",
-            )
-            raw_list = data.get("resList", data.get("resApprovalList", []))
-            for item in raw_list:
-                transactions.append(self._normalize_transaction(item))
-        except Exception as e:
-            logger.warning(f"Codef approval-list (전체조회) failed: {e}")
+        async def fetch_window(window: tuple[str, str]) -> list[TxRecord]:
+            try:
+                async with sem:
+                    data = await self.get_card_approval_list(
+                        connected_id=connected_id,
+                        organization=organization,
+                        start_date=window[0],
+                        end_date=window[1],
+                        order_by="1",
+                        inquiry_type="1",
+                    )
+                raw_list = data.get("resList", data.get("resApprovalList", []))
+                txs = [
+                    self._normalize_transaction(item, keep_raw) for item in raw_list
+                ]
+                done[1] += len(txs)
+                if on_batch:
+                    on_batch(txs)
+                return txs
+            finally:
+                done[0] += 1
+                if progress:
+                    progress(done[0], len(windows), done[1])
+
+        outcomes = await _gather_or_abort(fetch_window(w) for w in windows)
+
+        # 기간 순서대로 병합, 경계에 걸친 중복 승인건 제거
+        result = ScrapeResult()
+        seen: set[tuple] = set()
+        for window, outcome in zip(windows, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(
+                    f"Codef approval-list failed for {window[0]}-{window[1]}: {outcome}"
+                )
+                result.failures.append(
+                    ScrapeFailure(target=f"{window[0]}-{window[1]}", error=str(outcome))
+                )
+                continue
+            for tx in outcome:
+                key = _approval_key(tx)
+                if key in seen:
+                    continue
+                seen.add(key)
+                result.transactions.append(tx)
 
         logger.info(
-            f"Codef scrape total: {len(transactions)} transactions "
-            f"(org={organization}, period={effective_months}m)"
+            f"Codef scrape total: {len(result.transactions)} transactions "
+            f"(org={organization}, period={effective_months}m, "
+            f"windows={len(windows)}, failed={len(result.failures)})"
         )
-        return transactions
+        return result
 
     async def get_bank_account_list(
         self,
@@ -640,14 +966,25 @@ class CodefClient:
         accounts: list[str],
         months_back: int = 6,
         account_password: str = "",
-    ) -> list[dict]:
+        since: date | None = None,
+        progress: ScrapeProgress | None = None,
+        keep_raw: bool = False,
+        on_batch: ScrapeBatch | None = None,
+    ) -> ScrapeResult:
+        """Fetch every account concurrently (bounded per organization).
+
+        progress: called after each account completes.
+        keep_raw: keep the upstream item on each TxRecord (dropped by default).
+        on_batch: receives each account's transactions as soon as it is fetched.
+
+        Results are merged in the order of `accounts`, so the output is
+        deterministic regardless of which account finishes first.
+        """
         max_months = BANK_MAX_MONTHS.get(organization, 12)
         effective_months = min(months_back, max_months)
 
         end_date = datetime.now().strftime("%Y%m%d")
-        start_date = (datetime.now() - timedelta(days=effective_months * 30)).strftime(
-            "%Y%m%d"
-        )
+        start_date = _period_start(effective_months, since)
 
         if effective_months != months_back:
             logger.info(
@@ -655,171 +992,80 @@ class CodefClient:
                 f"{months_back}→{effective_months} months"
             )
 
-        transactions: list[dict] = []
+        result = ScrapeResult()
 
         if not accounts:
             logger.warning(
                 f"Bank scrape: no accounts to scrape (org={organization}). "
                 "계좌 목록 파싱 실패 가능성 — register-bank 로그를 확인하세요."
             )
-            return transactions
+            return result
+
+        # 호출 단위 fan-out 상한 (기관 전체 한도는 org_limiters 가 담당)
+        sem = asyncio.Semaphore(settings.CODEF_SCRAPE_FANOUT)
+        done = [0, 0]  # accounts, transactions
 
-        for account in accounts:
+        async def fetch_account(account: str) -> list[TxRecord]:
             try:
-                data = await self.get_bank_transaction_list(
-                    connected_id=connected_id,
-                    organization=organization,
-                    account=account,
-                    start_date=start_date,
-                    end_date=end_date,
-                    order_by="1",
-                    account_password=account_password,
-                )
-                logger.info(
-                    f"Bank transaction-list response keys: "
-                    f"{list(data.keys()) if isinstance(data, dict) else type(data)}"
-                )
+                async with sem:
+                    data = await self.get_bank_transaction_list(
+                        connected_id=connected_id,
+                        organization=organization,
+                        account=account,
+                        start_date=start_date,
+                        end_date=end_date,
+                        order_by="1",
+                        account_password=account_password,
+                    )
                 raw_list = data.get("resTrHistoryList", data.get("resList", []))
-                logger.info(
-                    f"Bank transaction-list: {len(raw_list)} raw items "
-                    f"for account ***{account[-4:]}"
-                )
-                for item in raw_list:
-                    normalized = self._normalize_bank_transaction(item, account)
-                    transactions.append(normalized)
-            except Exception as e:
+                txs = [
+                    self._normalize_bank_transaction(item, account, keep_raw)
+                    for item in raw_list
+                ]
+                done[1] += len(txs)
+                if on_batch:
+                    on_batch(txs)
+                return txs
+            finally:
+                done[0] += 1
+                if progress:
+                    progress(done[0], len(accounts), done[1])
+
+        outcomes = await _gather_or_abort(
+            fetch_account(account) for account in accounts
+        )
+        for account, outcome in zip(accounts, outcomes):
+            if isinstance(outcome, BaseException):
                 logger.warning(
-                    f"Bank transaction-list failed for account ***{account[-4:]}: {e}"
+                    f"Bank transaction-list failed for account "
+                    f"{_mask_account(account)}: {outcome}"
+                )
+                result.failures.append(
+                    ScrapeFailure(target=_mask_account(account), error=str(outcome))
                 )
+            else:
+                result.transactions.extend(outcome)
 
         logger.info(
-            f"Bank scrape total: {len(transactions)} transactions "
+            f"Bank scrape total: {len(result.transactions)} transactions "
             f"(org={organization}, accounts={len(accounts)}, "
-            f"period={effective_months}m)"
+            f"failed={len(result.failures)}, period={effective_months}m)"
         )
-        return transactions
+        return result
 
     @staticmethod
-    def _normalize_bank_transaction(item: dict, account: str) -> dict:
-        desc1 = item.get("resAccountDesc1", "")
-        desc2 = item.get("resAccountDesc2", "")
-        desc3 = item.get("resAccountDesc3", "")
-        desc4 = item.get("resAccountDesc4", "")
-        merchant = desc3 or desc2 or desc1 or desc4
-
-        out_amount = item.get("resAccountOut", "0")
-        in_amount = item.get("resAccountIn", "0")
-        is_withdrawal = int(out_amount or "0") > 0
-        amount = out_amount if is_withdrawal else in_amount
-
-        return {
-            "date": item.get("resAccountTrDate", item.get("resDate", "")),
-            "time": item.get("resAccountTrTime", item.get("resTime", "")),
-            "merchant": merchant,
-            "amount": amount,
-            "status": "출금" if is_withdrawal else "입금",
-            "card_name": "",
-            "card_no": account,
-            "category": "",
-            "raw": item,
-        }
+    def _normalize_bank_transaction(
+        item: dict, account: str, keep_raw: bool = False
+    ) -> TxRecord:
+        return from_bank_item(item, account, keep_raw)
 
     @staticmethod
-    def _normalize_transaction(item: dict) -> dict:
-        return {
-            "date": item.get("resUsedDate", item.get("resApprovalDate", "")),
-            "time": item.get("resUsedTime", item.get("resApprovalTime", "")),
-            "merchant": item.get(
-                "resMemberStoreName",
-                item.get("resStoreName", item.get("resMerchantName", "")),
-            ),
-            "amount": item.get(
-                "resUsedAmount",
-                item.get("resApprovalAmount", item.get("resAmount", "0")),
-            ),
-            "status": item.get("resApprovalStatus", "승인"),
-            "card_name": item.get("resCardName", ""),
-            "card_no": item.get("resCardNo", item.get("resCardNumber", "")),
-            "category": item.get("resCategory", ""),
-            "raw": item,
-        }
+    def _normalize_transaction(item: dict, keep_raw: bool = False) -> TxRecord:
+        return from_card_item(item, keep_raw)
 
-    def detect_subscriptions(self, transactions: list[dict]) -> list[dict]:
+    def detect_subscriptions(self, transactions: Iterable[TxRecord]) -> list[dict]:
         """Detect recurring subscription patterns from transaction history."""
-        merchant_txns: dict[str, list[dict]] = defaultdict(list)
-        for tx in transactions:
-            merchant = tx.get("merchant", "").strip()
-            if not merchant:
-                continue
-            normalized = merchant.upper().replace(" ", "")
-            merchant_txns[normalized].append(tx)
-
-        subscriptions = []
-        for _merchant_key, txns in merchant_txns.items():
-            if len(txns) < 2:
-                continue
-
-            amounts: list[int] = []
-            for tx in txns:
-                try:
-                    amt = int(str(tx["amount"]).replace(",", ""))
-                    if amt > 0:
-                        amounts.append(amt)
-                except (ValueError, TypeError):
-                    continue
-
-            if len(amounts) < 2:
-                continue
-
-            avg_amount = sum(amounts) / len(amounts)
-            if avg_amount == 0:
-                continue
-
-            consistent = all(abs(a - avg_amount) / avg_amount < 0.1 for a in amounts)
-            if not consistent:
-                continue
-
-            dates: list[datetime] = []
-            for tx in txns:
-                date_str = tx.get("date", "")
-                if len(date_str) == 8:
-                    try:
-                        dates.append(datetime.strptime(date_str, "%Y%m%d"))
-                    except ValueError:
-                        continue
-
-            dates.sort()
-            if len(dates) >= 2:
-                intervals = [
-                    (dates[i + 1] - dates[i]).days for i in range(len(dates) - 1)
-                ]
-                avg_interval = sum(intervals) / len(intervals)
-                is_monthly = 20 <= avg_interval <= 40
-                is_yearly = 340 <= avg_interval <= 395
-                is_weekly = 5 <= avg_interval <= 10
-
-                if is_monthly or is_yearly or is_weekly:
-                    original_name = txns[0].get("merchant", _merchant_key)
-                    billing_cycle = (
-                        "monthly" if is_monthly else "yearly" if is_yearly else "weekly"
-                    )
-                    recent_date = max(dates)
-
-                    subscriptions.append(
-                        {
-                            "name": original_name,
-                            "amount": int(avg_amount),
-                            "billing_cycle": billing_cycle,
-                            "billing_day": recent_date.day,
-                            "occurrence_count": len(txns),
-                            "last_payment_date": recent_date.strftime("%Y-%m-%d"),
-                            "card_no": txns[0].get("card_no", ""),
-                            "category": txns[0].get("category", ""),
-                        }
-                    )
-
-        subscriptions.sort(key=lambda x: x["amount"], reverse=True)
-        return subscriptions
+        return detect_recurring(transactions)
 
 
 # Singleton instance
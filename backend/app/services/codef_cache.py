@@ -0,0 +1,147 @@
+"""
+Single-flight, short-TTL cache for Codef connection scrapes.
+
+프론트엔드는 같은 연결에 대해 /scrape → /detect 를 연달아 호출하고, 더블클릭이면 동시에 중복 요청이 온다.
+같은 연결(connectedId, 기관, 조회 계좌)의 스크랩은
+- 진행 중이면 그 결과를 함께 기다리고 (single-flight)
+- 끝난 뒤 CODEF_SCRAPE_CACHE_TTL_SECONDS 동안은 재사용한다.
+캐시된 조회 시작일이 요청 시작일 이전(더 넓은 기간)이면 적중으로 본다.
+
+일부 계좌/기간이 실패한 결과는 캐시하지 않고, 연결 삭제/재등록 시 invalidate 한다.
+조회하던 요청(leader)이 취소되면 기다리던 요청 중 하나가 이어서 조회한다.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+
+from app.config import settings
+from app.models.bank_connection import BankConnection
+from app.services.codef import ScrapeResult
+
+CacheKey = tuple[int, str, str, str, tuple[str, ...], date]
+
+
+class _LeaderCancelled(Exception):
+    """The request running the shared fetch was cancelled."""
+
+
+@dataclass(eq=False)
+class _Entry:
+    start: date
+    future: asyncio.Future
+    expires_at: float | None = None  # None = 진행 중
+
+
+class ScrapeCache:
+    def __init__(self) -> None:
+        self._entries: dict[CacheKey, list[_Entry]] = {}
+        self.hits = 0  # TTL 캐시 적중
+        self.joined = 0  # 진행 중 조회에 합류
+        self.misses = 0
+
+    @staticmethod
+    def _key(conn: BankConnection, identifiers: list[str]) -> CacheKey:
+        return (
+            conn.id,
+            conn.connected_id or "",
+            conn.organization_code or "",
+            conn.business_type or "",
+            tuple(sorted(identifiers)),
+            date.today(),  # 조회 종료일 = 오늘
+        )
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for key in list(self._entries):
+            alive = [
+                e
+                for e in self._entries[key]
+                if e.expires_at is None or e.expires_at > now
+            ]
+            if alive:
+                self._entries[key] = alive
+            else:
+                del self._entries[key]
+
+    def _discard(self, key: CacheKey, entry: _Entry) -> None:
+        bucket = self._entries.get(key)
+        if bucket and entry in bucket:
+            bucket.remove(entry)
+            if not bucket:
+                del self._entries[key]
+
+    async def get_or_fetch(
+        self,
+        conn: BankConnection,
+        identifiers: list[str],
+        start: date,
+        fetch: Callable[[], Awaitable[ScrapeResult]],
+    ) -> ScrapeResult:
+        """Return a cached/in-flight scrape covering `start`..today, else fetch."""
+        if settings.CODEF_SCRAPE_CACHE_TTL_SECONDS <= 0:
+            return await fetch()
+
+        key = self._key(conn, identifiers)
+        while True:
+            self._prune()
+            shared = next(
+                (e for e in self._entries.get(key, []) if e.start <= start), None
+            )
+            if shared is None:
+                break
+            if shared.expires_at is None:
+                self.joined += 1
+            else:
+                self.hits += 1
+            try:
+                # 기다리던 요청이 취소돼도 공유 중인 조회는 계속
+                return await asyncio.shield(shared.future)
+            except _LeaderCancelled:
+                # leader 가 취소됨 → 다른 합류자가 이미 이어받았으면 거기에, 아니면 직접 조회
+                continue
+
+        self.misses += 1
+        entry = _Entry(start=start, future=asyncio.get_running_loop().create_future())
+        # 기다리는 쪽이 없을 때 "exception was never retrieved" 경고 방지
+        entry.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._entries.setdefault(key, []).append(entry)
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            self._discard(key, entry)
+            entry.future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as e:
+            self._discard(key, entry)
+            entry.future.set_exception(e)
+            raise
+
+        if result.failures:
+            self._discard(key, entry)
+        elif entry in self._entries.get(key, []):  # 진행 중 invalidate 되지 않았으면
+            ttl = settings.CODEF_SCRAPE_CACHE_TTL_SECONDS
+            entry.expires_at = time.monotonic() + ttl
+        entry.future.set_result(result)
+        return result
+
+    def invalidate(
+        self,
+        bank_connection_id: int | None = None,
+        connected_id: str | None = None,
+        organization: str | None = None,
+    ) -> None:
+        """Drop entries for a connection id, or for a connectedId + organization."""
+        for key in list(self._entries):
+            conn_id, key_connected_id, key_org = key[0], key[1], key[2]
+            if conn_id == bank_connection_id or (
+                connected_id
+                and key_connected_id == connected_id
+                and (organization is None or key_org == organization)
+            ):
+                del self._entries[key]
+
+
+scrape_cache = ScrapeCache()
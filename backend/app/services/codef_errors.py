@@ -0,0 +1,80 @@
+"""
+Typed Codef errors.
+
+재시도 여부를 타입으로 구분한다:
+- CodefTransientError: 기관 점검/시간 초과/서버 오류/HTTP 5xx·429 → 지수 백오프 재시도 대상
+- CodefCredentialError: 아이디·비밀번호 오류 → 재시도 금지 (카드사 3~5회 오류 시 계정 잠김)
+- CodefAccountLockedError: 계정 잠김
+- CodefRequestError: 그 외 요청/파라미터 오류
+- CodefCircuitOpenError: 기관 circuit breaker 가 열려 있어 즉시 실패
+"""
+
+# 코드 목록이 공개 문서마다 달라 코드 + 메시지 키워드를 함께 본다
+TRANSIENT_CODES = frozenset({"CF-01004", "CF-09999"})
+TRANSIENT_KEYWORDS = ("점검", "시간 초과", "시간초과", "일시적", "지연", "timeout")
+LOCKED_KEYWORDS = ("잠김", "잠금", "잠겼", "locked")
+CREDENTIAL_KEYWORDS = ("비밀번호", "아이디", "password")
+CREDENTIAL_CODE_PREFIX = "CF-12"
+
+
+class CodefError(Exception):
+    """Base class for Codef failures."""
+
+    retryable = False
+
+    def __init__(
+        self,
+        message: str,
+        code: str = "",
+        organization: str = "",
+        status_code: int = 0,
+    ):
+        super().__init__(message)
+        self.code = code
+        self.organization = organization
+        self.status_code = status_code
+
+
+class CodefTransientError(CodefError):
+    retryable = True
+
+
+class CodefCredentialError(CodefError):
+    pass
+
+
+class CodefAccountLockedError(CodefCredentialError):
+    pass
+
+
+class CodefRequestError(CodefError):
+    pass
+
+
+class CodefCircuitOpenError(CodefError):
+    pass
+
+
+def classify_result(codes: list[str], message: str) -> type[CodefError]:
+    """Pick the error class for a non CF-00000 result.
+
+    codes: result code followed by data.errorList codes (CF-04000 wrapper).
+    """
+    text = message.lower()
+    if any(k in text for k in LOCKED_KEYWORDS):
+        return CodefAccountLockedError
+    if any(c.startswith(CREDENTIAL_CODE_PREFIX) for c in codes) or any(
+        k in text for k in CREDENTIAL_KEYWORDS
+    ):
+        return CodefCredentialError
+    if any(c in TRANSIENT_CODES for c in codes) or any(
+        k in text for k in TRANSIENT_KEYWORDS
+    ):
+        return CodefTransientError
+    return CodefRequestError
+
+
+def classify_status(status_code: int) -> type[CodefError]:
+    if status_code == 429 or status_code >= 500:
+        return CodefTransientError
+    return CodefRequestError
@@ -0,0 +1,251 @@
+"""
+Synthetic Codef responses for offline development and load tests.
+
+요청(기관, connectedId, 계좌, 조회 기간)과 seed 로 결정되는 가짜 응답을 만든다.
+같은 요청이면 항상 같은 응답이므로 재현 가능한 벤치마크/부하 테스트에 쓸 수 있다.
+
+- 카드 승인내역 / 은행 거래내역: 월 단위 밀도(FIXTURE_SIZES) + 매월 반복 결제(SUBSCRIPTIONS)
+- 카드 목록 / 계좌 목록 / connectedId 발급
+
+Usage (backend/ 에서, replay 용 번들 fixture 내보내기 — 기본은 세 크기 모두):
+    python -m app.services.codef_fixtures fixtures/codef --size large
+"""
+
+import hashlib
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# 카드/계좌 1개당 월 거래 수
+FIXTURE_SIZES: dict[str, int] = {
+    "small": 20,
+    "medium": 200,
+    "large": 2000,
+}
+
+# (가맹점, 금액, 결제일) — 매월 반복되어 구독으로 탐지되어야 하는 결제
+SUBSCRIPTIONS: tuple[tuple[str, int, int], ...] = (
+    ("NETFLIX.COM", 17000, 5),
+    ("유튜브프리미엄", 14900, 12),
+    ("SPOTIFY", 10900, 20),
+    ("쿠팡와우", 7890, 1),
+    ("멜론", 10900, 25),
+)
+
+NOISE_MERCHANTS: tuple[str, ...] = (
+    "스타벅스 강남점",
+    "GS25 역삼점",
+    "배달의민족",
+    "CU 선릉점",
+    "이마트24",
+    "교보문고",
+    "카카오T",
+    "올리브영",
+    "다이소",
+    "맥도날드",
+)
+
+CARDS: tuple[tuple[str, str], ...] = (
+    ("5365-****-****-1234", "신한카드 Deep Dream"),
+    ("9410-****-****-5678", "신한카드 Mr.Life"),
+)
+ACCOUNTS: tuple[tuple[str, str], ...] = (
+    ("110123456789", "주거래 입출금"),
+    ("110987654321", "생활비 통장"),
+)
+
+SUCCESS = {"code": "CF-00000", "extraMessage": "", "message": "성공"}
+
+
+def _rng(seed: int, *parts: str) -> random.Random:
+    digest = hashlib.sha1("\x1f".join((str(seed), *parts)).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _parse(value: str, default: date) -> date:
+    try:
+        return datetime.strptime(value, "%Y%m%d").date()
+    except (TypeError, ValueError):
+        return default
+
+
+def _period(body: dict) -> tuple[date, date]:
+    end = _parse(body.get("endDate", ""), date.today())
+    start = _parse(body.get("startDate", ""), end - timedelta(days=30))
+    return min(start, end), end
+
+
+def _days(start: date, end: date):
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def _payments(
+    rng: random.Random, start: date, end: date, per_month: int
+) -> list[tuple[date, str, str, int]]:
+    """(date, time, merchant, amount) in chronological order."""
+    rows: list[tuple[date, str, str, int]] = []
+    per_day = per_month / 30.44
+    for day in _days(start, end):
+        for merchant, amount, billing_day in SUBSCRIPTIONS:
+            if day.day == billing_day:
+                rows.append((day, "090000", merchant, amount))
+        count = int(per_day) + (1 if rng.random() < per_day % 1 else 0)
+        for _ in range(count):
+            rows.append(
+                (
+                    day,
+                    f"{rng.randint(7, 23):02d}{rng.randint(0, 59):02d}00",
+                    rng.choice(NOISE_MERCHANTS),
+                    rng.randrange(1000, 80000, 100),
+                )
+            )
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return rows
+
+
+def approval_list(body: dict, size: str = "medium", seed: int = 0) -> dict:
+    start, end = _period(body)
+    organization = body.get("organization", "")
+    items = []
+    for card_no, card_name in CARDS:
+        rng = _rng(seed, "approval", organization, card_no, str(start), str(end))
+        for day, time, merchant, amount in _payments(
+            rng, start, end, FIXTURE_SIZES[size]
+        ):
+            items.append(
+                {
+                    "resUsedDate": day.strftime("%Y%m%d"),
+                    "resUsedTime": time,
+                    "resCardNo": card_no,
+                    "resCardName": card_name,
+                    "resMemberStoreName": merchant,
+                    "resUsedAmount": str(amount),
+                    "resApprovalNo": f"{rng.randrange(10**8):08d}",
+                    "resApprovalStatus": "승인",
+                    "resInstallmentMonth": "",
+                }
+            )
+    return {"result": SUCCESS, "data": {"resList": items}}
+
+
+def bank_transaction_list(body: dict, size: str = "medium", seed: int = 0) -> dict:
+    start, end = _period(body)
+    account = body.get("account", "")
+    organization = body.get("organization", "")
+    rng = _rng(seed, "bank", organization, account, str(start), str(end))
+    balance = 5_000_000
+    items = []
+    for day, time, merchant, amount in _payments(rng, start, end, FIXTURE_SIZES[size]):
+        balance -= amount
+        items.append(
+            {
+                "resAccountTrDate": day.strftime("%Y%m%d"),
+                "resAccountTrTime": time,
+                "resAccountOut": str(amount),
+                "resAccountIn": "0",
+                "resAccountDesc1": "",
+                "resAccountDesc2": "체크카드",
+                "resAccountDesc3": merchant,
+                "resAccountDesc4": "",
+                "resAfterTranBalance": str(balance),
+            }
+        )
+    return {
+        "result": SUCCESS,
+        "data": {"resAccount": account, "resTrHistoryList": items},
+    }
+
+
+def card_list(body: dict, size: str = "medium", seed: int = 0) -> dict:
+    return {
+        "result": SUCCESS,
+        "data": {
+            "resList": [
+                {"resCardNo": card_no, "resCardName": card_name}
+                for card_no, card_name in CARDS
+            ]
+        },
+    }
+
+
+def account_list(body: dict, size: str = "medium", seed: int = 0) -> dict:
+    return {
+        "result": SUCCESS,
+        "data": {
+            "resDepositTrust": [
+                {"resAccount": account, "resAccountName": name}
+                for account, name in ACCOUNTS
+            ]
+        },
+    }
+
+
+def connected_id(body: dict, size: str = "medium", seed: int = 0) -> dict:
+    existing = body.get("connectedId")
+    accounts = json.dumps(body.get("accountList", []), sort_keys=True)
+    rng = _rng(seed, "connected", accounts)
+    return {
+        "result": SUCCESS,
+        "data": {"connectedId": existing or f"synthetic-{rng.randrange(16**12):012x}"},
+    }
+
+
+GENERATORS = {
+    "/v1/kr/card/p/account/approval-list": approval_list,
+    "/v1/kr/card/p/account/card-list": card_list,
+    "/v1/kr/bank/p/account/account-list": account_list,
+    "/v1/kr/bank/p/account/transaction-list": bank_transaction_list,
+    "/v1/account/create": connected_id,
+    "/v1/account/add": connected_id,
+    "/v1/account/delete": connected_id,
+    "/v1/account/list": connected_id,
+}
+
+
+def synthetic_response(
+    path: str, body: dict, size: str = "medium", seed: int = 0
+) -> dict | None:
+    generator = GENERATORS.get(path)
+    if generator is None:
+        return None
+    return generator(body, size=size, seed=seed)
+
+
+# replay 번들 fixture 로 내보내는 endpoint (거래일은 replay 때 요청 기간으로 옮겨진다)
+EXPORTED = (
+    "/v1/kr/card/p/account/approval-list",
+    "/v1/kr/bank/p/account/transaction-list",
+)
+
+
+def export(
+    directory: str, size: str = "medium", months: int = 12, seed: int = 0
+) -> None:
+    """Write the bundled replay fixtures of one size ({size}/{endpoint}.json.gz)."""
+    from app.services.codef_transport import bundled_name, write_fixture
+
+    end = date.today()
+    body = {
+        "organization": "0306",
+        "account": ACCOUNTS[0][0],
+        "startDate": (end - timedelta(days=months * 30)).strftime("%Y%m%d"),
+        "endDate": end.strftime("%Y%m%d"),
+    }
+    for path in EXPORTED:
+        target = Path(directory) / bundled_name(path, size)
+        write_fixture(target, path, body, 200, GENERATORS[path](body, size, seed))
+        print(f"{target}: {target.stat().st_size:,} bytes")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sizes = list(FIXTURE_SIZES)
+    if "--size" in args:
+        idx = args.index("--size")
+        sizes = [args[idx + 1]]
+        del args[idx : idx + 2]
+    for size in sizes:
+        export(args[0] if args else "fixtures/codef", size=size)
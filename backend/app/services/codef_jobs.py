@@ -0,0 +1,178 @@
+"""
+Background Codef scrape/detect jobs with progress events.
+
+긴 스크랩을 HTTP 요청 안에서 기다리지 않고 job 으로 실행한다.
+- 제출 즉시 job id 반환, 작업은 백그라운드 task 에서 실행
+- 진행 이벤트(계좌/기간 완료, 수집 건수, 탐지 결과)는 job 에 순번(seq)과 함께 쌓이고
+  SSE 로 흘려보내거나 폴링으로 조회한다
+- 끝난 job 은 CODEF_JOB_TTL_SECONDS 동안 보관 → 재연결 시 다시 스크랩하지 않는다
+
+단일 프로세스 메모리 저장소이므로 워커가 여러 개면 같은 워커로 라우팅되어야 한다.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class JobEvent:
+    seq: int
+    event: str
+    data: dict
+
+
+@dataclass
+class CodefJob:
+    id: str
+    user_id: int
+    kind: str  # "scrape" | "detect"
+    bank_connection_id: int
+    months_back: int
+    status: str = QUEUED
+    events: list[JobEvent] = field(default_factory=list)
+    result: dict | None = None
+    error: str = ""
+    error_status: int = 0
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def emit(self, event: str, data: dict) -> None:
+        self.events.append(JobEvent(len(self.events) + 1, event, data))
+        # 대기 중인 스트림을 모두 깨우고 새 Event 로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+JobRunner = Callable[[CodefJob], Awaitable[dict]]
+
+
+class JobManager:
+    def __init__(self) -> None:
+        self._jobs: dict[str, CodefJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - settings.CODEF_JOB_TTL_SECONDS
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> CodefJob | None:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def find_active(
+        self,
+        user_id: int,
+        kind: str,
+        bank_connection_id: int,
+        months_back: int | None = None,
+    ) -> CodefJob | None:
+        """Unfinished job for the same target (any period if months_back is None)."""
+        for job in self._jobs.values():
+            if (
+                not job.done
+                and job.user_id == user_id
+                and job.kind == kind
+                and job.bank_connection_id == bank_connection_id
+                and (months_back is None or job.months_back == months_back)
+            ):
+                return job
+        return None
+
+    def submit(
+        self,
+        user_id: int,
+        kind: str,
+        bank_connection_id: int,
+        months_back: int,
+        runner: JobRunner,
+    ) -> CodefJob:
+        """Start `runner` in the background; an identical active job is reused."""
+        self._prune()
+        # 조회 기간이 다르면 결과도 다르므로 별도 job
+        existing = self.find_active(user_id, kind, bank_connection_id, months_back)
+        if existing:
+            return existing
+
+        job = CodefJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            kind=kind,
+            bank_connection_id=bank_connection_id,
+            months_back=months_back,
+        )
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._run(job, runner))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: CodefJob, runner: JobRunner) -> None:
+        job.status = RUNNING
+        job.emit("started", {"kind": job.kind})
+        try:
+            job.result = await runner(job)
+            job.status = SUCCEEDED
+            job.emit("completed", job.result)
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "작업이 취소되었습니다"
+            job.emit("failed", {"error": job.error})
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None)
+            job.status = FAILED
+            job.error = str(detail or e)
+            job.error_status = getattr(e, "status_code", 0) or 500
+            if not detail:
+                logger.exception(f"Codef job {job.id} ({job.kind}) failed")
+            job.emit("failed", {"error": job.error, "status_code": job.error_status})
+        finally:
+            job.finished_at = time.time()
+
+    async def stream(
+        self, job: CodefJob, after: int = 0, heartbeat: float = 15.0
+    ) -> AsyncIterator[JobEvent | None]:
+        """Yield events with seq > `after` until the job ends; None = heartbeat."""
+        while True:
+            changed = job._changed
+            while after < len(job.events):
+                after += 1
+                yield job.events[after - 1]
+            if job.done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+job_manager = JobManager()
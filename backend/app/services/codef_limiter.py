@@ -0,0 +1,104 @@
+"""
+Per-organization concurrency limiter and request pacing for Codef.
+
+모든 사용자가 codef_client 하나를 공유하므로, 기관(CARD_ORGS/BANK_ORGS 코드)별로
+- 동시 호출 수 (max in-flight)
+- 초당 호출 수 (최소 호출 간격으로 pacing)
+를 제한한다. 대기자는 도착 순서(FIFO)대로 깨어나고, snapshot() 으로 큐 깊이를 볼 수 있다.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.config import settings
+
+# 기관별 오버라이드, 예: {"0071": 1}
+ORG_MAX_IN_FLIGHT: dict[str, int] = {}
+ORG_MAX_RPS: dict[str, float] = {}
+
+
+class OrgLimiter:
+    def __init__(self, organization: str, max_in_flight: int, rps: float):
+        self.organization = organization
+        self.max_in_flight = max(1, max_in_flight)
+        self.rps = rps
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._next_start = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.done())
+
+    async def _acquire_slot(self) -> None:
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter  # release() 가 in_flight 를 넘겨준다
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+                break
+
+    async def _pace(self) -> None:
+        if self.rps <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rps
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    @asynccontextmanager
+    async def slot(self):
+        await self._acquire_slot()
+        try:
+            await self._pace()
+            yield
+        finally:
+            self._release_slot()
+
+
+class OrgLimiters:
+    def __init__(self) -> None:
+        self._limiters: dict[str, OrgLimiter] = {}
+
+    def get(self, organization: str) -> OrgLimiter:
+        limiter = self._limiters.get(organization)
+        if limiter is None:
+            limiter = OrgLimiter(
+                organization,
+                ORG_MAX_IN_FLIGHT.get(organization, settings.CODEF_ORG_MAX_IN_FLIGHT),
+                ORG_MAX_RPS.get(organization, settings.CODEF_ORG_MAX_RPS),
+            )
+            self._limiters[organization] = limiter
+        return limiter
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {
+                "organization": org,
+                "in_flight": limiter.in_flight,
+                "queued": limiter.queued,
+                "max_in_flight": limiter.max_in_flight,
+                "max_rps": limiter.rps,
+            }
+            for org, limiter in sorted(self._limiters.items())
+        ]
+
+
+org_limiters = OrgLimiters()
@@ -0,0 +1,94 @@
+"""
+Retry policy and per-organization circuit breaker for Codef calls.
+
+- 재시도: CodefTransientError 만, full-jitter 지수 백오프
+- breaker: 기관 코드별로 연속 일시 장애가 CODEF_BREAKER_FAILURES 회면 open →
+  CODEF_BREAKER_RESET_SECONDS 동안 즉시 실패, 이후 half-open 에서 한 건만 시험 호출
+"""
+
+import random
+import time
+
+from app.config import settings
+from app.services.codef_errors import CodefCircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff (seconds) before retry `attempt` (1-based)."""
+    ceiling = min(
+        settings.CODEF_RETRY_MAX_DELAY,
+        settings.CODEF_RETRY_BASE_DELAY * (2 ** (attempt - 1)),
+    )
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    def __init__(self, organization: str, failure_threshold: int, reset_timeout: float):
+        self.organization = organization
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CodefCircuitOpenError if the call must fail fast."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CodefCircuitOpenError(
+                    "기관 응답 장애로 잠시 후 다시 시도해주세요",
+                    organization=self.organization,
+                )
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                raise CodefCircuitOpenError(
+                    "기관 응답 장애 복구 확인 중입니다",
+                    organization=self.organization,
+                )
+            self._probe_in_flight = True
+
+    def on_success(self) -> None:
+        """Upstream answered (including non-transient business errors)."""
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        """Transient upstream failure (after retries)."""
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def on_abort(self) -> None:
+        """Call ended without an upstream verdict (e.g. cancelled)."""
+        self._probe_in_flight = False
+
+
+class CircuitBreakers:
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, organization: str) -> CircuitBreaker:
+        breaker = self._breakers.get(organization)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                organization,
+                settings.CODEF_BREAKER_FAILURES,
+                settings.CODEF_BREAKER_RESET_SECONDS,
+            )
+            self._breakers[organization] = breaker
+        return breaker
+
+    def snapshot(self) -> dict[str, str]:
+        return {org: b.state for org, b in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakers()
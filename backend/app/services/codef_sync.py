@@ -0,0 +1,198 @@
+"""
+Nightly background sync of all Codef connections.
+
+새벽 CODEF_SYNC_START_HOUR ~ CODEF_SYNC_END_HOUR 사이 CODEF_SYNC_INTERVAL_MINUTES 마다
+run_codef_sync() 배치가 돈다. 배치마다
+- 오늘 밤 아직 시도하지 않은 status == "connected" 연결을 last_synced_at 오래된 순(NULL 먼저)으로
+- 남은 배치 수로 나눈 만큼만 골라 (한 번에 몰지 않고 밤새 분산)
+- CODEF_SYNC_CONCURRENCY 개씩 연결마다 별도 세션으로 증분 동기화
+하고, 연결별 status / last_error 를 갱신한다.
+새로 저장된 거래는 동기화 안에서 incremental_detection 으로 바로 반영되고(새 구독 후보/이벤트),
+전체 재탐지는 동기화 시간대가 끝난 뒤 batch_detection.run_batch_detection() 이 전체 사용자를
+프로세스 풀에서 한 번에 돌린다 (API 워커의 이벤트 루프를 막지 않도록).
+
+기관 제약(ORG_SYNC_WINDOWS): 기업은행(0003)은 00~03시에 최근 6개월만 조회 가능 →
+그 시간대에는 증분 조회가 6개월 이내인 연결만 처리하고 나머지는 뒤 배치로 미룬다.
+
+여러 워커가 같은 스케줄을 돌려도 pg_try_advisory_lock 으로 한 워커만 배치를 실행한다.
+"""
+
+import asyncio
+import logging
+import math
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.db import async_session, engine
+from app.models.bank_connection import BankConnection
+from app.services.codef import codef_client
+from app.services.codef_errors import CodefCredentialError
+from app.services.transaction_store import (
+    plan_since,
+    requested_start,
+    stored_identifiers,
+    sync_connection,
+)
+
+logger = logging.getLogger(__name__)
+
+SYNC_LOCK_KEY = zlib.crc32(b"codef-nightly-sync")
+
+
+@dataclass(frozen=True)
+class OrgSyncWindow:
+    """Hours [start_hour, end_hour) during which only `max_days` can be queried."""
+
+    start_hour: int
+    end_hour: int
+    max_days: int
+
+
+# 기관별 시간대 제약 (BANK_FIELD_CONFIG notes 참고)
+ORG_SYNC_WINDOWS: dict[str, OrgSyncWindow] = {
+    "0003": OrgSyncWindow(start_hour=0, end_hour=3, max_days=180),  # 기업은행
+}
+
+
+def allowed_now(conn: BankConnection, now: datetime) -> bool:
+    """False if the organization's window forbids this connection's sync now."""
+    window = ORG_SYNC_WINDOWS.get(conn.organization_code or "")
+    if window is None or not (window.start_hour <= now.hour < window.end_hour):
+        return True
+    since = plan_since(conn, settings.CODEF_SYNC_MONTHS_BACK)
+    start = since or requested_start(settings.CODEF_SYNC_MONTHS_BACK)
+    return (now.date() - start).days <= window.max_days
+
+
+def _remaining_batches(now: datetime) -> int:
+    """Scheduled batches left tonight, including the current one."""
+    end = now.replace(
+        hour=settings.CODEF_SYNC_END_HOUR, minute=0, second=0, microsecond=0
+    )
+    if end <= now:
+        return 1
+    minutes = (end - now).total_seconds() / 60
+    return max(1, math.ceil(minutes / settings.CODEF_SYNC_INTERVAL_MINUTES))
+
+
+class CodefSyncScheduler:
+    def __init__(self) -> None:
+        self._night: date | None = None
+        self._attempted: set[int] = set()
+
+    def _reset_if_new_night(self, now: datetime) -> None:
+        if self._night != now.date():
+            self._night = now.date()
+            self._attempted.clear()
+
+    async def _due_connections(self, now: datetime) -> list[BankConnection]:
+        night_start = now.replace(
+            hour=settings.CODEF_SYNC_START_HOUR, minute=0, second=0, microsecond=0
+        )
+        async with async_session() as db:
+            result = await db.execute(
+                select(BankConnection)
+                .where(
+                    BankConnection.provider == "codef",
+                    BankConnection.status == "connected",
+                    BankConnection.connected_id.isnot(None),
+                    (BankConnection.last_synced_at.is_(None))
+                    | (BankConnection.last_synced_at < night_start),
+                )
+                .order_by(
+                    BankConnection.last_synced_at.asc().nulls_first(),
+                    BankConnection.id,
+                )
+            )
+            return [
+                conn
+                for conn in result.scalars().all()
+                if conn.id not in self._attempted
+            ]
+
+    async def run_batch(self, now: datetime | None = None) -> int:
+        """Sync this batch's share of tonight's due connections; returns count."""
+        if not codef_client.is_configured:
+            return 0
+        now = now or datetime.now()
+        self._reset_if_new_night(now)
+
+        async with engine.connect() as lock_conn:
+            locked = await lock_conn.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SYNC_LOCK_KEY}
+            )
+            if not locked:
+                logger.info("Codef nightly sync: another worker holds the batch lock")
+                return 0
+            try:
+                return await self._run_locked(now)
+            finally:
+                await lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": SYNC_LOCK_KEY}
+                )
+
+    async def _run_locked(self, now: datetime) -> int:
+        due = await self._due_connections(now)
+        ready = [conn for conn in due if allowed_now(conn, now)]
+        if not ready:
+            return 0
+
+        batch_size = min(
+            settings.CODEF_SYNC_MAX_BATCH,
+            math.ceil(len(due) / _remaining_batches(now)),
+        )
+        batch = ready[:batch_size]
+        self._attempted.update(conn.id for conn in batch)
+
+        sem = asyncio.Semaphore(settings.CODEF_SYNC_CONCURRENCY)
+
+        async def run(conn_id: int) -> bool:
+            async with sem:
+                return await sync_one(conn_id)
+
+        started = datetime.now()
+        outcomes = await asyncio.gather(*(run(conn.id) for conn in batch))
+        logger.info(
+            f"Codef nightly sync batch: {sum(outcomes)}/{len(batch)} ok, "
+            f"{len(due) - len(batch)} due later, "
+            f"{(datetime.now() - started).total_seconds():.1f}s"
+        )
+        return len(batch)
+
+
+async def sync_one(conn_id: int) -> bool:
+    """Sync one connection in its own session and record its status."""
+    async with async_session() as db:
+        conn = await db.get(BankConnection, conn_id)
+        if conn is None or conn.status != "connected":
+            return False
+        try:
+            identifiers = await stored_identifiers(db, conn)
+            synced = await sync_connection(
+                db, conn, identifiers, settings.CODEF_SYNC_MONTHS_BACK
+            )
+            await db.commit()
+            return not synced.failures
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Codef nightly sync failed for conn={conn_id}: {e}")
+            conn = await db.get(BankConnection, conn_id)
+            if conn is None:
+                return False
+            if isinstance(e, CodefCredentialError):
+                # 비밀번호 변경/잠김 → 사용자가 재등록할 때까지 재시도하지 않는다
+                conn.status = "error"
+            conn.last_error = str(e)[:1000]
+            await db.commit()
+            return False
+
+
+codef_sync_scheduler = CodefSyncScheduler()
+
+
+async def run_codef_sync() -> None:
+    await codef_sync_scheduler.run_batch()
@@ -0,0 +1,149 @@
+"""
+Codef OAuth token provider.
+
+- 프로세스 내: asyncio.Lock 으로 single-flight (동시에 만료를 본 요청들은 한 번의 갱신을 기다린다)
+- 워커 간: codef_tokens 테이블 + pg_advisory_xact_lock 으로 하나의 워커만 토큰 발급,
+  나머지 워커/재시작된 프로세스는 저장된 토큰을 재사용
+- 401: invalidate(stale_token) — 이미 다른 호출자가 갱신했다면 새 토큰을 그대로 돌려준다
+- 공유 저장소 장애: 짧게 backoff 하며 STORE_ATTEMPTS 회 다시 시도하고, 그래도 안 되면
+  프로세스 내 락을 잡은 채로 로컬 발급 (워커마다 최대 한 번)
+"""
+
+import asyncio
+import logging
+import zlib
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import async_session
+from app.models.codef_token import CodefToken
+
+logger = logging.getLogger(__name__)
+
+# 만료 직전 토큰을 쓰지 않도록 여유를 둔다 (Codef 토큰 수명: 7일)
+TOKEN_REFRESH_MARGIN = timedelta(hours=1)
+
+# 공유 저장소(DB) 일시 장애 시 재시도 횟수와 첫 대기 시간 (매번 2배)
+STORE_ATTEMPTS = 3
+STORE_RETRY_DELAY = 0.2
+
+# fetch() -> (access_token, expires_in seconds)
+TokenFetcher = Callable[[], Awaitable[tuple[str, int]]]
+
+
+class CodefTokenProvider:
+    """Single-flight token cache backed by a shared Postgres row."""
+
+    def __init__(self, client_key: str, fetch: TokenFetcher):
+        self.client_key = client_key
+        self._fetch = fetch
+        self._lock = asyncio.Lock()
+        self._token: str | None = None
+        self._expires_at: datetime | None = None
+        # advisory lock 은 bigint 키를 받는다
+        self._lock_key = zlib.crc32(f"codef-token:{client_key}".encode())
+
+    @staticmethod
+    def _usable(
+        token: str | None, expires_at: datetime | None, reject: str | None
+    ) -> bool:
+        return bool(
+            token
+            and expires_at
+            and datetime.now() < expires_at
+            and token != reject
+        )
+
+    async def get(self, reject: str | None = None) -> str:
+        """Return a valid token; `reject` skips a token known to be stale (401)."""
+        if self._usable(self._token, self._expires_at, reject):
+            assert self._token is not None
+            return self._token
+
+        async with self._lock:
+            # 락을 기다리는 동안 다른 호출자가 이미 갱신했을 수 있다
+            if self._usable(self._token, self._expires_at, reject):
+                assert self._token is not None
+                return self._token
+
+            token, expires_at = await self._load_or_refresh(reject)
+            self._token = token
+            self._expires_at = expires_at
+            return token
+
+    async def invalidate(self, stale_token: str) -> str:
+        """Coordinated refresh after a 401 — returns the replacement token."""
+        return await self.get(reject=stale_token)
+
+    async def _issue(self) -> tuple[str, datetime]:
+        token, expires_in = await self._fetch()
+        expires_at = (
+            datetime.now() + timedelta(seconds=expires_in) - TOKEN_REFRESH_MARGIN
+        )
+        return token, expires_at
+
+    async def _load_or_refresh(self, reject: str | None) -> tuple[str, datetime]:
+        """Shared path with retries; called with self._lock held."""
+        issued: list[tuple[str, datetime]] = []
+        delay = STORE_RETRY_DELAY
+        for attempt in range(1, STORE_ATTEMPTS + 1):
+            try:
+                return await self._load_or_refresh_shared(reject, issued)
+            except (SQLAlchemyError, OSError) as e:
+                if issued:
+                    # 발급은 됐고 저장만 실패 — 다시 발급하지 않는다
+                    logger.warning(f"Codef token issued but not shared: {e}")
+                    return issued[0]
+                if attempt == STORE_ATTEMPTS:
+                    logger.warning(
+                        f"Codef token store unavailable, issuing locally: {e}"
+                    )
+                    break
+                await asyncio.sleep(delay)
+                delay *= 2
+        return await self._issue()
+
+    async def _load_or_refresh_shared(
+        self, reject: str | None, issued: list[tuple[str, datetime]]
+    ) -> tuple[str, datetime]:
+        async with async_session() as session:
+            async with session.begin():
+                # 워커 간 직렬화: 트랜잭션 종료 시 자동 해제
+                await session.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": self._lock_key},
+                )
+                row = (
+                    await session.execute(
+                        select(CodefToken).where(
+                            CodefToken.client_key == self.client_key
+                        )
+                    )
+                ).scalar_one_or_none()
+                if row and self._usable(row.access_token, row.expires_at, reject):
+                    return row.access_token, row.expires_at
+
+                token, expires_at = await self._issue()
+                issued.append((token, expires_at))
+                stmt = pg_insert(CodefToken).values(
+                    client_key=self.client_key,
+                    access_token=token,
+                    expires_at=expires_at,
+                    updated_at=datetime.now(),
+                )
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[CodefToken.client_key],
+                        set_={
+                            "access_token": stmt.excluded.access_token,
+                            "expires_at": stmt.excluded.expires_at,
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    )
+                )
+                logger.info("Codef access token issued and shared")
+                return token, expires_at
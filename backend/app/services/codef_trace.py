@@ -0,0 +1,146 @@
+"""
+Structured, low-overhead tracing for Codef API calls.
+
+요청/응답 본문 전체를 INFO 로그로 남기는 대신, 호출마다 작은 레코드
+(endpoint, organization, 소요 시간, payload 크기, 결과 코드, 재시도 수)를
+메모리 ring buffer 에 쌓고 /admin/codef/* 에서 백분위 지연을 조회한다.
+
+본문 캡처는 CODEF_TRACE_BODY_SAMPLE_RATE (기본 0 = 끔) 비율로만, 민감 필드를 가린 뒤 저장한다.
+"""
+
+import logging
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDACT_KEYS = frozenset(
+    {
+        "id",
+        "password",
+        "cardPassword",
+        "accountPass",
+        "identity",
+        "birthDate",
+        "cardNo",
+        "account",
+        "connectedId",
+        "resCardNo",
+        "resAccount",
+        "resAccountNo",
+        "userName",
+        "resUserNm",
+        "resUserName",
+        "resAccountHolder",
+        "resAccountNickName",
+    }
+)
+# 기관/상품마다 이름이 다른 예금주·명의자 필드 (resAccountHolderNm, resCardOwner, ...)
+REDACT_PATTERN = re.compile(r"holder|owner|depositor|user_?(name|nm)", re.IGNORECASE)
+REDACTED = "***"
+
+
+@lru_cache(maxsize=1024)
+def _sensitive(key: str) -> bool:
+    return key in REDACT_KEYS or REDACT_PATTERN.search(key) is not None
+
+
+def redact(value):
+    """Copy of a JSON-like value with sensitive keys masked."""
+    if isinstance(value, dict):
+        return {
+            k: (REDACTED if v and _sensitive(k) else redact(v))
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+@dataclass(slots=True)
+class CodefCall:
+    endpoint: str
+    organization: str
+    started_at: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    status_code: int = 0
+    result_code: str = ""
+    retries: int = 0
+    error: str = ""
+    request_body: dict | None = None
+    response_body: dict | None = None
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class CodefTracer:
+    """Ring buffer of recent Codef calls with per-endpoint latency stats."""
+
+    def __init__(self, capacity: int) -> None:
+        self._calls: deque[CodefCall] = deque(maxlen=capacity)
+
+    def should_capture(self) -> bool:
+        rate = settings.CODEF_TRACE_BODY_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def record(self, call: CodefCall) -> None:
+        self._calls.append(call)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "codef_call",
+                extra={
+                    "codef_endpoint": call.endpoint,
+                    "codef_organization": call.organization,
+                    "codef_duration_ms": round(call.duration_ms, 1),
+                    "codef_request_bytes": call.request_bytes,
+                    "codef_response_bytes": call.response_bytes,
+                    "codef_status_code": call.status_code,
+                    "codef_result_code": call.result_code,
+                    "codef_retries": call.retries,
+                },
+            )
+
+    def recent(self, limit: int = 50) -> list[CodefCall]:
+        return list(self._calls)[-limit:][::-1]
+
+    def latency_stats(self) -> list[dict]:
+        grouped: dict[tuple[str, str], list[CodefCall]] = {}
+        for call in self._calls:
+            grouped.setdefault((call.endpoint, call.organization), []).append(call)
+
+        stats = []
+        for (endpoint, organization), calls in grouped.items():
+            durations = sorted(c.duration_ms for c in calls)
+            stats.append(
+                {
+                    "endpoint": endpoint,
+                    "organization": organization,
+                    "count": len(calls),
+                    "error_count": sum(1 for c in calls if c.error),
+                    "retry_count": sum(c.retries for c in calls),
+                    "p50_ms": round(_percentile(durations, 50), 1),
+                    "p90_ms": round(_percentile(durations, 90), 1),
+                    "p99_ms": round(_percentile(durations, 99), 1),
+                    "max_ms": round(durations[-1], 1),
+                    "avg_response_bytes": sum(c.response_bytes for c in calls)
+                    // len(calls),
+                }
+            )
+        stats.sort(key=lambda s: s["p90_ms"], reverse=True)
+        return stats
+
+
+codef_tracer = CodefTracer(settings.CODEF_TRACE_CAPACITY)
@@ -0,0 +1,305 @@
+"""
+Pluggable httpx transports for the Codef client (record / replay).
+
+CODEF_TRANSPORT 설정으로 Codef 풀 클라이언트의 transport 를 바꾼다.
+- "" (기본): 실제 네트워크
+- "record": 실제 호출을 그대로 보내고, 요청/응답을 민감 필드 마스킹 후 CODEF_FIXTURE_DIR 에 저장
+- "replay": 네트워크 없이 저장된 fixture 로 응답. 녹화본이 없으면 번들 fixture
+  ({size}/{endpoint}.json.gz, codef_fixtures.export), 그것도 없으면 합성 응답
+  (CODEF_FIXTURE_SIZE). CODEF_REPLAY_LATENCY_MS / CODEF_REPLAY_ERROR_RATE 로
+  지연과 장애(HTTP 503, CF-09999, 타임아웃)를 주입한다
+
+Fixture 파일: {endpoint}-{요청 hash}.json = {"path", "request", "status_code", "response"}
+요청 hash 는 마스킹된 요청 본문 기준이므로 connectedId/계좌가 달라도 같은 파일을 쓴다.
+조회 기간(startDate/endDate)은 오늘 날짜에 따라 바뀌므로 hash 에는 기간 길이(일)만 넣고,
+replay 때 응답의 거래일을 녹화 당시 기간에서 요청 기간으로 옮긴다 (DATED_LISTS).
+번들 fixture 는 12개월 전체를 담고 있어 마지막 날을 오늘로 옮긴 뒤 요청 기간만 잘라 쓴다.
+fixture 가 없으면 경고를 남기고 합성 응답을 쓴다.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import random
+import urllib.parse
+from datetime import date, datetime
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from app.services.codef_fixtures import synthetic_response
+from app.services.codef_trace import redact
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+TOKEN_PATH = "/oauth/token"
+REPLAY_TOKEN = "replay-access-token"
+
+PERIOD_FIELDS = ("startDate", "endDate")
+# endpoint -> (응답 data 안의 거래 목록 키, 거래일 필드)
+DATED_LISTS: dict[str, tuple[str, str]] = {
+    "/v1/kr/card/p/account/approval-list": ("resList", "resUsedDate"),
+    "/v1/kr/bank/p/account/transaction-list": ("resTrHistoryList", "resAccountTrDate"),
+}
+
+
+def _decode_request(request: httpx.Request) -> dict:
+    try:
+        return json.loads(urllib.parse.unquote(request.content.decode("ascii")))
+    except (UnicodeDecodeError, ValueError):
+        return {}
+
+
+def _encode_response(body: dict) -> bytes:
+    # 실제 Codef 와 같이 URL 인코딩된 JSON 으로 응답 (디코딩 경로까지 재현)
+    return urllib.parse.quote(json.dumps(body, ensure_ascii=False)).encode("ascii")
+
+
+def _day(value) -> date | None:
+    try:
+        return datetime.strptime(value, "%Y%m%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _period(body: dict) -> tuple[date, date] | None:
+    start, end = _day(body.get("startDate")), _day(body.get("endDate"))
+    return (start, end) if start and end else None
+
+
+def fixture_name(path: str, request_body: dict) -> str:
+    """{endpoint}-{hash of the redacted body, with the period as its length}.json"""
+    key = redact(request_body)
+    period = _period(request_body)
+    if period:
+        key = {k: v for k, v in key.items() if k not in PERIOD_FIELDS}
+        key["periodDays"] = (period[1] - period[0]).days
+    canonical = json.dumps(key, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+    return f"{path.strip('/').replace('/', '_')}-{digest}.json"
+
+
+def bundled_name(path: str, size: str) -> str:
+    """Size-keyed fixture shipped in CODEF_FIXTURE_DIR (see codef_fixtures.export)."""
+    return f"{size}/{path.strip('/').replace('/', '_')}.json.gz"
+
+
+def read_fixture(target: Path) -> dict:
+    content = target.read_bytes()
+    if target.suffix == ".gz":
+        content = gzip.decompress(content)
+    return json.loads(content)
+
+
+def write_fixture(
+    target: Path, path: str, request: dict, status_code: int, response: dict
+) -> None:
+    """Write a {"path", "request", "status_code", "response"} envelope."""
+    envelope = {
+        "path": path,
+        "request": request,
+        "status_code": status_code,
+        "response": response,
+    }
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.suffix == ".gz":
+        content = json.dumps(envelope, ensure_ascii=False).encode("utf-8")
+        target.write_bytes(gzip.compress(content, mtime=0))
+    else:
+        target.write_text(
+            json.dumps(envelope, ensure_ascii=False, indent=1), encoding="utf-8"
+        )
+
+
+def rebase(
+    path: str,
+    response: dict,
+    recorded: dict,
+    requested: dict,
+    end: date | None = None,
+) -> dict:
+    """Move a recorded dated list onto the requested period (drop what falls out).
+
+    end: where the recorded end date lands (default: the requested end date).
+    """
+    spec = DATED_LISTS.get(path)
+    recorded_period, period = _period(recorded), _period(requested)
+    data = response.get("data")
+    if not spec or not recorded_period or not period or not isinstance(data, dict):
+        return response
+    list_key, date_field = spec
+    items = data.get(list_key)
+    if not isinstance(items, list):
+        return response
+
+    shift = (end or period[1]) - recorded_period[1]
+    moved = []
+    for item in items:
+        day = _day(item.get(date_field))
+        if day is None:
+            continue
+        day += shift
+        if period[0] <= day <= period[1]:
+            moved.append({**item, date_field: day.strftime("%Y%m%d")})
+    return {**response, "data": {**data, list_key: moved}}
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward to the network and save redacted request/response pairs."""
+
+    def __init__(self, directory: Path, inner: httpx.AsyncBaseTransport | None = None):
+        self.directory = directory
+        self.inner = inner or httpx.AsyncHTTPTransport(http2=settings.HTTP_HTTP2)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        if request.url.path == TOKEN_PATH:
+            return response
+
+        content = await response.aread()
+        await response.aclose()
+        try:
+            self._save(request, response.status_code, content)
+        except OSError as e:
+            logger.warning(f"Codef fixture save failed: {e}")
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            extensions=response.extensions,
+        )
+
+    def _save(self, request: httpx.Request, status_code: int, content: bytes) -> None:
+        from app.services.codef import decode_codef_body
+
+        try:
+            body = decode_codef_body(content)
+        except ValueError:
+            return
+        request_body = _decode_request(request)
+        path = request.url.path
+        write_fixture(
+            self.directory / fixture_name(path, request_body),
+            path,
+            redact(request_body),
+            status_code,
+            redact(body),
+        )
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answer from recorded fixtures (else synthetic data) with injected faults."""
+
+    def __init__(
+        self,
+        directory: Path,
+        size: str = "medium",
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.directory = directory
+        self.size = size
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._missed: set[str] = set()  # 경고는 fixture 별로 한 번만
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == TOKEN_PATH:
+            return httpx.Response(
+                200,
+                json={"access_token": REPLAY_TOKEN, "expires_in": 604799},
+                request=request,
+            )
+
+        if self.latency_ms > 0:
+            # ±50% 범위로 흔들어 동시 요청이 한꺼번에 끝나지 않게
+            await asyncio.sleep(self.latency_ms * self._rng.uniform(0.5, 1.5) / 1000)
+
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            return self._fault(request)
+
+        request_body = _decode_request(request)
+        recorded = self._load(path, request_body)
+        if recorded is not None:
+            status_code, body = recorded
+        else:
+            body = synthetic_response(path, request_body, self.size, self.seed)
+            status_code = 200
+            if body is None:
+                status_code, body = 404, {"error": f"no fixture for {path}"}
+        return httpx.Response(
+            status_code, content=_encode_response(body), request=request
+        )
+
+    def _load(self, path: str, request_body: dict) -> tuple[int, dict] | None:
+        name = fixture_name(path, request_body)
+        target = self.directory / name
+        end = None
+        if not target.exists():
+            target = self.directory / bundled_name(path, self.size)
+            end = date.today()
+        if not target.exists():
+            if name not in self._missed:
+                self._missed.add(name)
+                logger.warning(
+                    f"Codef replay: no fixture {name} for {path}, "
+                    f"using synthetic data (size={self.size})"
+                )
+            return None
+        fixture = read_fixture(target)
+        response = rebase(
+            path, fixture["response"], fixture["request"], request_body, end
+        )
+        return fixture.get("status_code", 200), response
+
+    def _fault(self, request: httpx.Request) -> httpx.Response:
+        kind = self._rng.choice(("http_503", "cf_timeout", "read_timeout"))
+        if kind == "read_timeout":
+            raise httpx.ReadTimeout("injected timeout", request=request)
+        if kind == "http_503":
+            return httpx.Response(503, content=b"Service Unavailable", request=request)
+        body = {
+            "result": {
+                "code": "CF-09999",
+                "message": "기관 응답 시간 초과 (injected)",
+                "extraMessage": "",
+            },
+            "data": {},
+        }
+        return httpx.Response(200, content=_encode_response(body), request=request)
+
+
+def build_transport() -> httpx.AsyncBaseTransport | None:
+    """Transport for the Codef pooled client from settings (None = network)."""
+    mode = settings.CODEF_TRANSPORT
+    directory = Path(settings.CODEF_FIXTURE_DIR)
+    if mode == RECORD:
+        logger.info(f"Codef transport: recording to {directory}")
+        return RecordingTransport(directory)
+    if mode == REPLAY:
+        logger.info(
+            f"Codef transport: replay from {directory} "
+            f"(size={settings.CODEF_FIXTURE_SIZE}, "
+            f"latency={settings.CODEF_REPLAY_LATENCY_MS}ms, "
+            f"error_rate={settings.CODEF_REPLAY_ERROR_RATE})"
+        )
+        return ReplayTransport(
+            directory,
+            size=settings.CODEF_FIXTURE_SIZE,
+            latency_ms=settings.CODEF_REPLAY_LATENCY_MS,
+            error_rate=settings.CODEF_REPLAY_ERROR_RATE,
+            seed=settings.CODEF_REPLAY_SEED,
+        )
+    if mode:
+        raise ValueError(f"Unknown CODEF_TRANSPORT: {mode}")
+    return None
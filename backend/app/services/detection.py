@@ -0,0 +1,206 @@
+"""
+Recurring-payment (subscription) detection engine.
+
+한 번의 정렬(가맹점 키, 일자)로 거래를 묶은 뒤 묶음별로 컬럼 배열(정수 일자, 정수 금액)을
+스캔한다. 전체 비용은 정렬이 지배하므로 O(n log n).
+입력은 TxRecord (일자 ordinal, 정수 금액) 이므로 여기서 문자열을 다시 파싱하지 않는다.
+
+- 가맹점 키: merchant_index 로 서비스 단위 canonical key ("NETFLIX.COM" = "넷플릭스")
+- 주기: weekly / monthly / quarterly / yearly — 중앙값 간격 + 허용 오차 밴드
+- 결제 누락: 간격이 주기의 k배(±k·tol)면 k회 주기로 인정
+- 가격 변경: 금액이 허용 오차를 벗어나면 새 구간(change point)으로 나누고, 최신 구간 금액을 현재 금액으로 사용
+- 신뢰도: 간격 적합도 × 관측 수 × 금액 일관성 (0~1)
+"""
+
+from array import array
+from collections.abc import Iterable
+from datetime import date
+from statistics import median
+
+from app.services.merchant_index import merchant_index
+from app.services.tx_record import TxRecord
+
+# (billing_cycle, period days, tolerance days)
+CYCLES: tuple[tuple[str, float, float], ...] = (
+    ("weekly", 7.0, 2.0),
+    ("monthly", 30.44, 5.0),
+    ("quarterly", 91.31, 12.0),
+    ("yearly", 365.25, 20.0),
+)
+
+AMOUNT_TOLERANCE = 0.1  # 같은 가격 구간으로 볼 상대 오차
+MIN_INTERVAL_FIT = 0.5  # 주기에 맞는 간격 비율 하한
+MIN_CONFIDENCE = 0.3
+
+
+def merchant_key(merchant: str) -> str:
+    return merchant_index.canonical_key(merchant)
+
+
+def is_charge(tx: TxRecord) -> bool:
+    return tx.status != "입금" and "취소" not in tx.status
+
+
+def _segments(amounts: list[int]) -> list[tuple[int, int]]:
+    """Split a date-ordered amount series at price change points."""
+    segments: list[tuple[int, int]] = []
+    start = 0
+    ref = amounts[0]
+    for i in range(1, len(amounts)):
+        if abs(amounts[i] - ref) > ref * AMOUNT_TOLERANCE:
+            segments.append((start, i))
+            start = i
+            ref = amounts[i]
+    segments.append((start, len(amounts)))
+    return segments
+
+
+def _fit_cycle(intervals: list[int]) -> tuple[str, float] | None:
+    """Best billing cycle for the intervals and the share that fits it."""
+    mid = median(intervals)
+    best: tuple[str, float] | None = None
+    for name, period, tol in CYCLES:
+        if abs(mid - period) > tol:
+            continue
+        fit = 0
+        for gap in intervals:
+            k = max(1, round(gap / period))
+            if abs(gap - k * period) <= tol * k:
+                fit += 1
+        score = fit / len(intervals)
+        if best is None or score > best[1]:
+            best = (name, score)
+    return best
+
+
+def _analyze(
+    days: array, amounts: array, lo: int, hi: int
+) -> dict | None:
+    """Analyze one merchant's series [lo, hi) already sorted by day."""
+    series_amounts = list(amounts[lo:hi])
+    segments = _segments(series_amounts)
+
+    # 1회성 이상치 구간은 버리고, 최신 구간은 (가격 변경 직후일 수 있으므로) 유지
+    last = len(segments) - 1
+    kept = [
+        (s, e)
+        for idx, (s, e) in enumerate(segments)
+        if e - s >= 2 or (idx == last and idx > 0)
+    ]
+    if not kept or sum(e - s for s, e in kept) < 2:
+        return None
+
+    kept_days: list[int] = []
+    for s, e in kept:
+        for i in range(lo + s, lo + e):
+            if not kept_days or days[i] != kept_days[-1]:
+                kept_days.append(days[i])
+    if len(kept_days) < 2:
+        return None
+
+    intervals = [kept_days[i + 1] - kept_days[i] for i in range(len(kept_days) - 1)]
+    fitted = _fit_cycle(intervals)
+    if fitted is None or fitted[1] < MIN_INTERVAL_FIT:
+        return None
+    cycle, interval_fit = fitted
+
+    current_start, current_end = kept[-1]
+    current = series_amounts[current_start:current_end]
+    amount = int(median(current))
+    previous_amount = None
+    if len(kept) > 1:
+        prev_start, prev_end = kept[-2]
+        previous = int(median(series_amounts[prev_start:prev_end]))
+        # 이상치 구간을 버리면 떨어져 있던 같은 가격 구간이 이웃할 수 있다
+        if abs(amount - previous) > previous * AMOUNT_TOLERANCE:
+            previous_amount = previous
+
+    support = 1 - 1 / (1 + len(intervals))
+    amount_fit = sum(e - s for s, e in kept) / len(series_amounts)
+    confidence = interval_fit * (0.5 + 0.5 * support) * (0.7 + 0.3 * amount_fit)
+    if confidence < MIN_CONFIDENCE:
+        return None
+
+    return {
+        "cycle": cycle,
+        "amount": amount,
+        "previous_amount": previous_amount,
+        "last_day": kept_days[-1],
+        "occurrences": sum(e - s for s, e in kept),
+        "confidence": round(confidence, 2),
+    }
+
+
+def detect_recurring(transactions: Iterable[TxRecord]) -> list[dict]:
+    """Detect recurring payments; returns DetectedSubscription-shaped dicts."""
+    txs: list[TxRecord] = []
+    keys: list[str] = []
+    days = array("i")
+    amounts = array("q")
+    key_cache: dict[str, str] = {}
+    for tx in transactions:
+        merchant = tx.merchant.strip()
+        if not merchant or tx.day <= 0 or tx.amount <= 0 or not is_charge(tx):
+            continue
+        key = key_cache.get(merchant)
+        if key is None:
+            key = key_cache[merchant] = merchant_key(merchant)
+        txs.append(tx)
+        keys.append(key)
+        days.append(tx.day)
+        amounts.append(tx.amount)
+
+    order = sorted(range(len(txs)), key=lambda i: (keys[i], days[i]))
+    keys = [keys[i] for i in order]
+    days = array("i", (days[i] for i in order))
+    amounts = array("q", (amounts[i] for i in order))
+    txs = [txs[i] for i in order]
+
+    subscriptions: list[dict] = []
+    lo = 0
+    n = len(keys)
+    while lo < n:
+        hi = lo + 1
+        while hi < n and keys[hi] == keys[lo]:
+            hi += 1
+        if hi - lo >= 2:
+            found = _analyze(days, amounts, lo, hi)
+            if found:
+                latest = txs[hi - 1]
+                last_date = date.fromordinal(found["last_day"])
+                merchant = latest.merchant.strip()
+                match = merchant_index.lookup(merchant)
+                subscriptions.append(
+                    {
+                        "name": match.name if match else merchant,
+                        "merchant_key": keys[lo],
+                        "amount": found["amount"],
+                        "billing_cycle": found["cycle"],
+                        "billing_day": last_date.day,
+                        "occurrence_count": found["occurrences"],
+                        "last_payment_date": last_date.strftime("%Y-%m-%d"),
+                        "card_no": latest.card_no,
+                        "category": latest.category,
+                        "confidence": found["confidence"],
+                        "previous_amount": found["previous_amount"],
+                    }
+                )
+        lo = hi
+
+    subscriptions.sort(key=lambda x: x["amount"], reverse=True)
+    return subscriptions
+
+
+def detect_shard(
+    shard: list[tuple[int, list[tuple]]],
+) -> list[tuple[int, list[dict]]]:
+    """Process-pool entry: [(id, TxRecord.fields() tuples)] -> [(id, results)].
+
+    id 는 호출자가 정한다 (연결 id 또는 사용자 id — 여러 연결을 합친 이력).
+
+    워커로는 레코드 대신 튜플을 보낸다 (pickle 이 가볍고, intern 된 문자열은 한 번만 직렬화).
+    """
+    return [
+        (conn_id, detect_recurring(TxRecord(*row) for row in rows))
+        for conn_id, rows in shard
+    ]
@@ -0,0 +1,91 @@
+"""
+Shared outbound HTTP clients.
+
+업스트림(Codef, logo.dev, Discord)마다 long-lived httpx.AsyncClient 하나를 두고
+커넥션 풀(keep-alive, HTTP/2)을 재사용한다. 호출마다 AsyncClient를 새로 만들면
+매번 TCP+TLS 핸드셰이크가 발생하기 때문.
+
+Lifecycle:
+- app/main.py lifespan 에서 http_clients.start() / await http_clients.aclose()
+- lifespan 밖(스크립트 등)에서 get() 하면 lazy 하게 생성된다
+- CODEF_TRANSPORT=record|replay 면 Codef 클라이언트는 codef_transport 를 사용
+"""
+
+import logging
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CODEF = "codef"
+LOGO = "logo"
+DISCORD = "discord"
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    timeouts: dict[str, float] = {
+        CODEF: settings.HTTP_CODEF_TIMEOUT,
+        LOGO: settings.HTTP_LOGO_TIMEOUT,
+        DISCORD: settings.HTTP_DISCORD_TIMEOUT,
+    }
+    max_connections: dict[str, int] = {
+        CODEF: settings.HTTP_CODEF_MAX_CONNECTIONS,
+        LOGO: settings.HTTP_DEFAULT_MAX_CONNECTIONS,
+        DISCORD: settings.HTTP_DEFAULT_MAX_CONNECTIONS,
+    }
+    limit = max_connections.get(name, settings.HTTP_DEFAULT_MAX_CONNECTIONS)
+    transport = None
+    if name == CODEF and settings.CODEF_TRANSPORT:
+        # codef_transport → codef → http_client 순환 import 를 피하려고 여기서 import
+        from app.services.codef_transport import build_transport
+
+        transport = build_transport()
+    return httpx.AsyncClient(
+        transport=transport,
+        http2=settings.HTTP_HTTP2,
+        timeout=httpx.Timeout(
+            timeouts.get(name, settings.HTTP_LOGO_TIMEOUT),
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=limit,
+            max_keepalive_connections=min(limit, settings.HTTP_MAX_KEEPALIVE),
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+class HttpClients:
+    """Registry of per-upstream pooled clients."""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def start(self) -> None:
+        for name in (CODEF, LOGO, DISCORD):
+            self.get(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = _build_client(name)
+            self._clients[name] = client
+        return client
+
+    async def aclose(self) -> None:
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP client close failed ({name}): {e}")
+        self._clients.clear()
+
+
+http_clients = HttpClients()
+
+
+def get_logo_http() -> httpx.AsyncClient:
+    """FastAPI dependency for the logo.dev client."""
+    return http_clients.get(LOGO)
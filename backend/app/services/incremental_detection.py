@@ -0,0 +1,303 @@
+"""
+Incremental (online) recurring-payment detection.
+
+detection.detect_recurring 은 매번 전체 이력을 다시 본다. 여기서는 (사용자, 가맹점 canonical key)
+마다 MerchantState 에 작은 상태를 두고, 동기화로 새로 저장된 거래만 O(1) 로 반영한다.
+- 간격: 결제 간격의 Welford 평균/분산 (누락 결제는 주기 배수로 나눠 반영)
+- 금액: 현재 가격 구간의 Welford 평균/분산 — 구간을 벗어나면 가격 변경
+- 주기: 간격 평균이 CYCLES 밴드에 들어오고 MIN_OCCURRENCES 회 이상이면 반복 결제로 확정
+
+상태가 바뀌면 detection_events 에 이벤트를 남기고 후보(subscription_candidates)를 갱신한다.
+- new_series: 반복 결제로 처음 확정
+- missed_payment: 주기 k배 간격으로 다음 결제가 왔거나, 주기 + 허용 오차가 지나도록 결제가 없음
+- price_change: 확정된 반복 결제의 금액이 허용 오차를 벗어남
+
+이미 반영한 날짜보다 과거인 거래(순서 역전)는 상태에 반영하지 않는다 — 전체 재계산은
+batch_detection 이 맡는다. 최초 동기화처럼 과거 이력이 한꺼번에 들어오면 상태만 쌓고,
+EVENT_HORIZON_DAYS 이전의 일은 이벤트로 남기지 않는다.
+"""
+
+import math
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.detection_event import DetectionEvent
+from app.models.merchant_state import MerchantState
+from app.services.candidate_store import upsert_candidates
+from app.services.detection import (
+    AMOUNT_TOLERANCE,
+    CYCLES,
+    MIN_CONFIDENCE,
+    is_charge,
+    merchant_key,
+)
+from app.services.merchant_index import merchant_index
+from app.services.tx_record import TxRecord
+
+NEW_SERIES = "new_series"
+MISSED_PAYMENT = "missed_payment"
+PRICE_CHANGE = "price_change"
+
+MIN_OCCURRENCES = 3
+EVENT_HORIZON_DAYS = 45
+
+# pg_advisory_xact_lock(namespace, user_id) — 같은 사용자의 연결이 동시에 동기화될 때 직렬화
+LOCK_NAMESPACE = 0x5D7C
+
+_CYCLE_BY_NAME = {name: (period, tol) for name, period, tol in CYCLES}
+
+
+def _fit_cycle(mean: float) -> str | None:
+    for name, period, tol in CYCLES:
+        if abs(mean - period) <= tol:
+            return name
+    return None
+
+
+def _welford(count: int, mean: float, m2: float, x: float) -> tuple[int, float, float]:
+    count += 1
+    delta = x - mean
+    mean += delta / count
+    return count, mean, m2 + delta * (x - mean)
+
+
+def _confidence(state: MerchantState, tol: float) -> float:
+    spread = (
+        math.sqrt(state.interval_m2 / state.interval_count)
+        if state.interval_count > 1
+        else 0.0
+    )
+    interval_fit = max(0.0, 1 - spread / tol)
+    support = 1 - 1 / (1 + state.interval_count)
+    amount_fit = min(1.0, state.amount_count / max(state.occurrences, 1))
+    confidence = interval_fit * (0.5 + 0.5 * support) * (0.7 + 0.3 * amount_fit)
+    return round(confidence, 2)
+
+
+def _new_state(
+    user_id: int, bank_connection_id: int, key: str, tx: TxRecord, day: date
+) -> MerchantState:
+    match = merchant_index.lookup(tx.merchant)
+    state = MerchantState(
+        user_id=user_id,
+        merchant_key=key,
+        name=(match.name if match else tx.merchant.strip())[:200],
+        bank_connection_id=bank_connection_id,
+    )
+    _restart(state, tx, day)
+    return state
+
+
+def _restart(state: MerchantState, tx: TxRecord, day: date) -> None:
+    """Start a new series at this payment (unconfirmed series whose price moved)."""
+    state.first_date = day
+    state.last_date = day
+    state.previous_date = None
+    state.occurrences = 1
+    state.interval_count, state.interval_mean, state.interval_m2 = 0, 0.0, 0.0
+    state.amount_count, state.amount_mean, state.amount_m2 = 1, tx.amount, 0.0
+    state.last_amount = tx.amount
+    state.previous_amount = None
+    state.billing_cycle = None
+    state.confidence = 0.0
+    state.overdue_notified = False
+    state.card_no = tx.card_no[:30]
+    state.category = tx.category[:100]
+
+
+def observe(
+    state: MerchantState, tx: TxRecord, day: date
+) -> list[tuple[str, int | None]]:
+    """Fold one newer payment into the state; returns (event kind, previous amount)."""
+    gap = (day - state.last_date).days
+    if gap <= 0:
+        # 같은 날 중복 결제 / 순서 역전
+        return []
+
+    events: list[tuple[str, int | None]] = []
+    confirmed = state.billing_cycle is not None
+    price_moved = (
+        abs(tx.amount - state.amount_mean) > state.amount_mean * AMOUNT_TOLERANCE
+    )
+    if price_moved and not confirmed:
+        _restart(state, tx, day)
+        return events
+
+    interval = float(gap)
+    if confirmed:
+        period, tol = _CYCLE_BY_NAME[state.billing_cycle]
+        k = max(1, round(gap / period))
+        if abs(gap - k * period) <= tol * k:
+            interval = gap / k
+            if k >= 2 and not state.overdue_notified:
+                events.append((MISSED_PAYMENT, None))
+    state.interval_count, state.interval_mean, state.interval_m2 = _welford(
+        state.interval_count, state.interval_mean, state.interval_m2, interval
+    )
+
+    if price_moved:
+        state.previous_amount = round(state.amount_mean)
+        state.amount_count, state.amount_mean, state.amount_m2 = 1, tx.amount, 0.0
+        events.append((PRICE_CHANGE, state.previous_amount))
+    else:
+        state.amount_count, state.amount_mean, state.amount_m2 = _welford(
+            state.amount_count, state.amount_mean, state.amount_m2, tx.amount
+        )
+
+    state.previous_date = state.last_date
+    state.last_date = day
+    state.occurrences += 1
+    state.last_amount = tx.amount
+    state.overdue_notified = False
+    state.card_no = tx.card_no[:30]
+    state.category = tx.category[:100]
+
+    cycle = _fit_cycle(state.interval_mean)
+    if cycle is None:
+        state.billing_cycle = None
+        state.confidence = 0.0
+        return events
+    state.confidence = _confidence(state, _CYCLE_BY_NAME[cycle][1])
+    if confirmed:
+        state.billing_cycle = cycle
+    elif state.occurrences >= MIN_OCCURRENCES and state.confidence >= MIN_CONFIDENCE:
+        state.billing_cycle = cycle
+        events.append((NEW_SERIES, None))
+    return events
+
+
+def is_overdue(state: MerchantState, today: date) -> bool:
+    if state.billing_cycle is None or state.overdue_notified:
+        return False
+    period, tol = _CYCLE_BY_NAME[state.billing_cycle]
+    return today > state.last_date + timedelta(days=math.ceil(period + tol))
+
+
+def _event_row(
+    state: MerchantState, kind: str, previous: int | None, on: date
+) -> dict:
+    return {
+        "user_id": state.user_id,
+        "merchant_key": state.merchant_key,
+        "name": state.name,
+        "kind": kind,
+        "billing_cycle": state.billing_cycle,
+        "amount": round(state.amount_mean),
+        "previous_amount": previous,
+        "occurred_on": on,
+    }
+
+
+def _candidate(state: MerchantState) -> dict:
+    return {
+        "name": state.name,
+        "merchant_key": state.merchant_key,
+        "amount": round(state.amount_mean),
+        "billing_cycle": state.billing_cycle,
+        "billing_day": state.last_date.day,
+        "occurrence_count": state.occurrences,
+        "last_payment_date": state.last_date.strftime("%Y-%m-%d"),
+        "card_no": state.card_no,
+        "category": state.category,
+        "confidence": state.confidence,
+        "previous_amount": state.previous_amount,
+    }
+
+
+async def observe_transactions(
+    db: AsyncSession,
+    user_id: int,
+    bank_connection_id: int,
+    transactions: list[TxRecord],
+    check_overdue: bool = True,
+) -> int:
+    """Apply newly stored transactions to the user's merchant states.
+
+    check_overdue: also flag this connection's overdue series (only when the
+    sync covered every card/account, otherwise a missing window looks like a miss).
+    Returns the number of events recorded.
+    """
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:ns, :user_id)"),
+        {"ns": LOCK_NAMESPACE, "user_id": user_id},
+    )
+
+    key_cache: dict[str, str] = {}
+    charges: list[tuple[str, TxRecord]] = []
+    for tx in transactions:
+        merchant = tx.merchant.strip()
+        if not merchant or tx.day <= 0 or tx.amount <= 0 or not is_charge(tx):
+            continue
+        key = key_cache.get(merchant)
+        if key is None:
+            key = key_cache[merchant] = merchant_key(merchant)
+        charges.append((key, tx))
+    charges.sort(key=lambda item: (item[1].day, item[1].time))
+
+    states: dict[str, MerchantState] = {}
+    keys = {key for key, _ in charges}
+    if keys:
+        result = await db.execute(
+            select(MerchantState).where(
+                MerchantState.user_id == user_id,
+                MerchantState.merchant_key.in_(keys),
+            )
+        )
+        states = {state.merchant_key: state for state in result.scalars().all()}
+
+    today = date.today()
+    horizon = today - timedelta(days=EVENT_HORIZON_DAYS)
+    events: list[dict] = []
+    touched: dict[str, MerchantState] = {}
+    for key, tx in charges:
+        day = date.fromordinal(tx.day)
+        state = states.get(key)
+        if state is None:
+            state = states[key] = _new_state(user_id, bank_connection_id, key, tx, day)
+            db.add(state)
+            continue
+        state.bank_connection_id = bank_connection_id
+        for kind, previous in observe(state, tx, day):
+            if day >= horizon:
+                events.append(_event_row(state, kind, previous, day))
+        touched[key] = state
+
+    if check_overdue:
+        result = await db.execute(
+            select(MerchantState).where(
+                MerchantState.user_id == user_id,
+                MerchantState.bank_connection_id == bank_connection_id,
+                MerchantState.billing_cycle.isnot(None),
+                MerchantState.overdue_notified.is_(False),
+            )
+        )
+        for state in result.scalars().all():
+            if is_overdue(state, today):
+                state.overdue_notified = True
+                events.append(_event_row(state, MISSED_PAYMENT, None, today))
+
+    if events:
+        await db.execute(insert(DetectionEvent), events)
+    confirmed = [
+        _candidate(state)
+        for state in touched.values()
+        if state.billing_cycle is not None
+    ]
+    if confirmed:
+        await upsert_candidates(db, user_id, bank_connection_id, confirmed)
+    await db.flush()
+    return len(events)
+
+
+async def list_events(
+    db: AsyncSession, user_id: int, limit: int = 50
+) -> list[DetectionEvent]:
+    result = await db.execute(
+        select(DetectionEvent)
+        .where(DetectionEvent.user_id == user_id)
+        .order_by(DetectionEvent.created_at.desc(), DetectionEvent.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
@@ -1,5 +1,7 @@
 import httpx
 
+from app.services.http_client import LOGO, http_clients
+
 KOREAN_SERVICES: dict[str, str] = {
     "넷플릭스": "netflix.com", "netflix": "netflix.com",
     "유튜브 프리미엄": "youtube.com", "youtube": "youtube.com", "youtube premium": "youtube.com",
@@ -24,7 +26,11 @@ KOREAN_SERVICES: dict[str, str] = {
 }
 
 
-async def search_logo(service_name: str, api_token: str | None = None) -> dict:
+async def search_logo(
+    service_name: str,
+    api_token: str | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
     name_lower = service_name.lower().strip()
     domain = KOREAN_SERVICES.get(name_lower)
     if domain:
@@ -33,12 +39,12 @@ async def search_logo(service_name: str, api_token: str | None = None) -> dict:
         return {"logo_url": f"https://www.google.com/s2/favicons?domain={domain}&sz=128", "source": "builtin+google"}
     if api_token:
         url = f"https://img.logo.dev/{name_lower}.com?token={api_token}&size=128&format=png"
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.head(url, timeout=5)
-                if resp.status_code == 200:
-                    return {"logo_url": url, "source": "logo.dev"}
-            except httpx.HTTPError:
-                pass
+        client = client or http_clients.get(LOGO)
+        try:
+            resp = await client.head(url)
+            if resp.status_code == 200:
+                return {"logo_url": url, "source": "logo.dev"}
+        except httpx.HTTPError:
+            pass
     fallback = f"https://www.google.com/s2/favicons?domain={name_lower}.com&sz=128"
     return {"logo_url": fallback, "source": "google"}
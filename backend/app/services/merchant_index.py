@@ -0,0 +1,255 @@
+"""
+Merchant-name canonicalization index.
+
+카드/계좌 가맹점명("NETFLIX.COM", "넷플릭스", "NETFLIX 서울", 잘린 resAccountDesc3 등)을
+서비스 단위 canonical key 로 매핑한다.
+
+- 별칭 출처: services/seed.SUBSCRIPTION_PRESETS, services/logo.KOREAN_SERVICES, EXTRA_ALIASES
+- 한/영 별칭은 같은 서비스(프리셋 이름)로 접힌다 (logo 도메인 경유, EXTRA_ALIASES 포함)
+- 조회: Aho-Corasick 자동자로 가맹점명 안의 가장 긴 별칭을 찾는다 → O(len(descriptor))
+  별칭은 토큰 경계(공백/기호, 한글↔영문↔숫자 전환)에서 시작하고 끝나야 한다 —
+  "slack" 이 "slackline" 에, "멜론" 이 "멜론빵집" 에 걸리지 않도록.
+  4자 이상 한글 별칭("넷플릭스")만 붙여 쓴 상호("넷플릭스코리아")의 앞부분으로 인정한다.
+- 브랜드만 나타내는 별칭(카카오, naver+)은 넣지 않는다 — 같은 브랜드의 다른 가맹점을 삼킨다
+- 일치가 없으면 잘린 가맹점명을 별칭의 접두사로 보고 trie 에서 유일한 서비스를 찾는다
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from app.services.logo import KOREAN_SERVICES
+from app.services.seed import SUBSCRIPTION_PRESETS
+
+# 프리셋/로고 사전에 없는 가맹점 표기 → 프리셋 이름 (확장 규칙)
+EXTRA_ALIASES: dict[str, str] = {
+    "netflix.com": "넷플릭스",
+    "youtubepremium": "유튜브 프리미엄",
+    "googleyoutube": "유튜브 프리미엄",
+    "youtubemusic": "유튜브 뮤직",
+    "유튜브뮤직": "유튜브 뮤직",
+    "disneyplus": "디즈니+",
+    "디즈니플러스": "디즈니+",
+    "appletv": "Apple TV+",
+    "애플tv": "Apple TV+",
+    "icloud": "iCloud+",
+    "openai": "ChatGPT Plus",
+    "chatgpt": "ChatGPT Plus",
+    "챗gpt": "ChatGPT Plus",
+    "anthropic": "Claude Pro",
+    "claudeai": "Claude Pro",
+    "adobe": "Adobe Creative Cloud",
+    "어도비": "Adobe Creative Cloud",
+    "googleone": "Google One",
+    "구글원": "Google One",
+    "playstation": "PlayStation Plus",
+    "플레이스테이션": "PlayStation Plus",
+    "xboxgamepass": "Xbox Game Pass",
+    "nintendo": "닌텐도 온라인",
+    "로켓와우": "쿠팡 로켓와우",
+    "와우멤버십": "쿠팡 로켓와우",
+    "네이버플러스": "네이버 플러스 멤버십",
+    "naverplus": "네이버 플러스 멤버십",
+    "네이버멤버십": "네이버 플러스 멤버십",
+    "지니뮤직": "지니뮤직",
+    "genie": "지니뮤직",
+    "리디셀렉트": "리디셀렉트",
+    "밀리의서재": "밀리의 서재",
+    "amazonprime": "아마존 프라임",
+    "primevideo": "아마존 프라임 비디오",
+}
+
+# 로고 사전에서 서비스가 아닌 브랜드 전체를 가리키는 별칭
+BRAND_ONLY_ALIASES = {"카카오", "naver+"}
+
+# 잘린 가맹점명을 접두사로 인정하는 최소 길이
+MIN_PREFIX_LENGTH = 4
+MIN_ALIAS_LENGTH = 2
+MIN_LATIN_ALIAS_LENGTH = 3
+# 이 길이 이상의 한글 별칭은 뒤에 다른 글자가 붙어도 인정
+MIN_OPEN_HANGUL_LENGTH = 4
+
+_STRIP = re.compile(r"[^0-9a-z가-힣]+")
+_LATIN = re.compile(r"[0-9a-z]+")
+_HANGUL = re.compile(r"[가-힣]+")
+
+
+def normalize(descriptor: str) -> str:
+    """NFKC + casefold, keeping only Latin digits/letters and Hangul."""
+    folded = unicodedata.normalize("NFKC", descriptor).casefold()
+    return _STRIP.sub("", folded)
+
+
+def _script(ch: str) -> int:
+    if "가" <= ch <= "힣":
+        return 0
+    return 1 if ch.isdigit() else 2
+
+
+def tokenize(descriptor: str) -> tuple[str, set[int]]:
+    """normalize() plus the token boundaries (offsets into the normalized text)."""
+    folded = unicodedata.normalize("NFKC", descriptor).casefold()
+    text: list[str] = []
+    bounds = {0}
+    for part in _STRIP.split(folded):
+        for i, ch in enumerate(part):
+            if i and _script(ch) != _script(part[i - 1]):
+                bounds.add(len(text))
+            text.append(ch)
+        bounds.add(len(text))
+    return "".join(text), bounds
+
+
+@dataclass(frozen=True)
+class MerchantMatch:
+    key: str  # canonical service key
+    name: str  # display name (프리셋 이름)
+
+
+class _Node:
+    __slots__ = ("children", "fail", "out", "below")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.fail: _Node | None = None
+        # 여기서 끝나는 별칭들 (길이, key, 뒤에 글자가 붙어도 되는지), 긴 것부터
+        self.out: tuple[tuple[int, str, bool], ...] = ()
+        self.below: str | None = None  # 하위 별칭의 유일한 key ("" = 모호)
+
+
+class MerchantIndex:
+    """Precompiled alias automaton; rebuilt lazily after add_alias()."""
+
+    def __init__(self) -> None:
+        self._aliases: dict[str, str] = {}
+        self._names: dict[str, str] = {}
+        self._root: _Node | None = None
+
+    def add_alias(self, alias: str, key: str, name: str | None = None) -> None:
+        normalized = normalize(alias)
+        if len(normalized) < MIN_ALIAS_LENGTH:
+            return
+        if _LATIN.fullmatch(normalized) and len(normalized) < MIN_LATIN_ALIAS_LENGTH:
+            return
+        self._aliases[normalized] = key
+        self._names.setdefault(key, name or key)
+        self._root = None
+
+    def _build(self) -> _Node:
+        root = _Node()
+        for alias, key in self._aliases.items():
+            node = root
+            for ch in alias:
+                node = node.children.setdefault(ch, _Node())
+                node.below = key if node.below in (None, key) else ""
+            open_end = (
+                _HANGUL.fullmatch(alias) is not None
+                and len(alias) >= MIN_OPEN_HANGUL_LENGTH
+            )
+            node.out = ((len(alias), key, open_end),)
+
+        # BFS 로 failure 링크 + 접미 별칭(out) 전파
+        queue: list[_Node] = []
+        for child in root.children.values():
+            child.fail = root
+            queue.append(child)
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in node.children.items():
+                fail = node.fail
+                while fail is not None and ch not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[ch] if fail is not None else root
+                if child.fail.out:
+                    child.out += child.fail.out
+                queue.append(child)
+        return root
+
+    def lookup(self, descriptor: str) -> MerchantMatch | None:
+        text, bounds = tokenize(descriptor)
+        if not text:
+            return None
+        root = self._root
+        if root is None:
+            root = self._root = self._build()
+
+        best: tuple[int, str] | None = None
+        node = root
+        for end, ch in enumerate(text, 1):
+            while node is not root and ch not in node.children:
+                assert node.fail is not None
+                node = node.fail
+            node = node.children.get(ch, root)
+            for length, key, open_end in node.out:
+                if best is not None and length <= best[0]:
+                    break
+                if end - length in bounds and (open_end or end in bounds):
+                    best = (length, key)
+                    break
+        if best:
+            return MerchantMatch(key=best[1], name=self._names[best[1]])
+
+        # 잘린 가맹점명: 별칭의 접두사이고 후보 서비스가 하나뿐이면 인정
+        if len(text) >= MIN_PREFIX_LENGTH:
+            node = root
+            for ch in text:
+                next_node = node.children.get(ch)
+                if next_node is None:
+                    return None
+                node = next_node
+            if node.below:
+                return MerchantMatch(key=node.below, name=self._names[node.below])
+        return None
+
+    def canonical_key(self, descriptor: str) -> str:
+        """Canonical service key, or the normalized descriptor if unknown."""
+        match = self.lookup(descriptor)
+        return match.key if match else normalize(descriptor)
+
+    @classmethod
+    def default(cls) -> "MerchantIndex":
+        index = cls()
+
+        # 프리셋 이름 + 괄호 안/밖 표기 ("노션(Notion)" → 노션, notion)
+        domain_by_alias = {
+            normalize(a): d
+            for a, d in KOREAN_SERVICES.items()
+            if a not in BRAND_ONLY_ALIASES
+        }
+        preset_by_domain: dict[str, set[str]] = {}
+        for preset in SUBSCRIPTION_PRESETS:
+            name = preset["name"]
+            variants = {name, *re.split(r"[()]", name)}
+            for variant in variants:
+                variant = variant.strip()
+                if not variant:
+                    continue
+                index.add_alias(variant, name, name)
+                domain = domain_by_alias.get(normalize(variant))
+                if domain:
+                    preset_by_domain.setdefault(domain, set()).add(name)
+        # 프리셋 표기와 다른 로고 별칭("디즈니플러스", "네이버플러스")도 도메인을 잇는다
+        for alias, name in EXTRA_ALIASES.items():
+            domain = domain_by_alias.get(normalize(alias))
+            if domain:
+                preset_by_domain.setdefault(domain, set()).add(name)
+
+        # 로고 사전의 한/영 별칭: 도메인이 프리셋 하나로만 연결되면 그 프리셋으로 접는다
+        for alias, domain in KOREAN_SERVICES.items():
+            if alias in BRAND_ONLY_ALIASES:
+                continue
+            presets = preset_by_domain.get(domain, set())
+            if len(presets) == 1:
+                key = next(iter(presets))
+                index.add_alias(alias, key, key)
+            elif not presets:
+                index.add_alias(alias, domain, alias)
+
+        for alias, name in EXTRA_ALIASES.items():
+            index.add_alias(alias, name, name)
+        return index
+
+
+merchant_index = MerchantIndex.default()
@@ -1,7 +1,15 @@
 import httpx
 
+from app.services.http_client import DISCORD, http_clients
 
-async def send_discord_webhook(webhook_url: str, title: str, description: str, color: int = 0x6366F1) -> bool:
+
+async def send_discord_webhook(
+    webhook_url: str,
+    title: str,
+    description: str,
+    color: int = 0x6366F1,
+    client: httpx.AsyncClient | None = None,
+) -> bool:
     if not webhook_url:
         return False
     payload = {
@@ -13,9 +21,9 @@ async def send_discord_webhook(webhook_url: str, title: str, description: str, c
             }
         ]
     }
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(webhook_url, json=payload)
-            return resp.status_code == 204
-        except httpx.HTTPError:
-            return False
+    client = client or http_clients.get(DISCORD)
+    try:
+        resp = await client.post(webhook_url, json=payload)
+        return resp.status_code == 204
+    except httpx.HTTPError:
+        return False
@@ -0,0 +1,165 @@
+"""
+Capture subscription price changes from stored Codef transactions.
+
+PriceHistory 는 사용자가 금액을 직접 수정할 때만 쌓였다. 동기화로 새 거래가 저장되면
+reconcile_prices() 가 사용자 단위로 한 번
+- 새 결제의 canonical 가맹점 키와 같은 활성 구독(KRW)만 골라
+- 사용자 전체 연결의 최근 결제를 한 쿼리로 읽어 구독별로 묶고
+- 마지막 가격 변경(PriceHistory, 없으면 등록일) 이후 최근 결제가 같은 새 금액으로
+  이어지면(SUSTAINED_PAYMENTS 회) 가격 변경으로 보고
+- PriceHistory 일괄 insert + Subscription.amount 일괄 update (PK 기준 executemany)
+를 한다. 구독별 쿼리는 없다.
+
+금액이 매번 다른 결제(해외 결제 환율 등)는 연속 결제 금액이 같아야 하므로 반영되지 않는다.
+기준일로 Subscription.updated_at 은 쓰지 않는다 — 매일 next_payment_date 를 넘기는 스케줄러가
+결제 주기마다 갱신하므로 기준일 이후 결제가 한 번밖에 남지 않는다.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.bank_connection import BankConnection
+from app.models.price_history import PriceHistory
+from app.models.subscription import Subscription
+from app.models.transaction import Transaction
+from app.services.detection import is_charge, merchant_key
+from app.services.tx_record import TxRecord
+
+# 새 금액으로 인정할 연속 결제 수 (긴 주기는 한 번이면 충분)
+SUSTAINED_PAYMENTS: dict[str, int] = {
+    "weekly": 2,
+    "monthly": 2,
+    "quarterly": 1,
+    "yearly": 1,
+}
+LOOKBACK_DAYS = 400  # 연간 구독의 직전 결제까지 포함
+
+
+def _sustained_amount(amounts: list[int], needed: int) -> int | None:
+    """The amount the last `needed` payments agree on, if any."""
+    if len(amounts) < needed:
+        return None
+    recent = amounts[-needed:]
+    return recent[-1] if all(a == recent[-1] for a in recent) else None
+
+
+def price_anchor(sub: Subscription, last_change: datetime | None) -> date:
+    """Payments before this date don't count: last price change, else creation."""
+    return (last_change or sub.created_at).date()
+
+
+def sustained_price(
+    sub: Subscription, payments: list[tuple[date, int]], anchor: date
+) -> int | None:
+    """New amount if the payments since `anchor` settled on one, else None."""
+    needed = SUSTAINED_PAYMENTS.get(sub.billing_cycle, 2)
+    new_amount = _sustained_amount(
+        [amount for day, amount in payments if day >= anchor], needed
+    )
+    if new_amount is None or Decimal(new_amount) == sub.amount:
+        return None
+    return new_amount
+
+
+async def reconcile_prices(
+    db: AsyncSession, user_id: int, new_transactions: list[TxRecord]
+) -> int:
+    """Apply sustained price changes seen in new transactions; returns count."""
+    new_keys: set[str] = set()
+    for tx in new_transactions:
+        if tx.amount > 0 and tx.merchant.strip() and is_charge(tx):
+            new_keys.add(merchant_key(tx.merchant.strip()))
+    if not new_keys:
+        return 0
+
+    result = await db.execute(
+        select(Subscription).where(
+            Subscription.user_id == user_id,
+            Subscription.is_active.is_(True),
+            Subscription.currency == "KRW",
+        )
+    )
+    by_key: dict[str, list[Subscription]] = {}
+    for sub in result.scalars().all():
+        key = merchant_key(sub.name)
+        if key in new_keys:
+            by_key.setdefault(key, []).append(sub)
+    if not by_key:
+        return 0
+
+    # 마지막 가격 변경(직접 수정 포함) 이후 결제만 본다 — 고친 금액을 과거 결제로 덮지 않도록
+    sub_ids = [sub.id for subs in by_key.values() for sub in subs]
+    result = await db.execute(
+        select(PriceHistory.subscription_id, func.max(PriceHistory.changed_at))
+        .where(PriceHistory.subscription_id.in_(sub_ids))
+        .group_by(PriceHistory.subscription_id)
+    )
+    last_changes = dict(result.all())
+    anchors = {
+        sub.id: price_anchor(sub, last_changes.get(sub.id))
+        for subs in by_key.values()
+        for sub in subs
+    }
+    today = date.today()
+    since = max(min(anchors.values()), today - timedelta(days=LOOKBACK_DAYS))
+
+    result = await db.execute(
+        select(
+            Transaction.merchant,
+            Transaction.tx_date,
+            Transaction.amount,
+            Transaction.status,
+        )
+        .join(BankConnection, BankConnection.id == Transaction.bank_connection_id)
+        .where(
+            BankConnection.user_id == user_id,
+            Transaction.tx_date >= since,
+            Transaction.amount > 0,
+        )
+        .order_by(Transaction.tx_date, Transaction.tx_time, Transaction.id)
+    )
+    key_cache: dict[str, str] = {}
+    # 가맹점 키별 (일자, 금액) 시계열
+    series: dict[str, list[tuple[date, int]]] = {key: [] for key in by_key}
+    for merchant, tx_date, amount, status in result.all():
+        merchant = (merchant or "").strip()
+        if not merchant or status == "입금" or "취소" in (status or ""):
+            continue
+        key = key_cache.get(merchant)
+        if key is None:
+            key = key_cache[merchant] = merchant_key(merchant)
+        if key in series:
+            series[key].append((tx_date, amount))
+
+    history: list[dict] = []
+    amounts: list[dict] = []
+    changed: list[Subscription] = []
+    for key, subs in by_key.items():
+        for sub in subs:
+            new_amount = sustained_price(sub, series[key], anchors[sub.id])
+            if new_amount is None:
+                continue
+            history.append(
+                {
+                    "subscription_id": sub.id,
+                    "old_amount": sub.amount,
+                    "new_amount": Decimal(new_amount),
+                    "old_currency": sub.currency,
+                    "new_currency": sub.currency,
+                    "notes": f"결제 내역에서 자동 반영 ({series[key][-1][0]:%Y-%m-%d})",
+                }
+            )
+            amounts.append({"id": sub.id, "amount": Decimal(new_amount)})
+            changed.append(sub)
+
+    if not amounts:
+        return 0
+    await db.execute(insert(PriceHistory), history)
+    await db.execute(update(Subscription), amounts)
+    # PK 기준 일괄 UPDATE 는 세션의 객체를 갱신하지 않는다
+    for sub in changed:
+        db.expire(sub, ["amount", "updated_at"])
+    return len(amounts)
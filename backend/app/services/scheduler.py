@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 
@@ -9,6 +10,22 @@ from app.models.subscription import Subscription
 from app.services.notification import send_discord_webhook
 
 
+def next_billing_dates(today: date, billing_days: Iterable[int]) -> dict[int, date]:
+    """Next payment date for each distinct billing day, clamped to month end.
+
+    결제일이 오늘이거나 지났으면 다음 달 (31일 → 30일/말일로 보정).
+    """
+    dates: dict[int, date] = {}
+    for day in set(billing_days):
+        this_month = today + relativedelta(day=day)
+        dates[day] = (
+            this_month
+            if this_month > today
+            else today + relativedelta(months=1, day=day)
+        )
+    return dates
+
+
 async def check_upcoming_payments(db: AsyncSession, webhook_url: str) -> None:
     """Find subscriptions with next_payment_date within 3 days and send alert."""
     cutoff = date.today() + timedelta(days=3)
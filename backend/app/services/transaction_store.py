@@ -0,0 +1,409 @@
+"""
+Persistent Codef transaction store with incremental (delta) sync.
+
+- 수집한 거래는 transactions 테이블에 (bank_connection_id, content_hash) 기준으로 중복 없이 저장
+- 이후 동기화는 BankConnection.synced_through(high-water mark) - overlap 이후만 조회
+- 조회 기간이 저장된 범위(synced_from)보다 과거로 늘어나면 전체 기간을 다시 조회
+- 탐지/응답은 저장된 거래를 읽어서 수행
+- 새로 저장된 거래는 증분 탐지(incremental_detection)와 구독 가격 반영(price_reconciler)에 전달
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.bank_connection import BankConnection
+from app.models.payment_method import PaymentMethod
+from app.models.transaction import Transaction
+from app.services.codef import (
+    ScrapeBatch,
+    ScrapeFailure,
+    ScrapeProgress,
+    ScrapeResult,
+    codef_client,
+)
+from app.services.codef_cache import scrape_cache
+from app.services.incremental_detection import observe_transactions
+from app.services.price_reconciler import reconcile_prices
+from app.services.tx_record import TxRecord, from_stored
+
+logger = logging.getLogger(__name__)
+
+# asyncpg 바인드 파라미터 한도(32767) 이내로 배치
+UPSERT_BATCH_SIZE = 2000
+# 스트리밍 조회 시 커서에서 한 번에 읽는 행 수
+STREAM_BATCH_SIZE = 1000
+
+
+@dataclass
+class SyncResult:
+    """Outcome of one connection sync."""
+
+    fetched: int = 0
+    inserted: int = 0
+    events: int = 0  # 증분 탐지 이벤트 수
+    price_changes: int = 0  # 거래내역으로 갱신된 구독 금액 수
+    since: date | None = None
+    failures: list[ScrapeFailure] = field(default_factory=list)
+
+
+def content_hash(tx: TxRecord) -> str:
+    """Stable identity of a normalized transaction within one connection."""
+    parts = (
+        tx.date_str,
+        tx.time,
+        tx.card_no,
+        str(tx.amount),
+        tx.merchant,
+        tx.status,
+        tx.approval_no,
+        tx.balance,
+    )
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _compress_raw(raw: dict | None) -> bytes | None:
+    if not raw:
+        return None
+    return zlib.compress(json.dumps(raw, ensure_ascii=False).encode("utf-8"))
+
+
+def requested_start(months_back: int) -> date:
+    return (datetime.now() - timedelta(days=months_back * 30)).date()
+
+
+def plan_since(conn: BankConnection, months_back: int) -> date | None:
+    """Where the next sync should start; None means the full capped period."""
+    if not conn.synced_from or not conn.synced_through:
+        return None
+    if conn.synced_from > requested_start(months_back):
+        # 더 긴 기간을 요청 → 전체 재조회
+        return None
+    return conn.synced_through - timedelta(days=settings.CODEF_SYNC_OVERLAP_DAYS)
+
+
+async def stored_identifiers(db: AsyncSession, conn: BankConnection) -> list[str]:
+    """Card/account numbers to query for a connection (from its PaymentMethods)."""
+    result = await db.execute(
+        select(PaymentMethod.card_no).where(
+            PaymentMethod.bank_connection_id == conn.id,
+            PaymentMethod.card_no.isnot(None),
+            PaymentMethod.card_no != "",
+        )
+    )
+    identifiers = [row[0] for row in result.all()]
+    if not identifiers and conn.card_no:
+        identifiers = [conn.card_no]
+    return identifiers
+
+
+async def upsert_payment_methods(
+    db: AsyncSession,
+    user_id: int,
+    bank_connection_id: int,
+    methods: list[tuple[str, str]],
+    card_type: str,
+    default_name: str,
+) -> None:
+    """Bulk insert discovered cards/accounts as (card_no, name); existing skipped."""
+    rows = [
+        {
+            "user_id": user_id,
+            "name": (name or default_name)[:100],
+            "card_no": card_no,
+            "card_last_four": card_no[-4:],
+            "card_type": card_type,
+            "is_active": True,
+            "bank_connection_id": bank_connection_id,
+        }
+        for card_no, name in dict(methods).items()
+        if card_no
+    ]
+    if not rows:
+        return
+    await db.execute(
+        pg_insert(PaymentMethod)
+        .values(rows)
+        .on_conflict_do_nothing(
+            index_elements=[PaymentMethod.bank_connection_id, PaymentMethod.card_no],
+            index_where=(
+                PaymentMethod.card_no.isnot(None) & (PaymentMethod.card_no != "")
+            ),
+        )
+    )
+
+
+async def scrape_connection(
+    conn: BankConnection,
+    identifiers: list[str],
+    months_back: int,
+    since: date | None = None,
+    progress: ScrapeProgress | None = None,
+    on_batch: ScrapeBatch | None = None,
+) -> ScrapeResult:
+    if conn.business_type == "BK":
+        return await codef_client.scrape_bank_transactions(
+            connected_id=conn.connected_id,
+            organization=conn.organization_code,
+            accounts=identifiers,
+            months_back=months_back,
+            account_password=conn.account_password or "",
+            since=since,
+            progress=progress,
+            keep_raw=settings.CODEF_KEEP_RAW,
+            on_batch=on_batch,
+        )
+    return await codef_client.scrape_transactions(
+        connected_id=conn.connected_id,
+        organization=conn.organization_code,
+        months_back=months_back,
+        card_nos=identifiers or None,
+        since=since,
+        progress=progress,
+        keep_raw=settings.CODEF_KEEP_RAW,
+        on_batch=on_batch,
+    )
+
+
+async def upsert_transactions(
+    db: AsyncSession, bank_connection_id: int, transactions: list[TxRecord]
+) -> list[TxRecord]:
+    """Bulk insert new transactions; returns only the ones actually inserted.
+
+    이미 저장된 content hash 는 건너뛰고, RETURNING 으로 새로 들어간 행만 돌려준다
+    (증분 탐지 입력).
+    """
+    records: dict[str, TxRecord] = {}
+    rows: dict[str, dict] = {}
+    for tx in transactions:
+        if tx.day <= 0:
+            continue
+        digest = content_hash(tx)
+        records[digest] = tx
+        rows[digest] = {
+            "bank_connection_id": bank_connection_id,
+            "content_hash": digest,
+            "tx_date": date.fromordinal(tx.day),
+            "tx_time": tx.time[:6],
+            "merchant": tx.merchant[:200],
+            "amount": tx.amount,
+            "status": tx.status[:20],
+            "card_name": tx.card_name[:100],
+            "card_no": tx.card_no[:30],
+            "category": tx.category[:100],
+            "raw_compressed": _compress_raw(tx.raw),
+        }
+
+    values = list(rows.values())
+    inserted: list[TxRecord] = []
+    for i in range(0, len(values), UPSERT_BATCH_SIZE):
+        batch = values[i : i + UPSERT_BATCH_SIZE]
+        result = await db.execute(
+            pg_insert(Transaction)
+            .values(batch)
+            .on_conflict_do_nothing(
+                index_elements=[Transaction.bank_connection_id, Transaction.content_hash]
+            )
+            .returning(Transaction.content_hash)
+        )
+        inserted.extend(records[digest] for (digest,) in result.all())
+    return inserted
+
+
+async def sync_connection(
+    db: AsyncSession,
+    conn: BankConnection,
+    identifiers: list[str],
+    months_back: int,
+    progress: ScrapeProgress | None = None,
+    on_batch: ScrapeBatch | None = None,
+) -> SyncResult:
+    """Fetch only what is missing from the store, then persist it.
+
+    on_batch: stream each fetched window/account (bypasses the scrape cache,
+    whose shared result only exists once every fetch is done).
+    """
+    since = plan_since(conn, months_back)
+
+    def fetch():
+        return scrape_connection(
+            conn,
+            identifiers,
+            months_back,
+            since=since,
+            progress=progress,
+            on_batch=on_batch,
+        )
+
+    if on_batch:
+        scraped = await fetch()
+    else:
+        scraped = await scrape_cache.get_or_fetch(
+            conn, identifiers, since or requested_start(months_back), fetch
+        )
+    return await persist_scrape(db, conn, scraped, months_back, since)
+
+
+async def sync_connections(
+    db: AsyncSession,
+    targets: list[tuple[BankConnection, list[str]]],
+    months_back: int,
+) -> list[SyncResult | BaseException]:
+    """sync_connection for several (connection, identifiers) at once.
+
+    AsyncSession 은 동시에 쓸 수 없으므로 Codef 조회만 병렬로 하고 저장은 순서대로 한다.
+    조회가 실패한 연결은 결과 자리에 예외를 돌려준다.
+    """
+    plans = [plan_since(conn, months_back) for conn, _ in targets]
+
+    def fetch(conn: BankConnection, identifiers: list[str], since: date | None):
+        return scrape_cache.get_or_fetch(
+            conn,
+            identifiers,
+            since or requested_start(months_back),
+            lambda: scrape_connection(conn, identifiers, months_back, since=since),
+        )
+
+    outcomes = await asyncio.gather(
+        *(
+            fetch(conn, identifiers, since)
+            for (conn, identifiers), since in zip(targets, plans)
+        ),
+        return_exceptions=True,
+    )
+    results: list[SyncResult | BaseException] = []
+    for (conn, _), since, outcome in zip(targets, plans, outcomes):
+        if isinstance(outcome, BaseException):
+            results.append(outcome)
+        else:
+            results.append(await persist_scrape(db, conn, outcome, months_back, since))
+    return results
+
+
+async def persist_scrape(
+    db: AsyncSession,
+    conn: BankConnection,
+    scraped: ScrapeResult,
+    months_back: int,
+    since: date | None,
+) -> SyncResult:
+    new_transactions = await upsert_transactions(db, conn.id, scraped.transactions)
+    # 새로 저장된 거래만 증분 탐지에 반영 (누락 계좌/기간이 있으면 결제 누락 판정은 건너뜀)
+    events = await observe_transactions(
+        db,
+        conn.user_id,
+        conn.id,
+        new_transactions,
+        check_overdue=not scraped.failures,
+    )
+    price_changes = await reconcile_prices(db, conn.user_id, new_transactions)
+
+    conn.last_synced_at = datetime.now()
+    conn.last_error = (
+        "; ".join(f"{f.target}: {f.error}" for f in scraped.failures)[:1000] or None
+    )
+    if not scraped.failures:
+        # 누락된 계좌/기간이 있으면 high-water mark 를 올리지 않는다
+        if since is None:
+            conn.synced_from = requested_start(months_back)
+        conn.synced_through = date.today()
+    await db.flush()
+
+    logger.info(
+        f"Codef sync: conn={conn.id} since={since or 'full'} "
+        f"fetched={len(scraped.transactions)} inserted={len(new_transactions)} "
+        f"events={events} price_changes={price_changes} "
+        f"failed={len(scraped.failures)}"
+    )
+    return SyncResult(
+        fetched=len(scraped.transactions),
+        inserted=len(new_transactions),
+        events=events,
+        price_changes=price_changes,
+        since=since,
+        failures=scraped.failures,
+    )
+
+
+# 컬럼 순서 = tx_record.from_stored 인자 순서
+STORED_COLUMNS = (
+    Transaction.tx_date,
+    Transaction.tx_time,
+    Transaction.merchant,
+    Transaction.amount,
+    Transaction.status,
+    Transaction.card_name,
+    Transaction.card_no,
+    Transaction.category,
+)
+
+
+def _transactions_query(
+    bank_connection_ids: list[int], since: date, until: date | None = None
+):
+    query = select(*STORED_COLUMNS).where(
+        Transaction.bank_connection_id.in_(bank_connection_ids),
+        Transaction.tx_date >= since,
+    )
+    if until is not None:
+        query = query.where(Transaction.tx_date < until)
+    return query.order_by(Transaction.tx_date, Transaction.tx_time, Transaction.id)
+
+
+async def latest_sources(
+    db: AsyncSession, bank_connection_ids: list[int], since: date
+) -> dict[str, int]:
+    """card_no -> connection that most recently recorded a transaction for it."""
+    result = await db.execute(
+        select(
+            Transaction.card_no,
+            Transaction.bank_connection_id,
+            func.max(Transaction.tx_date),
+        )
+        .where(
+            Transaction.bank_connection_id.in_(bank_connection_ids),
+            Transaction.tx_date >= since,
+        )
+        .group_by(Transaction.card_no, Transaction.bank_connection_id)
+        .order_by(func.max(Transaction.tx_date))
+    )
+    # 날짜 오름차순이므로 마지막 값(가장 최근)이 남는다
+    return {card_no: conn_id for card_no, conn_id, _ in result.all()}
+
+
+async def load_transactions(
+    db: AsyncSession, bank_connection_ids: list[int], since: date
+) -> list[TxRecord]:
+    """Stored transactions in chronological order (raw payload not loaded)."""
+    result = await db.execute(_transactions_query(bank_connection_ids, since))
+    return [from_stored(*row) for row in result.all()]
+
+
+async def iter_transactions(
+    db: AsyncSession,
+    bank_connection_ids: list[int],
+    since: date,
+    until: date | None = None,
+) -> AsyncIterator[list[TxRecord]]:
+    """Like load_transactions, but yields server-side cursor batches.
+
+    메모리 사용량이 이력 길이와 무관하도록 STREAM_BATCH_SIZE 행씩 읽는다.
+    until: exclusive upper bound on tx_date.
+    """
+    result = await db.stream(
+        _transactions_query(bank_connection_ids, since, until).execution_options(
+            yield_per=STREAM_BATCH_SIZE
+        )
+    )
+    async for partition in result.partitions():
+        yield [from_stored(*row) for row in partition]
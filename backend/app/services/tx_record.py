@@ -0,0 +1,159 @@
+"""
+Compact transaction record for the Codef scrape → store → detect path.
+
+정규화 결과를 문자열 dict(9개 키 + 원본 item 참조) 대신 slots 레코드로 들고 다닌다.
+- 금액은 int, 일자는 proleptic ordinal(int) — 탐지에서 다시 파싱하지 않는다
+- 가맹점/상태/카드명 등 반복 문자열은 sys.intern 으로 공유
+- 원본 item(raw)은 keep_raw=True 일 때만 보관 (기본은 버림)
+"""
+
+import sys
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+_intern = sys.intern
+
+
+@dataclass(slots=True)
+class TxRecord:
+    day: int  # date.toordinal(), 0 = 파싱 불가
+    time: str
+    merchant: str
+    amount: int
+    status: str
+    card_name: str
+    card_no: str
+    category: str
+    approval_no: str = ""
+    balance: str = ""  # 은행 거래 후 잔액 (같은 날 같은 금액 거래 구분용)
+    raw: dict | None = None
+
+    @property
+    def date_str(self) -> str:
+        return date.fromordinal(self.day).strftime("%Y%m%d") if self.day > 0 else ""
+
+    def fields(self) -> tuple:
+        """Positional fields without raw (cheap to pickle to detection workers)."""
+        return (
+            self.day,
+            self.time,
+            self.merchant,
+            self.amount,
+            self.status,
+            self.card_name,
+            self.card_no,
+            self.category,
+        )
+
+    def as_dict(self) -> dict:
+        """API shape (CodefTransaction): string date/amount."""
+        return {
+            "date": self.date_str,
+            "time": self.time,
+            "merchant": self.merchant,
+            "amount": str(self.amount),
+            "status": self.status,
+            "card_name": self.card_name,
+            "card_no": self.card_no,
+            "category": self.category,
+        }
+
+
+@lru_cache(maxsize=4096)
+def day_ordinal(value: str) -> int:
+    """YYYYMMDD -> proleptic ordinal (0 if unparsable), without strptime."""
+    # 한 응답 안에서 같은 일자가 수백 번 반복되므로 캐시한다
+    if len(value) != 8:
+        return 0
+    try:
+        return date(int(value[0:4]), int(value[4:6]), int(value[6:8])).toordinal()
+    except ValueError:
+        return 0
+
+
+def parse_amount(value) -> int:
+    try:
+        return int(str(value).replace(",", "") or "0")
+    except (TypeError, ValueError):
+        return 0
+
+
+def _pick(item: dict, keys: tuple[str, ...], default: str = ""):
+    """First key present in item (fallbacks are only looked up when needed)."""
+    for key in keys:
+        if key in item:
+            return item[key]
+    return default
+
+
+_DATE_KEYS = ("resUsedDate", "resApprovalDate")
+_TIME_KEYS = ("resUsedTime", "resApprovalTime")
+_STORE_KEYS = ("resMemberStoreName", "resStoreName", "resMerchantName")
+_AMOUNT_KEYS = ("resUsedAmount", "resApprovalAmount", "resAmount")
+_CARD_NO_KEYS = ("resCardNo", "resCardNumber")
+
+
+def from_card_item(item: dict, keep_raw: bool = False) -> TxRecord:
+    """Card approval-list item -> TxRecord."""
+    return TxRecord(
+        day=day_ordinal(_pick(item, _DATE_KEYS)),
+        time=_pick(item, _TIME_KEYS),
+        merchant=_intern(_pick(item, _STORE_KEYS)),
+        amount=parse_amount(_pick(item, _AMOUNT_KEYS, "0")),
+        status=_intern(item.get("resApprovalStatus", "승인")),
+        card_name=_intern(item.get("resCardName", "")),
+        card_no=_intern(_pick(item, _CARD_NO_KEYS)),
+        category=_intern(item.get("resCategory", "")),
+        approval_no=item.get("resApprovalNo", ""),
+        raw=item if keep_raw else None,
+    )
+
+
+def from_bank_item(item: dict, account: str, keep_raw: bool = False) -> TxRecord:
+    """Bank transaction-list item -> TxRecord (withdrawals as 출금)."""
+    merchant = (
+        item.get("resAccountDesc3", "")
+        or item.get("resAccountDesc2", "")
+        or item.get("resAccountDesc1", "")
+        or item.get("resAccountDesc4", "")
+    )
+    out_amount = parse_amount(item.get("resAccountOut", "0"))
+    in_amount = parse_amount(item.get("resAccountIn", "0"))
+    is_withdrawal = out_amount > 0
+
+    return TxRecord(
+        day=day_ordinal(item.get("resAccountTrDate", item.get("resDate", ""))),
+        time=item.get("resAccountTrTime", item.get("resTime", "")),
+        merchant=_intern(merchant),
+        amount=out_amount if is_withdrawal else in_amount,
+        status="출금" if is_withdrawal else "입금",
+        card_name="",
+        card_no=_intern(account),
+        category="",
+        balance=item.get("resAfterTranBalance", ""),
+        raw=item if keep_raw else None,
+    )
+
+
+def from_stored(
+    tx_date: date,
+    tx_time: str | None,
+    merchant: str | None,
+    amount: int | None,
+    status: str | None,
+    card_name: str | None,
+    card_no: str | None,
+    category: str | None,
+) -> TxRecord:
+    """Stored transactions row (transaction_store column order) -> TxRecord."""
+    return TxRecord(
+        day=tx_date.toordinal(),
+        time=tx_time or "",
+        merchant=_intern(merchant or ""),
+        amount=amount or 0,
+        status=_intern(status or ""),
+        card_name=_intern(card_name or ""),
+        card_no=_intern(card_no or ""),
+        category=_intern(category or ""),
+    )
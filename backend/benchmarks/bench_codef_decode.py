@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: Codef response decoding (old str path vs decode_codef_body).
+
+Usage (backend/ 에서):
+    python -m benchmarks.bench_codef_decode                 # 합성 approval-list
+    python -m benchmarks.bench_codef_decode recorded.txt    # 녹화된 원본 응답 본문
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+import urllib.parse
+
+from app.services.codef import decode_codef_body
+
+MERCHANTS = ["넷플릭스", "NETFLIX.COM", "쿠팡", "스타벅스 강남점", "GS25", "YOUTUBE", "배달의민족"]
+
+
+def synthetic_payload(items: int, seed: int = 7) -> bytes:
+    rng = random.Random(seed)
+    res_list = [
+        {
+            "resUsedDate": f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            "resUsedTime": f"{rng.randint(0, 23):02d}{rng.randint(0, 59):02d}00",
+            "resCardNo": "5365-****-****-1234",
+            "resCardName": "신한카드 Deep Dream",
+            "resMemberStoreName": rng.choice(MERCHANTS),
+            "resUsedAmount": str(rng.randint(1000, 200000)),
+            "resApprovalNo": f"{rng.randint(0, 99999999):08d}",
+            "resApprovalStatus": "승인",
+            "resInstallmentMonth": "",
+        }
+        for _ in range(items)
+    ]
+    body = {"result": {"code": "CF-00000", "message": "성공"}, "data": {"resList": res_list}}
+    return urllib.parse.quote(json.dumps(body, ensure_ascii=False)).encode("ascii")
+
+
+def old_path(content: bytes) -> dict:
+    text = content.decode("utf-8")
+    return json.loads(urllib.parse.unquote_plus(text))
+
+
+def measure(label: str, fn, content: bytes, repeat: int = 5) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} best {best * 1000:8.1f} ms   peak {peak / 1_048_576:7.1f} MiB")
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        payloads = [(path, open(path, "rb").read()) for path in sys.argv[1:]]
+    else:
+        payloads = [(f"synthetic {n} items", synthetic_payload(n)) for n in (2_000, 20_000, 50_000)]
+
+    for name, content in payloads:
+        assert old_path(content) == decode_codef_body(content)
+        print(f"\n{name}: {len(content) / 1_048_576:.1f} MiB encoded")
+        measure("unquote_plus + json", old_path, content)
+        measure("decode_codef_body", decode_codef_body, content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Micro-benchmark: normalized transactions as dicts (+ raw item) vs TxRecord.
+
+약 50k 건의 합성 카드 승인내역(codef_fixtures, large × 12개월)으로
+- 정규화 후 남는 메모리 (응답 본문은 버리고 결과 리스트만 유지)
+- 탐지 입력 준비 (문자열 일자/금액 파싱 vs 레코드 필드 읽기)
+- 전체 탐지: 이전 dict 기반 detect_subscriptions vs detect_recurring (TxRecord 열 단위)
+를 비교한다. 새 탐지는 canonical 가맹점 키/가격 구간/주기 적합도까지 계산하므로
+같은 일을 하는 비교는 아니다 — 늘어난 일을 하고도 걸리는 시간을 본다.
+
+Usage (backend/ 에서):
+    python -m benchmarks.bench_tx_records
+    python -m benchmarks.bench_tx_records 24    # 개월 수
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from app.services.codef_fixtures import approval_list
+from app.services.detection import detect_recurring
+from app.services.tx_record import day_ordinal, from_card_item, parse_amount
+
+
+def synthetic_body(months: int) -> str:
+    end = date.today()
+    body = {
+        "organization": "0306",
+        "startDate": (end - timedelta(days=months * 30)).strftime("%Y%m%d"),
+        "endDate": end.strftime("%Y%m%d"),
+    }
+    return json.dumps(approval_list(body, size="large"), ensure_ascii=False)
+
+
+def normalize_dicts(items: list[dict]) -> list[dict]:
+    """The previous _normalize_transaction (string fields + raw item)."""
+    return [
+        {
+            "date": item.get("resUsedDate", item.get("resApprovalDate", "")),
+            "time": item.get("resUsedTime", item.get("resApprovalTime", "")),
+            "merchant": item.get(
+                "resMemberStoreName",
+                item.get("resStoreName", item.get("resMerchantName", "")),
+            ),
+            "amount": item.get(
+                "resUsedAmount",
+                item.get("resApprovalAmount", item.get("resAmount", "0")),
+            ),
+            "status": item.get("resApprovalStatus", "승인"),
+            "card_name": item.get("resCardName", ""),
+            "card_no": item.get("resCardNo", item.get("resCardNumber", "")),
+            "category": item.get("resCategory", ""),
+            "raw": item,
+        }
+        for item in items
+    ]
+
+
+def detect_dicts(transactions: list[dict]) -> list[dict]:
+    """The previous CodefClient.detect_subscriptions (dict rows, string fields)."""
+    merchant_txns: dict[str, list[dict]] = defaultdict(list)
+    for tx in transactions:
+        merchant = tx.get("merchant", "").strip()
+        if not merchant:
+            continue
+        merchant_txns[merchant.upper().replace(" ", "")].append(tx)
+
+    subscriptions = []
+    for merchant_key, txns in merchant_txns.items():
+        if len(txns) < 2:
+            continue
+        amounts: list[int] = []
+        for tx in txns:
+            try:
+                amount = int(str(tx["amount"]).replace(",", ""))
+                if amount > 0:
+                    amounts.append(amount)
+            except (ValueError, TypeError):
+                continue
+        if len(amounts) < 2:
+            continue
+        avg_amount = sum(amounts) / len(amounts)
+        if not all(abs(a - avg_amount) / avg_amount < 0.1 for a in amounts):
+            continue
+
+        dates: list[datetime] = []
+        for tx in txns:
+            date_str = tx.get("date", "")
+            if len(date_str) == 8:
+                try:
+                    dates.append(datetime.strptime(date_str, "%Y%m%d"))
+                except ValueError:
+                    continue
+        dates.sort()
+        if len(dates) < 2:
+            continue
+        intervals = [(dates[i + 1] - dates[i]).days for i in range(len(dates) - 1)]
+        avg_interval = sum(intervals) / len(intervals)
+        cycle = (
+            "monthly"
+            if 20 <= avg_interval <= 40
+            else "yearly"
+            if 340 <= avg_interval <= 395
+            else "weekly"
+            if 5 <= avg_interval <= 10
+            else None
+        )
+        if cycle:
+            subscriptions.append(
+                {
+                    "name": txns[0].get("merchant", merchant_key),
+                    "amount": int(avg_amount),
+                    "billing_cycle": cycle,
+                    "billing_day": dates[-1].day,
+                    "occurrence_count": len(txns),
+                    "last_payment_date": dates[-1].strftime("%Y-%m-%d"),
+                    "card_no": txns[0].get("card_no", ""),
+                    "category": txns[0].get("category", ""),
+                }
+            )
+    subscriptions.sort(key=lambda x: x["amount"], reverse=True)
+    return subscriptions
+
+
+def normalize_records(items: list[dict]) -> list:
+    return [from_card_item(item) for item in items]
+
+
+def retained(label: str, normalize, text: str) -> list:
+    """Normalize a freshly decoded body and report what stays alive afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = json.loads(text)["data"]["resList"]
+    result = normalize(items)
+    elapsed = time.perf_counter() - start
+    del items
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<22} {elapsed * 1000:8.1f} ms   "
+        f"retained {current / 1_048_576:7.1f} MiB   peak {peak / 1_048_576:7.1f} MiB"
+    )
+    return result
+
+
+def best_of(label: str, fn, repeat: int = 5) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<22} best {best * 1000:8.1f} ms")
+
+
+def parse_dicts(txs: list[dict]) -> int:
+    total = 0
+    for tx in txs:
+        # 이전 경로에는 일자 캐시가 없었으므로 캐시 없는 함수로 잰다
+        total += day_ordinal.__wrapped__(tx["date"]) + parse_amount(tx["amount"])
+    return total
+
+
+def parse_records(txs: list) -> int:
+    total = 0
+    for tx in txs:
+        total += tx.day + tx.amount
+    return total
+
+
+def main() -> None:
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    text = synthetic_body(months)
+    dicts = retained("dict + raw", normalize_dicts, text)
+    records = retained("TxRecord", normalize_records, text)
+    print(f"\n{len(records):,} transactions over {months} months\n")
+
+    # tracemalloc 은 할당마다 비용이 붙으므로 시간은 추적 없이 따로 잰다
+    items = json.loads(text)["data"]["resList"]
+    best_of("normalize (dict)", lambda: normalize_dicts(items))
+    best_of("normalize (TxRecord)", lambda: normalize_records(items))
+
+    assert parse_dicts(dicts) == parse_records(records)
+    best_of("parse date/amount", lambda: parse_dicts(dicts))
+    best_of("read record fields", lambda: parse_records(records))
+    best_of("detect (dict, before)", lambda: detect_dicts(dicts))
+    best_of("detect_recurring", lambda: detect_recurring(records))
+    print(
+        f"\ndetected: dict {len(detect_dicts(dicts))}, "
+        f"TxRecord {len(detect_recurring(records))}"
+    )
+
+
+if __name__ == "__main__":
+    main()
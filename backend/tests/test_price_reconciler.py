@@ -0,0 +1,71 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import app.models  # noqa: F401  (관계 대상 모델 등록)
+from app.models.price_history import PriceHistory
+from app.models.subscription import Subscription
+from app.services.price_reconciler import price_anchor, sustained_price
+
+TODAY = date.today()
+FIRST = TODAY - timedelta(days=40)
+SECOND = TODAY - timedelta(days=10)
+PAYMENTS = [(FIRST, 17000), (SECOND, 17000)]
+
+
+def _at(day: date) -> datetime:
+    return datetime.combine(day, time(9))
+
+
+def _subscription(created: date, updated: date | None = None) -> Subscription:
+    return Subscription(
+        id=1,
+        name="넷플릭스",
+        amount=Decimal(13500),
+        currency="KRW",
+        billing_cycle="monthly",
+        next_payment_date=TODAY,
+        created_at=_at(created),
+        updated_at=_at(updated) if updated else None,
+    )
+
+
+def _price_change(day: date) -> PriceHistory:
+    return PriceHistory(
+        subscription_id=1,
+        old_amount=Decimal(12000),
+        new_amount=Decimal(13500),
+        changed_at=_at(day),
+    )
+
+
+def _reconciled(sub: Subscription, history: PriceHistory | None) -> int | None:
+    anchor = price_anchor(sub, history.changed_at if history else None)
+    return sustained_price(sub, PAYMENTS, anchor)
+
+
+def test_created_before_payments_detects_change():
+    # 스케줄러가 결제 사이에 updated_at 을 갱신해도 기준일에 영향이 없어야 한다
+    sub = _subscription(created=FIRST - timedelta(days=60), updated=FIRST)
+    assert _reconciled(sub, None) == 17000
+
+
+def test_created_between_payments_waits_for_more():
+    sub = _subscription(created=FIRST + timedelta(days=5))
+    assert _reconciled(sub, None) is None
+
+
+def test_price_history_before_payments_detects_change():
+    sub = _subscription(created=FIRST - timedelta(days=300))
+    assert _reconciled(sub, _price_change(FIRST - timedelta(days=5))) == 17000
+
+
+def test_price_history_between_payments_waits_for_more():
+    # 첫 결제 뒤에 금액을 직접 고쳤으면 그 이후 결제가 다시 쌓일 때까지 기다린다
+    sub = _subscription(created=FIRST - timedelta(days=300))
+    assert _reconciled(sub, _price_change(FIRST + timedelta(days=5))) is None
+
+
+def test_same_amount_is_not_a_change():
+    sub = _subscription(created=FIRST - timedelta(days=60))
+    anchor = price_anchor(sub, None)
+    assert sustained_price(sub, [(FIRST, 13500), (SECOND, 13500)], anchor) is None